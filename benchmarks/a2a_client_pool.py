@@ -0,0 +1,117 @@
+"""Throughput benchmark for A2AClient connection pooling.
+
+Starts an A2A server on localhost and issues tasks/get requests, one after
+another and with a number of requests in flight at once. The "per-call"
+column opens a new httpx.AsyncClient for every request (the previous
+behaviour of A2AClient); the "pooled" column reuses the keep-alive
+connections of one A2AClient.
+
+Usage:
+    python -m benchmarks.a2a_client_pool --requests 500 --concurrency 1 10 50
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+import httpx
+import uvicorn
+
+from rabbithole.a2a.client import A2AClient
+from rabbithole.a2a.server import A2AServer, InMemoryTaskManager
+from rabbithole.a2a.types import (
+    GetTaskRequest,
+    Message,
+    TaskQueryParams,
+    TaskSendParams,
+    TextPart,
+)
+
+
+class BenchmarkTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+async def _get_task_per_call(url: str):
+    # The request path of A2AClient before the client was pooled.
+    async with httpx.AsyncClient() as client:
+        request = GetTaskRequest(params=TaskQueryParams(id="task"))
+        response = await client.post(url, json=request.model_dump(), timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+
+async def _run(url: str, requests: int, concurrency: int, pooled: bool) -> float:
+    async with A2AClient(url=url) as client:
+
+        async def get_task():
+            if pooled:
+                await client.get_task(TaskQueryParams(id="task"))
+            else:
+                await _get_task_per_call(url)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded():
+            async with semaphore:
+                await get_task()
+
+        await get_task()  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(requests)))
+        return time.perf_counter() - start
+
+
+async def main_async(requests: int, concurrencies: list[int]):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    task_manager = BenchmarkTaskManager()
+    await task_manager.upsert_task(
+        TaskSendParams(
+            id="task", message=Message(role="user", parts=[TextPart(text="hi")])
+        )
+    )
+    server = uvicorn.Server(
+        uvicorn.Config(
+            A2AServer(task_manager=task_manager).app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+        )
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    url = f"http://127.0.0.1:{port}/"
+    print(f"{'concurrency':>11} {'per-call':>12} {'pooled':>12} {'speedup':>8}")
+    try:
+        for concurrency in concurrencies:
+            before = await _run(url, requests, concurrency, pooled=False)
+            after = await _run(url, requests, concurrency, pooled=True)
+            print(
+                f"{concurrency:>11} {requests / before:>8.0f} r/s "
+                f"{requests / after:>8.0f} r/s {before / after:>7.1f}x"
+            )
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
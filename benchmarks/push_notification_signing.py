@@ -0,0 +1,82 @@
+"""Signing throughput of push-notification JWTs per algorithm.
+
+Signs a typical task payload with PushNotificationSenderAuth for every
+supported algorithm and reports signatures per second, along with the cost
+of verifying them on the receiver side.
+
+Usage:
+    python -m benchmarks.push_notification_signing --seconds 2
+"""
+
+import argparse
+import time
+
+import jwt
+from jwt import PyJWK
+
+from rabbithole.a2a.types import (
+    Artifact,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from rabbithole.a2a.utils.push_notification_auth import (
+    SIGNING_ALGORITHMS,
+    PushNotificationSenderAuth,
+)
+
+
+def _payload() -> dict:
+    text = "lorem ipsum dolor sit amet " * 20
+    task = Task(
+        id="task",
+        sessionId="session",
+        status=TaskStatus(state=TaskState.WORKING),
+        history=[
+            Message(role="user", parts=[TextPart(text=text)]),
+            Message(role="agent", parts=[TextPart(text=text)]),
+        ],
+        artifacts=[Artifact(parts=[TextPart(text=text)], index=0)],
+    )
+    return task.model_dump(mode="json", exclude_none=True)
+
+
+def _rate(func, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        func()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    data = _payload()
+    print(f"{'algorithm':>10} {'keygen ms':>10} {'sign/s':>10} {'verify/s':>10}")
+    for algorithm in SIGNING_ALGORITHMS:
+        sender = PushNotificationSenderAuth(algorithm=algorithm)
+        start = time.perf_counter()
+        sender.generate_jwk()
+        keygen_ms = (time.perf_counter() - start) * 1000
+
+        token = sender._generate_jwt(data)
+        public_key = PyJWK.from_dict(sender.public_keys[-1])
+        sign_rate = _rate(lambda: sender._generate_jwt(data), args.seconds)
+        verify_rate = _rate(
+            lambda: jwt.decode(token, public_key, algorithms=[algorithm]),
+            args.seconds,
+        )
+        print(
+            f"{algorithm:>10} {keygen_ms:>10.1f} {sign_rate:>10.0f} {verify_rate:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Throughput and memory of ReplayCache at a sustained notification rate.
+
+Feeds the cache a simulated stream of unique tokens at --rate notifications
+per second for --seconds of simulated time (with a fraction of replays) and
+reports lookups per second of wall time. With --memory, allocations are
+traced to report the memory held by the cache; tracing slows the checks
+down, so throughput is best measured without it.
+
+Usage:
+    python -m benchmarks.replay_cache --rate 10000 --seconds 600
+    python -m benchmarks.replay_cache --rate 10000 --seconds 600 --memory
+"""
+
+import argparse
+import time
+import tracemalloc
+import uuid
+
+from rabbithole.a2a.utils.replay_cache import ReplayCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=int, default=10_000)
+    parser.add_argument("--seconds", type=int, default=600)
+    parser.add_argument("--window", type=float, default=300)
+    parser.add_argument("--max-entries", type=int, default=None)
+    parser.add_argument("--replay-every", type=int, default=100)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args()
+
+    # Token ids are generated up front so that only the cache is measured.
+    token_ids = [uuid.uuid4().hex for _ in range(args.rate)]
+
+    if args.memory:
+        tracemalloc.start()
+    cache = ReplayCache(
+        window=args.window, max_entries=args.max_entries, expected_rate=args.rate
+    )
+    start_time = 1_700_000_000
+    checked = 0
+    elapsed = 0.0
+    for second in range(args.seconds):
+        now = start_time + second
+        ids = [f"{second}:{token_id}" for token_id in token_ids]
+        started = time.perf_counter()
+        for i, token_id in enumerate(ids):
+            cache.check_and_add(token_id, now, now)
+            if i % args.replay_every == 0:
+                cache.check_and_add(token_id, now, now)
+                checked += 1
+        elapsed += time.perf_counter() - started
+        checked += len(ids)
+        del ids
+
+    stats = cache.stats()
+    print(f"checked         {checked}")
+    print(f"checks/s        {checked / elapsed:,.0f}")
+    print(f"entries         {stats['size']}")
+    if args.memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"bytes/entry     {current / max(stats['size'], 1):.1f}")
+        print(f"memory          {current / 2**20:.1f} MiB (peak {peak / 2**20:.1f})")
+    print(f"replays caught  {stats['rejected_replays']}")
+    print(f"min_iat raised  {stats['min_iat'] > float('-inf')}")
+
+
+if __name__ == "__main__":
+    main()
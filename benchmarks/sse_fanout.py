@@ -0,0 +1,100 @@
+"""Fan-out benchmark for SSE event delivery in InMemoryTaskManager.
+
+Publishes a stream of status updates to one task watched by 1, 10 and 100
+subscribers and measures how long it takes until every subscriber has
+produced its SSE frames. The "per-subscriber" column re-serializes the
+event with pydantic for every subscriber (the previous behaviour); the
+"shared" column uses the frames produced by dequeue_events_for_sse, which
+encode each event once.
+
+Usage:
+    python -m benchmarks.sse_fanout --events 500 --subscribers 1 10 100
+"""
+
+import argparse
+import asyncio
+import time
+
+from rabbithole.a2a.server.task_manager import InMemoryTaskManager
+from rabbithole.a2a.types import (
+    Message,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+class BenchmarkTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+async def _consume_shared(manager, request_id, queue):
+    async for _ in manager.dequeue_events_for_sse(request_id, "task", queue):
+        pass
+
+
+async def _consume_per_subscriber(request_id, queue):
+    while True:
+        stream_event = await queue.get()
+        if stream_event is None:
+            return
+        stream_event.to_response(request_id).model_dump_json(exclude_none=True)
+        if stream_event.is_final:
+            return
+
+
+async def run(subscribers: int, events: int, shared: bool) -> float:
+    manager = BenchmarkTaskManager(sse_queue_size=events + 1)
+    await manager.upsert_task(
+        TaskSendParams(
+            id="task", message=Message(role="user", parts=[TextPart(text="hi")])
+        )
+    )
+    queues = [await manager.setup_sse_consumer("task") for _ in range(subscribers)]
+    if shared:
+        consumers = [
+            _consume_shared(manager, f"req-{i}", q) for i, q in enumerate(queues)
+        ]
+    else:
+        consumers = [
+            _consume_per_subscriber(f"req-{i}", q) for i, q in enumerate(queues)
+        ]
+
+    status = TaskStatus(
+        state=TaskState.WORKING,
+        message=Message(role="agent", parts=[TextPart(text="token " * 20)]),
+    )
+    start = time.perf_counter()
+    for i in range(events):
+        await manager.enqueue_events_for_sse(
+            "task",
+            TaskStatusUpdateEvent(id="task", status=status, final=i == events - 1),
+        )
+    await asyncio.gather(*consumers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} {'per-subscriber':>15} {'shared':>10} {'speedup':>8}")
+    for subscribers in args.subscribers:
+        before = asyncio.run(run(subscribers, args.events, shared=False))
+        after = asyncio.run(run(subscribers, args.events, shared=True))
+        print(
+            f"{subscribers:>11} {before * 1000:>12.1f} ms {after * 1000:>7.1f} ms "
+            f"{before / after:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
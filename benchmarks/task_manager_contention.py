@@ -0,0 +1,104 @@
+"""Contention benchmark for InMemoryTaskManager task locking.
+
+Runs many concurrent "streaming" tasks that each call ``update_store`` once
+per token, with a status message and an appended artifact chunk, and reports
+updates per second. ``lock_shards=1`` reproduces the former single global
+lock; larger values give per-task locking.
+
+The real update path is measured: history append, artifact merge and
+retention tracking. A TaskStore that awaits before each update models a
+store write that yields to the event loop (e.g. a persistent backend).
+
+Usage:
+    python -m benchmarks.task_manager_contention --tasks 1 10 100 --tokens 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from rabbithole.a2a.server.task_manager import InMemoryTaskManager
+from rabbithole.a2a.server.task_store import InMemoryTaskStore
+from rabbithole.a2a.types import (
+    Artifact,
+    Message,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+class SlowTaskStore(InMemoryTaskStore):
+    def __init__(self, write_latency: float):
+        super().__init__()
+        self.write_latency = write_latency
+
+    async def update(self, task_id, status=None, messages=None, artifacts=None):
+        # Simulated store round trip while the task lock is held.
+        await asyncio.sleep(self.write_latency)
+        return await super().update(task_id, status, messages, artifacts)
+
+
+class BenchmarkTaskManager(InMemoryTaskManager):
+    def __init__(self, lock_shards: int, write_latency: float):
+        super().__init__(
+            lock_shards=lock_shards, task_store=SlowTaskStore(write_latency)
+        )
+
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+async def _stream(manager: InMemoryTaskManager, task_id: str, tokens: int):
+    status = TaskStatus(
+        state=TaskState.WORKING,
+        message=Message(role="agent", parts=[TextPart(text="tok")]),
+    )
+    chunk = Artifact(parts=[TextPart(text="tok")], index=0, append=True)
+    for _ in range(tokens):
+        await manager.update_store(task_id, status, [chunk])
+
+
+async def run(lock_shards: int, tasks: int, tokens: int, write_latency: float):
+    manager = BenchmarkTaskManager(lock_shards, write_latency)
+    message = Message(role="user", parts=[TextPart(text="hello")])
+    for i in range(tasks):
+        await manager.upsert_task(TaskSendParams(id=f"task-{i}", message=message))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_stream(manager, f"task-{i}", tokens) for i in range(tasks)))
+    elapsed = time.perf_counter() - start
+    return tasks * tokens / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument(
+        "--write-latency",
+        type=float,
+        default=0.0005,
+        help="Seconds spent awaiting inside the critical section.",
+    )
+    args = parser.parse_args()
+
+    print(f"{'tasks':>6} {'global lock':>14} {'sharded':>14} {'speedup':>8}")
+    for tasks in args.tasks:
+        global_rate = asyncio.run(run(1, tasks, args.tokens, args.write_latency))
+        sharded_rate = asyncio.run(
+            run(args.shards, tasks, args.tokens, args.write_latency)
+        )
+        print(
+            f"{tasks:>6} {global_rate:>10.0f} u/s {sharded_rate:>10.0f} u/s "
+            f"{sharded_rate / global_rate:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput benchmark for TaskStore backends.
+
+Simulates streaming tasks: each task is created, receives a number of status
+updates that append one history message, and finishes with an artifact. The
+same workload runs against InMemoryTaskStore and SQLiteTaskStore and the
+result is reported in store operations per second.
+
+Usage:
+    python -m benchmarks.task_store_throughput --tasks 200 --updates 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from rabbithole.a2a.server.sqlite_task_store import SQLiteTaskStore
+from rabbithole.a2a.server.task_store import InMemoryTaskStore, TaskStore
+from rabbithole.a2a.types import (
+    Artifact,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+async def _stream_task(store: TaskStore, task_id: str, updates: int) -> int:
+    await store.create(
+        Task(
+            id=task_id,
+            sessionId="bench",
+            status=TaskStatus(state=TaskState.SUBMITTED),
+            history=[Message(role="user", parts=[TextPart(text="hello")])],
+        )
+    )
+    message = Message(role="agent", parts=[TextPart(text="token")])
+    for _ in range(updates):
+        await store.update(
+            task_id, status=TaskStatus(state=TaskState.WORKING), messages=[message]
+        )
+        await store.get(task_id)
+    await store.update(
+        task_id,
+        status=TaskStatus(state=TaskState.COMPLETED),
+        artifacts=[Artifact(parts=[TextPart(text="done")])],
+    )
+    return 2 + updates * 2
+
+
+async def run(store: TaskStore, tasks: int, updates: int) -> float:
+    start = time.perf_counter()
+    ops = await asyncio.gather(
+        *(_stream_task(store, f"task-{i}", updates) for i in range(tasks))
+    )
+    await store.close()
+    return sum(ops) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=50)
+    args = parser.parse_args()
+
+    memory_rate = asyncio.run(run(InMemoryTaskStore(), args.tasks, args.updates))
+    print(f"InMemoryTaskStore: {memory_rate:>10.0f} ops/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.db")
+        sqlite_rate = asyncio.run(run(SQLiteTaskStore(path), args.tasks, args.updates))
+    print(f"SQLiteTaskStore:   {sqlite_rate:>10.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
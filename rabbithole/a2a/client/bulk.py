@@ -0,0 +1,206 @@
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Union,
+)
+from rabbithole.a2a.types import (
+    A2AClientHTTPError,
+    SendTaskResponse,
+    TaskSendParams,
+)
+from rabbithole.a2a.utils.metrics import Histogram
+import asyncio
+import httpx
+import logging
+import random
+import time
+
+if TYPE_CHECKING:
+    from .client import A2AClient
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_STATUS_CODES = frozenset({429, 503})
+
+
+class BulkTaskResult(NamedTuple):
+    params: TaskSendParams
+    response: Optional[SendTaskResponse]
+    error: Optional[Exception]
+    latency: float
+
+
+class BulkTaskSender:
+    """Sends many tasks with bounded, adaptive concurrency.
+
+    Iterating the sender submits the payloads and yields a BulkTaskResult per
+    task in completion order. Payloads are pulled from the input only when a
+    slot is free, so the input may be a lazy or unbounded iterable.
+
+    The number of requests in flight follows AIMD: it starts at concurrency,
+    is halved whenever the server answers 429 or 503, and grows back by
+    about one per round of successful requests. Throttled requests are
+    retried with jittered exponential backoff up to max_retries times;
+    other failures are reported in the result's error and do not stop the
+    run.
+    """
+
+    def __init__(
+        self,
+        client: "A2AClient",
+        payloads: Union[Iterable[TaskSendParams], AsyncIterable[TaskSendParams]],
+        concurrency: int = 16,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.client = client
+        self.payloads = payloads
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.limit = float(concurrency)
+        self.in_flight = 0
+        self.counters = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "throttled": 0,
+            "retried": 0,
+        }
+        self.latency = Histogram("bulk_task_latency_seconds")
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._last_decrease = float("-inf")
+
+    def __aiter__(self) -> AsyncIterator[BulkTaskResult]:
+        return self._run()
+
+    def stats(self) -> dict[str, Any]:
+        completed = self.counters["succeeded"] + self.counters["failed"]
+        elapsed = 0.0
+        if self._started_at is not None:
+            elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        latency = self.latency.snapshot()
+        return {
+            **self.counters,
+            "in_flight": self.in_flight,
+            "concurrency_limit": int(self.limit),
+            "elapsed": elapsed,
+            "throughput": completed / elapsed if elapsed else 0.0,
+            "latency_p50": latency["p50"],
+            "latency_p90": latency["p90"],
+            "latency_p99": latency["p99"],
+            "latency_max": latency["max"],
+        }
+
+    async def _run(self) -> AsyncIterator[BulkTaskResult]:
+        payloads = _aiter(self.payloads)
+        pending: set[asyncio.Task] = set()
+        exhausted = False
+        self._started_at = time.monotonic()
+        try:
+            while True:
+                while not exhausted and len(pending) < int(self.limit):
+                    try:
+                        params = await payloads.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    self.counters["submitted"] += 1
+                    pending.add(asyncio.create_task(self._send(params)))
+
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for finished in done:
+                    yield finished.result()
+        finally:
+            self._finished_at = time.monotonic()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _send(self, params: TaskSendParams) -> BulkTaskResult:
+        self.in_flight += 1
+        started_at = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response = await self.client.send_task(params, self.timeout)
+                except A2AClientHTTPError as e:
+                    if (
+                        e.status_code not in THROTTLING_STATUS_CODES
+                        or attempt >= self.max_retries
+                    ):
+                        return self._finished(params, None, e, started_at)
+                    attempt += 1
+                    self.counters["retried"] += 1
+                    await asyncio.sleep(self._throttled(attempt))
+                    continue
+                except Exception as e:
+                    return self._finished(params, None, e, started_at)
+
+                self._increase()
+                return self._finished(params, response, None, started_at)
+        finally:
+            self.in_flight -= 1
+
+    def _finished(
+        self,
+        params: TaskSendParams,
+        response: Optional[SendTaskResponse],
+        error: Optional[Exception],
+        started_at: float,
+    ) -> BulkTaskResult:
+        latency = time.monotonic() - started_at
+        self.latency.observe(latency)
+        if error is None and response.error is None:
+            self.counters["succeeded"] += 1
+        else:
+            self.counters["failed"] += 1
+        return BulkTaskResult(params, response, error, latency)
+
+    def _increase(self):
+        # Additive increase: about +1 after a full round of successes.
+        self.limit = min(self.concurrency, self.limit + 1 / self.limit)
+
+    def _throttled(self, attempt: int) -> float:
+        """Halves the limit and returns how long to wait before retrying."""
+        self.counters["throttled"] += 1
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        # Requests that were already in flight when the server pushed back
+        # report it too; count that as one signal rather than several.
+        now = time.monotonic()
+        if now - self._last_decrease >= self.backoff_base:
+            self._last_decrease = now
+            self.limit = max(1.0, self.limit / 2)
+            logger.info(
+                f"Server is throttling, lowering concurrency to {int(self.limit)}"
+            )
+        return delay * random.uniform(0.5, 1.0)
+
+
+async def _aiter(
+    payloads: Union[Iterable[TaskSendParams], AsyncIterable[TaskSendParams]],
+) -> AsyncIterator[TaskSendParams]:
+    if isinstance(payloads, AsyncIterable):
+        async for params in payloads:
+            yield params
+    else:
+        for params in payloads:
+            yield params
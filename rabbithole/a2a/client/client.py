@@ -1,12 +1,13 @@
 import httpx
-from httpx_sse import connect_sse
-from typing import Any, AsyncIterable, Optional
+from httpx_sse import aconnect_sse
+from typing import Any, AsyncIterable, Iterable, Optional, Sequence, Union
 from rabbithole.a2a.types import (
     AgentCard,
     GetTaskRequest,
     SendTaskRequest,
     SendTaskResponse,
     JSONRPCRequest,
+    JSONRPCResponse,
     GetTaskResponse,
     CancelTaskResponse,
     CancelTaskRequest,
@@ -22,13 +23,52 @@ from rabbithole.a2a.types import (
     TaskQueryParams,
     TaskIdParams,
     TaskPushNotificationConfig,
+    TaskResubscriptionRequest,
+    TaskStatusUpdateEvent,
 )
+from .bulk import BulkTaskSender
+import asyncio
 import json
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# Requests that may be sent in a batch, with the type of their response.
+BATCH_RESPONSE_TYPES: dict[type, type[JSONRPCResponse]] = {
+    SendTaskRequest: SendTaskResponse,
+    GetTaskRequest: GetTaskResponse,
+    CancelTaskRequest: CancelTaskResponse,
+    SetTaskPushNotificationRequest: SetTaskPushNotificationResponse,
+    GetTaskPushNotificationRequest: GetTaskPushNotificationResponse,
+}
 
 
 class A2AClient:
+    """JSON-RPC client for an A2A server.
+
+    Requests share one pooled httpx.AsyncClient, so keep-alive connections
+    are reused across calls. Use the client as an async context manager, or
+    call aclose(), to release the connections. A client passed in is used
+    as is and left open.
+
+    Dropped streams are resumed through tasks/resubscribe up to
+    max_reconnects times in a row, waiting reconnect_backoff seconds before
+    the first attempt and doubling the wait, up to reconnect_backoff_max,
+    for each further attempt.
+    """
+
     def __init__(
-        self, agent_card: Optional[AgentCard] = None, url: Optional[str] = None
+        self,
+        agent_card: Optional[AgentCard] = None,
+        url: Optional[str] = None,
+        timeout: Union[float, httpx.Timeout, None] = 30,
+        limits: Optional[httpx.Limits] = None,
+        http2: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+        max_reconnects: int = 5,
+        reconnect_backoff: float = 0.5,
+        reconnect_backoff_max: float = 10.0,
     ):
         if agent_card:
             self.url = agent_card.url
@@ -37,56 +77,271 @@ class A2AClient:
         else:
             raise ValueError("Must provide either agent_card or url")
 
-    async def send_task(self, payload: TaskSendParams) -> SendTaskResponse:
+        self.timeout = timeout
+        self.limits = limits or httpx.Limits(
+            max_connections=100, max_keepalive_connections=20
+        )
+        # HTTP/2 multiplexes concurrent requests over one connection; it
+        # needs the optional h2 package (pip install httpx[http2]).
+        self.http2 = http2
+        self._client = client
+        self._owns_client = client is None
+        self.max_reconnects = max_reconnects
+        self.reconnect_backoff = reconnect_backoff
+        self.reconnect_backoff_max = reconnect_backoff_max
+
+    async def __aenter__(self) -> "A2AClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created on first use, so the pool belongs to the running event loop.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, http2=self.http2
+            )
+        return self._client
+
+    async def send_task(
+        self, payload: TaskSendParams, timeout: Any = httpx.USE_CLIENT_DEFAULT
+    ) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
-        return SendTaskResponse(**await self._send_request(request))
+        return SendTaskResponse(**await self._send_request(request, timeout))
+
+    def send_tasks_bulk(
+        self,
+        payloads: Union[Iterable[TaskSendParams], AsyncIterable[TaskSendParams]],
+        concurrency: int = 16,
+        max_retries: int = 5,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+    ) -> BulkTaskSender:
+        """Sends many tasks concurrently; iterate the result for responses.
+
+        Responses arrive in completion order; the sender's stats() reports
+        throughput and latency percentiles. See BulkTaskSender.
+        """
+        return BulkTaskSender(
+            self,
+            payloads,
+            concurrency=concurrency,
+            max_retries=max_retries,
+            timeout=timeout,
+        )
 
     async def send_task_streaming(
-        self, payload: TaskSendParams
+        self, payload: TaskSendParams, timeout: Any = None
     ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Streams the task's updates as they arrive.
+
+        Each open stream holds one pooled connection (or one HTTP/2 stream),
+        so size limits for the number of streams kept open at once. The
+        stream has no timeout by default, since agents may pause for long.
+
+        If the connection drops, the stream is resumed after the last event
+        received, without running the task again. Events are delivered once.
+        """
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
-                client, "POST", self.url, json=request.model_dump()
-            ) as event_source:
-                try:
-                    for sse in event_source.iter_sse():
-                        yield SendTaskStreamingResponse(**json.loads(sse.data))
-                except json.JSONDecodeError as e:
-                    raise A2AClientJSONError(str(e)) from e
-                except httpx.RequestError as e:
-                    raise A2AClientHTTPError(400, str(e)) from e
-
-    async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        async for response in self._stream(request, timeout):
+            yield response
+
+    async def resubscribe(
+        self, payload: TaskIdParams, timeout: Any = None
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Streams the updates of a running task, resuming like send_task_streaming.
+
+        Put the last event id already received in payload.metadata
+        ["lastEventId"] to skip the events before it.
+        """
+        request = TaskResubscriptionRequest(params=payload)
+        async for response in self._stream(request, timeout):
+            yield response
+
+    async def _stream(
+        self,
+        request: SendTaskStreamingRequest | TaskResubscriptionRequest,
+        timeout: Any,
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        last_event_id: Optional[int] = None
+        if isinstance(request, TaskResubscriptionRequest) and request.params.metadata:
+            last_event_id = request.params.metadata.get("lastEventId")
+            last_event_id = int(last_event_id) if last_event_id is not None else None
+        received_events = False
+        attempt = 0
+
+        while True:
+            sent = False
             try:
-                # Image generation could take time, adding timeout
-                response = await client.post(
-                    self.url, json=request.model_dump(), timeout=30
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+                async with aconnect_sse(
+                    self.client,
+                    "POST",
+                    self.url,
+                    json=request.model_dump(),
+                    timeout=timeout,
+                ) as event_source:
+                    sent = True
+                    response = event_source.response
+                    content_type = response.headers.get("content-type", "")
+                    if not content_type.startswith("text/event-stream"):
+                        # Errors are answered with a plain JSON-RPC response.
+                        await response.aread()
+                        yield SendTaskStreamingResponse(**response.json())
+                        return
+
+                    # The SSE decoder repeats the last id for frames sent
+                    # without one; only a changed id marks a numbered event.
+                    previous_id = ""
+                    async for sse in event_source.aiter_sse():
+                        event_id = None
+                        if sse.id != previous_id and sse.id.isdigit():
+                            event_id = int(sse.id)
+                        previous_id = sse.id
+                        if event_id is not None:
+                            if last_event_id is not None and event_id <= last_event_id:
+                                continue  # Delivered before the reconnect
+                            last_event_id = event_id
+                        received_events = True
+                        attempt = 0
+
+                        update = SendTaskStreamingResponse(**json.loads(sse.data))
+                        yield update
+                        if update.error is not None or (
+                            isinstance(update.result, TaskStatusUpdateEvent)
+                            and update.result.final
+                        ):
+                            return
+                # The server ended the stream; nothing more will arrive.
+                return
             except json.JSONDecodeError as e:
                 raise A2AClientJSONError(str(e)) from e
+            except httpx.TransportError as e:
+                error = e
+
+            # Without event ids, events received so far cannot be skipped.
+            resumable = last_event_id is not None or not received_events
+            if not resumable or attempt >= self.max_reconnects:
+                raise A2AClientHTTPError(400, str(error)) from error
+
+            attempt += 1
+            delay = min(
+                self.reconnect_backoff_max,
+                self.reconnect_backoff * 2 ** (attempt - 1),
+            )
+            logger.warning(
+                f"Stream of task {request.params.id} dropped ({error}), "
+                f"reconnecting in {delay:.1f}s (attempt {attempt})"
+            )
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+            # A request that failed to connect was never sent and can be
+            # retried as is; otherwise the task is already running.
+            if sent or not isinstance(error, httpx.ConnectError):
+                metadata = (
+                    {"lastEventId": last_event_id}
+                    if last_event_id is not None
+                    else None
+                )
+                request = TaskResubscriptionRequest(
+                    id=request.id,
+                    params=TaskIdParams(id=request.params.id, metadata=metadata),
+                )
+
+    async def _send_request(
+        self, request: JSONRPCRequest, timeout: Any = httpx.USE_CLIENT_DEFAULT
+    ) -> dict[str, Any]:
+        return await self._post(request.model_dump(), timeout)
+
+    async def _post(self, body: Any, timeout: Any) -> Any:
+        try:
+            response = await self.client.post(self.url, json=body, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
+    async def batch(
+        self,
+        requests: Sequence[JSONRPCRequest],
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+    ) -> list[JSONRPCResponse]:
+        """Sends several requests in one JSON-RPC batch.
+
+        Returns the responses in the order of the requests, each parsed as
+        the response type of its request, e.g. GetTaskResponse for a
+        GetTaskRequest. Streaming requests cannot be batched. An error the
+        server returned without an id stands in, in order, for a request it
+        did not answer.
+        """
+        if not requests:
+            return []
+        response_types = []
+        for request in requests:
+            response_type = BATCH_RESPONSE_TYPES.get(type(request))
+            if response_type is None:
+                raise ValueError(f"{request.method} cannot be sent in a batch")
+            response_types.append(response_type)
+        if any(request.id is None for request in requests):
+            raise ValueError("Requests in a batch must have ids")
+        if len({request.id for request in requests}) != len(requests):
+            raise ValueError("Requests in a batch must have distinct ids")
+
+        body = await self._post([request.model_dump() for request in requests], timeout)
+        if not isinstance(body, list):
+            raise A2AClientJSONError("Expected a list of responses to the batch")
+
+        responses = {}
+        # Errors for entries the server could not read carry a null id.
+        unattributed = []
+        for response in body:
+            if response.get("id") is None:
+                unattributed.append(response)
+            else:
+                responses[response["id"]] = response
+        results = []
+        for request, response_type in zip(requests, response_types):
+            response = responses.get(request.id)
+            if response is None:
+                if not unattributed:
+                    raise A2AClientJSONError(f"No response for request {request.id}")
+                response = unattributed.pop(0)
+            results.append(response_type(**response))
+        return results
 
-    async def get_task(self, payload: TaskQueryParams) -> GetTaskResponse:
+    async def get_task(
+        self, payload: TaskQueryParams, timeout: Any = httpx.USE_CLIENT_DEFAULT
+    ) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
-        return GetTaskResponse(**await self._send_request(request))
+        return GetTaskResponse(**await self._send_request(request, timeout))
 
-    async def cancel_task(self, payload: TaskIdParams) -> CancelTaskResponse:
+    async def cancel_task(
+        self, payload: TaskIdParams, timeout: Any = httpx.USE_CLIENT_DEFAULT
+    ) -> CancelTaskResponse:
         request = CancelTaskRequest(params=payload)
-        return CancelTaskResponse(**await self._send_request(request))
+        return CancelTaskResponse(**await self._send_request(request, timeout))
 
     async def set_task_callback(
-        self, payload: TaskPushNotificationConfig
+        self,
+        payload: TaskPushNotificationConfig,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
     ) -> SetTaskPushNotificationResponse:
         request = SetTaskPushNotificationRequest(params=payload)
-        return SetTaskPushNotificationResponse(**await self._send_request(request))
+        return SetTaskPushNotificationResponse(
+            **await self._send_request(request, timeout)
+        )
 
     async def get_task_callback(
-        self, payload: TaskIdParams
+        self, payload: TaskIdParams, timeout: Any = httpx.USE_CLIENT_DEFAULT
     ) -> GetTaskPushNotificationResponse:
         request = GetTaskPushNotificationRequest(params=payload)
-        return GetTaskPushNotificationResponse(**await self._send_request(request))
+        return GetTaskPushNotificationResponse(
+            **await self._send_request(request, timeout)
+        )
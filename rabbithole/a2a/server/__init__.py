@@ -1,4 +1,19 @@
 from .server import A2AServer
 from .task_manager import TaskManager, InMemoryTaskManager
+from .retention import RetentionPolicy
+from .task_store import TaskStore, InMemoryTaskStore
+from .sqlite_task_store import SQLiteTaskStore
+from .sse_subscriber import OverflowPolicy
+from .supervisor import TaskSupervisor
 
-__all__ = ["A2AServer", "TaskManager", "InMemoryTaskManager"]
+__all__ = [
+    "A2AServer",
+    "TaskManager",
+    "InMemoryTaskManager",
+    "RetentionPolicy",
+    "TaskStore",
+    "InMemoryTaskStore",
+    "SQLiteTaskStore",
+    "OverflowPolicy",
+    "TaskSupervisor",
+]
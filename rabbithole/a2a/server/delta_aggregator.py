@@ -0,0 +1,97 @@
+from typing import Callable, Optional
+from rabbithole.a2a.types import Artifact, TextPart
+import time
+
+
+class DeltaAggregator:
+    """Collects streamed text deltas into artifact chunks.
+
+    Deltas are buffered until max_chars characters are pending or max_delay
+    seconds have passed since the first pending delta, then released as one
+    Artifact chunk. The first chunk starts the artifact (append=False) and
+    later chunks extend it (append=True); finish() releases the remainder with
+    lastChunk=True. add() only checks the time window when a delta arrives,
+    so a caller waiting on a stalled stream should flush() once
+    time_until_flush() has passed.
+    """
+
+    def __init__(
+        self,
+        index: int = 0,
+        name: Optional[str] = None,
+        max_chars: int = 256,
+        max_delay: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.index = index
+        self.name = name
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.clock = clock
+        self.chunks_emitted = 0
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._pending_since: Optional[float] = None
+        self._emitted: list[str] = []
+
+    @property
+    def text(self) -> str:
+        """All text received so far, emitted or not."""
+        return "".join(self._emitted) + "".join(self._pending)
+
+    def add(self, delta: str) -> Optional[Artifact]:
+        """Adds a delta and returns a chunk if the window is full."""
+        if not delta:
+            return None
+
+        if self._pending_since is None:
+            self._pending_since = self.clock()
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+
+        if (
+            self._pending_chars >= self.max_chars
+            or self.clock() - self._pending_since >= self.max_delay
+        ):
+            return self._emit(last_chunk=False)
+        return None
+
+    def time_until_flush(self) -> Optional[float]:
+        """Seconds until pending text is due, or None if nothing is pending."""
+        if self._pending_since is None:
+            return None
+        return max(0.0, self._pending_since + self.max_delay - self.clock())
+
+    def flush(self) -> Optional[Artifact]:
+        """Releases pending text as a chunk, if there is any."""
+        if not self._pending:
+            return None
+        return self._emit(last_chunk=False)
+
+    def finish(self, delta: str = "") -> Optional[Artifact]:
+        """Releases the remaining text and delta as the last chunk.
+
+        Returns None if no text is left, i.e. the chunk released before was
+        the last one.
+        """
+        if delta:
+            self._pending.append(delta)
+        if not self._pending:
+            return None
+        return self._emit(last_chunk=True)
+
+    def _emit(self, last_chunk: bool) -> Artifact:
+        text = "".join(self._pending)
+        artifact = Artifact(
+            name=self.name,
+            parts=[TextPart(text=text)],
+            index=self.index,
+            append=self.chunks_emitted > 0,
+            lastChunk=last_chunk,
+        )
+        self.chunks_emitted += 1
+        self._emitted.append(text)
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_since = None
+        return artifact
@@ -0,0 +1,102 @@
+from collections import deque
+from itertools import islice
+from typing import Any, Optional, Union
+from rabbithole.a2a.types import (
+    JSONRPCError,
+    SendTaskStreamingResponse,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
+)
+import json
+
+TaskEvent = Union[TaskStatusUpdateEvent, TaskArtifactUpdateEvent, JSONRPCError]
+
+
+class StreamEvent:
+    """A task update numbered for SSE delivery and replay.
+
+    The event_id is sent as the SSE "id" field, so a reconnecting client can
+    report the last event it saw through the Last-Event-ID header.
+
+    The event is serialized to JSON once and shared by every subscriber; only
+    the JSON-RPC id of each subscriber's request is spliced in per frame.
+    """
+
+    __slots__ = ("event_id", "task_id", "event", "_payload")
+
+    def __init__(self, event_id: int, task_id: str, event: TaskEvent):
+        self.event_id = event_id
+        self.task_id = task_id
+        self.event = event
+        self._payload: Optional[bytes] = None
+
+    @property
+    def is_final(self) -> bool:
+        return isinstance(self.event, TaskStatusUpdateEvent) and self.event.final
+
+    def to_response(self, request_id: Any) -> SendTaskStreamingResponse:
+        if isinstance(self.event, JSONRPCError):
+            return SendTaskStreamingResponse(id=request_id, error=self.event)
+        return SendTaskStreamingResponse(id=request_id, result=self.event)
+
+    @property
+    def payload(self) -> bytes:
+        """The "result" or "error" member of the response, encoded once."""
+        if self._payload is None:
+            is_error = isinstance(self.event, JSONRPCError)
+            key = b'"error":' if is_error else b'"result":'
+            event_json = self.event.model_dump_json(exclude_none=True)
+            self._payload = key + event_json.encode()
+        return self._payload
+
+    def encode(self, request_id: Any) -> bytes:
+        """Returns the complete SSE frame for a subscriber's request.
+
+        Produces the same JSON as
+        to_response(request_id).model_dump_json(exclude_none=True).
+        """
+        header = b'{"jsonrpc":"2.0",'
+        if request_id is not None:
+            header += b'"id":' + json.dumps(request_id).encode() + b","
+        return b"".join(
+            (
+                b"id: %d\r\ndata: " % self.event_id,
+                header,
+                self.payload,
+                b"}\r\n\r\n",
+            )
+        )
+
+
+class TaskEventBuffer:
+    """Ring buffer of the most recent events of one task.
+
+    Event ids are assigned consecutively starting at 1, so the events missed
+    by a client are found by offset instead of by searching the buffer.
+    """
+
+    def __init__(self, task_id: str, maxlen: int):
+        self.task_id = task_id
+        self.events: deque[StreamEvent] = deque(maxlen=maxlen)
+        self.last_event_id = 0
+
+    def append(self, event: TaskEvent) -> StreamEvent:
+        self.last_event_id += 1
+        stream_event = StreamEvent(self.last_event_id, self.task_id, event)
+        self.events.append(stream_event)
+        return stream_event
+
+    def since(self, last_event_id: Optional[int]) -> list[StreamEvent]:
+        """Returns the buffered events newer than last_event_id."""
+        if not self.events:
+            return []
+        if last_event_id is None:
+            return list(self.events)
+
+        first_event_id = self.events[0].event_id
+        start = max(0, last_event_id - first_event_id + 1)
+        return list(islice(self.events, start, None))
+
+    @property
+    def is_finished(self) -> bool:
+        return bool(self.events) and self.events[-1].is_final
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from typing import Iterable, Optional
+from pydantic import BaseModel
+from rabbithole.a2a.types import (
+    Artifact,
+    DataPart,
+    FilePart,
+    Message,
+    Part,
+    TaskState,
+    TextPart,
+)
+import time
+
+TERMINAL_TASK_STATES = frozenset(
+    {TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED}
+)
+
+
+class RetentionPolicy(BaseModel):
+    """Limits on how many finished tasks a task manager keeps resident.
+
+    Only tasks in a terminal state are ever evicted, oldest finished first.
+    A limit of None disables that rule. Tasks loaded from a persistent
+    TaskStore that this process never touched are not counted. With a
+    ttl_seconds, expired tasks are also swept every sweep_interval seconds
+    (at most ttl_seconds), so a server without traffic still frees them.
+    """
+
+    max_tasks: int | None = None
+    ttl_seconds: float | None = None
+    max_history_bytes: int | None = None
+    sweep_interval: float = 60.0
+
+
+class TaskRetention:
+    """Bookkeeping for RetentionPolicy.
+
+    Finished tasks are indexed in an OrderedDict in the order they reached a
+    terminal state. Because every task shares the same TTL, that order is also
+    the expiry order, so each eviction pass only looks at the head of the index
+    and costs O(evicted) rather than a scan over all tasks.
+    """
+
+    def __init__(self, policy: Optional[RetentionPolicy] = None):
+        self.policy = policy or RetentionPolicy()
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        self._history_bytes: dict[str, int] = {}
+        self._artifact_bytes: dict[str, int] = {}
+        self.resident_history_bytes = 0
+        self.resident_artifact_bytes = 0
+        self.evictions: dict[str, int] = {"max_tasks": 0, "ttl": 0, "history_bytes": 0}
+
+    def track_history(self, task_id: str, messages: Iterable[Message]):
+        size = sum(_parts_size(m.parts) for m in messages)
+        self._history_bytes[task_id] = self._history_bytes.get(task_id, 0) + size
+        self.resident_history_bytes += size
+
+    def track_artifacts(self, task_id: str, artifacts: Iterable[Artifact]):
+        size = sum(_parts_size(a.parts) for a in artifacts)
+        self._artifact_bytes[task_id] = self._artifact_bytes.get(task_id, 0) + size
+        self.resident_artifact_bytes += size
+
+    def track_state(self, task_id: str, state: TaskState):
+        if state in TERMINAL_TASK_STATES:
+            self._finished.pop(task_id, None)
+            self._finished[task_id] = time.monotonic()
+        else:
+            self.mark_active(task_id)
+
+    def mark_active(self, task_id: str):
+        self._finished.pop(task_id, None)
+
+    def forget(self, task_id: str):
+        self._finished.pop(task_id, None)
+        self.resident_history_bytes -= self._history_bytes.pop(task_id, 0)
+        self.resident_artifact_bytes -= self._artifact_bytes.pop(task_id, 0)
+
+    @property
+    def resident_tasks(self) -> int:
+        # Every task records its first message on creation.
+        return len(self._history_bytes)
+
+    def select_evictions(self) -> list[str]:
+        """Pops and returns the ids of finished tasks that must be evicted."""
+        policy = self.policy
+        evicted: list[str] = []
+
+        if policy.ttl_seconds is not None:
+            deadline = time.monotonic() - policy.ttl_seconds
+            while self._finished:
+                oldest_finished_at = next(iter(self._finished.values()))
+                if oldest_finished_at > deadline:
+                    break
+                evicted.append(self._evict_oldest("ttl"))
+
+        if policy.max_tasks is not None:
+            while self._finished and self.resident_tasks > policy.max_tasks:
+                evicted.append(self._evict_oldest("max_tasks"))
+
+        if policy.max_history_bytes is not None:
+            while (
+                self._finished
+                and self.resident_history_bytes > policy.max_history_bytes
+            ):
+                evicted.append(self._evict_oldest("history_bytes"))
+
+        return evicted
+
+    def _evict_oldest(self, reason: str) -> str:
+        task_id, _ = self._finished.popitem(last=False)
+        self.forget(task_id)
+        self.evictions[reason] += 1
+        return task_id
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "resident_tasks": self.resident_tasks,
+            "finished_tasks": len(self._finished),
+            "resident_history_bytes": self.resident_history_bytes,
+            "resident_artifact_bytes": self.resident_artifact_bytes,
+            "evictions_total": sum(self.evictions.values()),
+            **{f"evictions_{reason}": n for reason, n in self.evictions.items()},
+        }
+
+
+def _parts_size(parts: Iterable[Part]) -> int:
+    """Estimates the memory held by message or artifact parts.
+
+    Only the payload is counted: serializing every streamed update just to
+    measure it would cost more than the update itself.
+    """
+    size = 0
+    for part in parts:
+        if isinstance(part, TextPart):
+            size += len(part.text)
+        elif isinstance(part, FilePart):
+            size += len(part.file.bytes or part.file.uri or "")
+        elif isinstance(part, DataPart):
+            size += len(str(part.data))
+    return size
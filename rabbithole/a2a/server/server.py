@@ -1,6 +1,6 @@
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
-from sse_starlette.sse import EventSourceResponse
+from starlette.responses import JSONResponse, Response
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 from starlette.requests import Request
 from rabbithole.a2a.types import (
     A2ARequest,
@@ -17,8 +17,11 @@ from rabbithole.a2a.types import (
     TaskResubscriptionRequest,
     SendTaskStreamingRequest,
     JSONRPCError,
+    TaskIdParams,
 )
 from pydantic import ValidationError
+from contextlib import asynccontextmanager
+import asyncio
 import json
 from typing import AsyncIterable, Any, Optional
 from rabbithole.a2a.server.task_manager import TaskManager
@@ -28,6 +31,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class InvalidBatchError(ValueError):
+    """Raised for a JSON-RPC batch that cannot be processed as a whole."""
+
+
 class A2AServer:
     def __init__(
         self,
@@ -36,13 +43,15 @@ class A2AServer:
         endpoint="/",
         agent_card: Optional[AgentCard] = None,
         task_manager: Optional[TaskManager] = None,
+        max_batch_size: int = 1000,
     ):
         self.host = host
         self.port = port
         self.endpoint = endpoint
         self.task_manager = task_manager
         self.agent_card = agent_card
-        self.app = Starlette()
+        self.max_batch_size = max_batch_size
+        self.app = Starlette(lifespan=self._lifespan)
         self.app.add_route(self.endpoint, self._process_request, methods=["POST"])
         self.app.add_route(
             "/.well-known/agent.json", self._get_agent_card, methods=["GET"]
@@ -59,6 +68,12 @@ class A2AServer:
 
         uvicorn.run(self.app, host=self.host, port=self.port)
 
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette):
+        yield
+        if self.task_manager is not None:
+            await self.task_manager.close()
+
     def _get_agent_card(self, request: Request) -> JSONResponse:
         assert self.agent_card is not None, (
             "agent_card must be set before starting the server."
@@ -71,59 +86,166 @@ class A2AServer:
         )
         try:
             body = await request.json()
+            if isinstance(body, list):
+                return await self._process_batch(body, request)
+
             json_rpc_request = A2ARequest.validate_python(body)
+            result = await self._dispatch(json_rpc_request, request)
+            return self._create_response(result)
 
-            result: Any
-            if isinstance(json_rpc_request, GetTaskRequest):
-                result = await self.task_manager.on_get_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskRequest):
-                result = await self.task_manager.on_send_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskStreamingRequest):
-                result = await self.task_manager.on_send_task_subscribe(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, CancelTaskRequest):
-                result = await self.task_manager.on_cancel_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
-                result = await self.task_manager.on_set_task_push_notification(
-                    json_rpc_request
+        except Exception as e:
+            return self._handle_exception(e)
+
+    async def _dispatch(self, json_rpc_request: Any, request: Request) -> Any:
+        result: Any
+        if isinstance(json_rpc_request, GetTaskRequest):
+            result = await self.task_manager.on_get_task(json_rpc_request)
+        elif isinstance(json_rpc_request, SendTaskRequest):
+            result = await self.task_manager.on_send_task(json_rpc_request)
+        elif isinstance(json_rpc_request, SendTaskStreamingRequest):
+            last_event_id = request.headers.get("Last-Event-ID")
+            if last_event_id is not None:
+                # A reconnecting EventSource re-sends the original request.
+                # Resume the existing stream instead of running the task again.
+                result = await self.task_manager.on_resubscribe_to_task(
+                    self._resubscription_request(json_rpc_request, last_event_id)
                 )
-            elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
-                result = await self.task_manager.on_get_task_push_notification(
+            else:
+                result = await self.task_manager.on_send_task_subscribe(
                     json_rpc_request
                 )
-            elif isinstance(json_rpc_request, TaskResubscriptionRequest):
-                result = await self.task_manager.on_resubscribe_to_task(
-                    json_rpc_request
+        elif isinstance(json_rpc_request, CancelTaskRequest):
+            result = await self.task_manager.on_cancel_task(json_rpc_request)
+        elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
+            result = await self.task_manager.on_set_task_push_notification(
+                json_rpc_request
+            )
+        elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
+            result = await self.task_manager.on_get_task_push_notification(
+                json_rpc_request
+            )
+        elif isinstance(json_rpc_request, TaskResubscriptionRequest):
+            last_event_id = request.headers.get("Last-Event-ID")
+            if last_event_id is not None:
+                json_rpc_request = self._resubscription_request(
+                    json_rpc_request, last_event_id
                 )
-            else:
-                logger.warning(f"Unexpected request type: {type(json_rpc_request)}")
-                raise ValueError(f"Unexpected request type: {type(request)}")
-
-            return self._create_response(result)
-
+            result = await self.task_manager.on_resubscribe_to_task(json_rpc_request)
+        else:
+            logger.warning(f"Unexpected request type: {type(json_rpc_request)}")
+            raise ValueError(f"Unexpected request type: {type(request)}")
+
+        return result
+
+    async def _process_batch(
+        self, body: list, request: Request
+    ) -> JSONResponse | Response:
+        """Handles a JSON-RPC batch; its requests are dispatched concurrently.
+
+        Notifications (entries without an id) are run but get no response; a
+        batch of notifications only is answered with an empty 204.
+        """
+        if not body:
+            raise InvalidBatchError("Batch must not be empty")
+        if len(body) > self.max_batch_size:
+            raise InvalidBatchError(
+                f"Batch must not exceed {self.max_batch_size} requests"
+            )
+
+        responses = await asyncio.gather(
+            *(self._process_batch_entry(entry, request) for entry in body)
+        )
+        responses = [r for r in responses if r is not None]
+        if not responses:
+            return Response(status_code=204)
+        return JSONResponse([self._dump_batch_response(r) for r in responses])
+
+    async def _process_batch_entry(
+        self, entry: Any, request: Request
+    ) -> Optional[JSONRPCResponse]:
+        """Returns the entry's response, or None for a notification."""
+        is_notification = isinstance(entry, dict) and "id" not in entry
+        request_id = entry.get("id") if isinstance(entry, dict) else None
+        if not isinstance(request_id, (int, str)):
+            request_id = None
+        try:
+            json_rpc_request = A2ARequest.validate_python(entry)
         except Exception as e:
-            return self._handle_exception(e)
+            # A request that cannot be read is answered even without an id.
+            return JSONRPCResponse(id=request_id, error=self._error_for_exception(e))
+        # Validation fills in a generated id; the response echoes the entry's.
+        json_rpc_request.id = request_id
+
+        if isinstance(
+            json_rpc_request, (SendTaskStreamingRequest, TaskResubscriptionRequest)
+        ):
+            # A stream cannot be embedded in a batch response.
+            response = JSONRPCResponse(
+                id=request_id,
+                error=InvalidRequestError(
+                    message=f"{json_rpc_request.method} is not allowed in a batch"
+                ),
+            )
+        else:
+            try:
+                response = await self._dispatch(json_rpc_request, request)
+            except Exception as e:
+                response = JSONRPCResponse(
+                    id=request_id, error=self._error_for_exception(e)
+                )
+        if is_notification:
+            return None
+        response.id = request_id
+        return response
+
+    @staticmethod
+    def _dump_batch_response(response: JSONRPCResponse) -> dict[str, Any]:
+        body = response.model_dump(exclude_none=True)
+        # A null id is part of the response, unlike other unset members.
+        body.setdefault("id", None)
+        return body
+
+    def _resubscription_request(
+        self,
+        request: SendTaskStreamingRequest | TaskResubscriptionRequest,
+        last_event_id: str,
+    ) -> TaskResubscriptionRequest:
+        """Builds a tasks/resubscribe request resuming after last_event_id."""
+        metadata = dict(request.params.metadata or {})
+        metadata["lastEventId"] = last_event_id
+        return TaskResubscriptionRequest(
+            id=request.id,
+            params=TaskIdParams(id=request.params.id, metadata=metadata),
+        )
 
     def _handle_exception(self, e: Exception) -> JSONResponse:
-        json_rpc_error: JSONRPCError
+        response = JSONRPCResponse(id=None, error=self._error_for_exception(e))
+        return JSONResponse(response.model_dump(exclude_none=True), status_code=400)
+
+    def _error_for_exception(self, e: Exception) -> JSONRPCError:
         if isinstance(e, json.decoder.JSONDecodeError):
-            json_rpc_error = JSONParseError()
+            return JSONParseError()
         elif isinstance(e, ValidationError):
-            json_rpc_error = InvalidRequestError(data=json.loads(e.json()))
+            return InvalidRequestError(data=json.loads(e.json()))
+        elif isinstance(e, InvalidBatchError):
+            return InvalidRequestError(message=str(e))
         else:
             logger.error(f"Unhandled exception: {e}")
-            json_rpc_error = InternalError()
-
-        response = JSONRPCResponse(id=None, error=json_rpc_error)
-        return JSONResponse(response.model_dump(exclude_none=True), status_code=400)
+            return InternalError()
 
     def _create_response(self, result: Any) -> JSONResponse | EventSourceResponse:
         if isinstance(result, AsyncIterable):
 
-            async def event_generator(result) -> AsyncIterable[dict[str, str]]:
+            async def event_generator(
+                result,
+            ) -> AsyncIterable[dict[str, str] | ServerSentEvent | bytes]:
                 async for item in result:
-                    yield {"data": item.model_dump_json(exclude_none=True)}
+                    # Task managers may hand over frames that are already
+                    # encoded once for all subscribers.
+                    if isinstance(item, (ServerSentEvent, bytes)):
+                        yield item
+                    else:
+                        yield {"data": item.model_dump_json(exclude_none=True)}
 
             return EventSourceResponse(event_generator(result))
         elif isinstance(result, JSONRPCResponse):
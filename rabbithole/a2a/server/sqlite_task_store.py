@@ -0,0 +1,276 @@
+from collections import OrderedDict
+from typing import Any, Optional
+from rabbithole.a2a.types import Artifact, Message, Task, TaskStatus
+from .task_store import TaskStore, apply_task_update
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    session_id TEXT,
+    status TEXT NOT NULL,
+    metadata TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_session_id ON tasks (session_id);
+CREATE TABLE IF NOT EXISTS task_history (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS task_artifacts (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    artifact TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteTaskStore(TaskStore):
+    """TaskStore persisted to a SQLite database in WAL mode.
+
+    Recently used tasks are kept in an LRU cache and every write is applied to
+    the cached Task immediately. The matching SQL statements are queued and
+    committed in batches by a background flusher (write-behind), either when
+    batch_size statements are pending or flush_interval seconds have passed.
+    History messages and artifact chunks are stored as separate rows, so a
+    streamed update appends one row instead of rewriting the task; chunks are
+    merged back into their artifact when the task is loaded.
+
+    Each task is expected to be written by a single process; other processes
+    sharing the database observe its writes once they are flushed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 1024,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+    ):
+        self.path = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cache: OrderedDict[str, Task] = OrderedDict()
+        # Number of artifact rows per cached task. It differs from
+        # len(task.artifacts) once appended chunks have been merged.
+        self._artifact_rows: dict[str, int] = {}
+        self._pending: list[tuple[str, tuple[Any, ...]]] = []
+        self._db_lock = asyncio.Lock()
+        self._flush_wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        task = self._cache.get(task_id)
+        if task is not None:
+            self._cache.move_to_end(task_id)
+            return task
+
+        # Pending writes may belong to a task that already left the cache.
+        await self.flush()
+        async with self._db_lock:
+            loaded = await asyncio.to_thread(self._load_task, task_id)
+
+        # A concurrent get() or create() may have cached the task while this
+        # one was loading; that copy can already carry newer writes.
+        cached = self._cache.get(task_id)
+        if cached is not None:
+            self._cache.move_to_end(task_id)
+            return cached
+        if loaded is None:
+            return None
+
+        task, artifact_rows = loaded
+        self._cache_put(task)
+        self._artifact_rows[task_id] = artifact_rows
+        return task
+
+    async def create(self, task: Task) -> None:
+        self._cache_put(task)
+        self._enqueue(
+            "INSERT OR REPLACE INTO tasks (id, session_id, status, metadata, updated_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                task.id,
+                task.sessionId,
+                task.status.model_dump_json(),
+                json.dumps(task.metadata) if task.metadata is not None else None,
+                time.time(),
+            ),
+        )
+        self._enqueue("DELETE FROM task_history WHERE task_id = ?", (task.id,))
+        self._enqueue("DELETE FROM task_artifacts WHERE task_id = ?", (task.id,))
+        self._enqueue_appends(task.id, "task_history", 0, task.history or [])
+        self._enqueue_appends(task.id, "task_artifacts", 0, task.artifacts or [])
+        self._artifact_rows[task.id] = len(task.artifacts or [])
+
+    async def update(
+        self,
+        task_id: str,
+        status: Optional[TaskStatus] = None,
+        messages: Optional[list[Message]] = None,
+        artifacts: Optional[list[Artifact]] = None,
+    ) -> Task:
+        task = await self.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+
+        history_seq = len(task.history or [])
+        artifact_seq = self._artifact_rows.get(task_id, 0)
+        self._artifact_rows[task_id] = artifact_seq + len(artifacts or [])
+        apply_task_update(task, status, messages, artifacts)
+
+        self._enqueue(
+            "UPDATE tasks SET status = ?, updated_at = ? WHERE id = ?",
+            (task.status.model_dump_json(), time.time(), task_id),
+        )
+        self._enqueue_appends(task_id, "task_history", history_seq, messages or [])
+        self._enqueue_appends(task_id, "task_artifacts", artifact_seq, artifacts or [])
+        return task
+
+    async def delete(self, task_id: str) -> None:
+        self._cache.pop(task_id, None)
+        self._artifact_rows.pop(task_id, None)
+        self._enqueue("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self._enqueue("DELETE FROM task_history WHERE task_id = ?", (task_id,))
+        self._enqueue("DELETE FROM task_artifacts WHERE task_id = ?", (task_id,))
+
+    async def evict(self, task_id: str) -> None:
+        # The task stays on disk and is reloaded on the next get().
+        self._cache.pop(task_id, None)
+        self._artifact_rows.pop(task_id, None)
+
+    async def get_by_session(self, session_id: str) -> list[Task]:
+        await self.flush()
+        async with self._db_lock:
+            task_ids = await asyncio.to_thread(
+                lambda: [
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT id FROM tasks WHERE session_id = ?", (session_id,)
+                    )
+                ]
+            )
+        tasks = [await self.get(task_id) for task_id in task_ids]
+        return [t for t in tasks if t is not None]
+
+    async def flush(self) -> None:
+        """Commits all queued statements in a single transaction."""
+        if not self._pending:
+            return
+
+        async with self._db_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._commit, batch)
+            except BaseException:
+                # Keep the batch ahead of newer writes, so a failed or
+                # interrupted commit is retried by the next flush. Every
+                # statement is idempotent, so replaying one is harmless.
+                self._pending[:0] = batch
+                raise
+
+    async def close(self) -> None:
+        # Stop the flusher by flag rather than cancel(): asyncio.wait_for may
+        # swallow a cancellation that races with the wakeup event.
+        self._closed = True
+        self._flush_wakeup.set()
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+
+        await self.flush()
+        self._conn.close()
+
+    def _enqueue(self, sql: str, params: tuple[Any, ...]):
+        self._pending.append((sql, params))
+        if len(self._pending) >= self.batch_size:
+            self._flush_wakeup.set()
+        if self._flusher is None and not self._closed:
+            self._flusher = asyncio.create_task(self._run_flusher())
+
+    def _enqueue_appends(self, task_id: str, table: str, start: int, items: list):
+        column = "message" if table == "task_history" else "artifact"
+        for seq, item in enumerate(items, start=start):
+            self._enqueue(
+                f"INSERT OR REPLACE INTO {table} (task_id, seq, {column})"
+                " VALUES (?, ?, ?)",
+                (task_id, seq, item.model_dump_json(exclude_none=True)),
+            )
+
+    async def _run_flusher(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(
+                    self._flush_wakeup.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error while flushing task store to {self.path}: {e}")
+
+    def _cache_put(self, task: Task):
+        self._cache[task.id] = task
+        self._cache.move_to_end(task.id)
+        while len(self._cache) > self.cache_size:
+            evicted_id, _ = self._cache.popitem(last=False)
+            self._artifact_rows.pop(evicted_id, None)
+
+    def _commit(self, batch: list[tuple[str, tuple[Any, ...]]]):
+        with self._conn:
+            for sql, params in batch:
+                self._conn.execute(sql, params)
+
+    def _load_task(self, task_id: str) -> Optional[tuple[Task, int]]:
+        row = self._conn.execute(
+            "SELECT session_id, status, metadata FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        session_id, status, metadata = row
+        history = [
+            Message.model_validate_json(r[0])
+            for r in self._conn.execute(
+                "SELECT message FROM task_history WHERE task_id = ? ORDER BY seq",
+                (task_id,),
+            )
+        ]
+        artifact_rows = [
+            Artifact.model_validate_json(r[0])
+            for r in self._conn.execute(
+                "SELECT artifact FROM task_artifacts WHERE task_id = ? ORDER BY seq",
+                (task_id,),
+            )
+        ]
+        task = Task(
+            id=task_id,
+            sessionId=session_id,
+            status=TaskStatus.model_validate_json(status),
+            history=history,
+            metadata=json.loads(metadata) if metadata is not None else None,
+        )
+        if artifact_rows:
+            apply_task_update(task, None, None, artifact_rows)
+        return task, len(artifact_rows)
@@ -0,0 +1,134 @@
+from collections import deque
+from enum import Enum
+from typing import Optional
+from rabbithole.a2a.types import TaskStatusUpdateEvent
+from .event_buffer import StreamEvent
+import asyncio
+
+
+class OverflowPolicy(str, Enum):
+    """What an SSESubscriber does when its queue is full."""
+
+    DROP_OLDEST = "drop-oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+class SSESubscriber:
+    """Bounded event queue feeding one SSE client.
+
+    put_nowait never blocks, so a slow or dead client cannot stall delivery
+    to other subscribers of the same task. When the queue is full the
+    overflow policy decides what happens:
+
+    - DROP_OLDEST discards the oldest queued event.
+    - COALESCE replaces a queued non-final status update with the newer one
+      and falls back to DROP_OLDEST when that is not possible.
+    - DISCONNECT ends the stream. The client can then resubscribe with
+      Last-Event-ID and replay from the task's event buffer.
+
+    Dropped events leave a gap in the SSE ids, so clients can detect them.
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        maxsize: int = 1024,
+        overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.task_id = task_id
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self._events: deque[Optional[StreamEvent]] = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.last_queued_event_id = 0
+        self.last_sent_event_id = 0
+        self.max_queued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.disconnected = False
+
+    def put_nowait(self, stream_event: Optional[StreamEvent]) -> bool:
+        """Queues an event, or None to end the stream.
+
+        Returns False if the subscriber no longer accepts events.
+        """
+        if self.closed:
+            return False
+
+        if stream_event is None:
+            self._close()
+            return False
+
+        if len(self._events) >= self.maxsize and not self._make_room(stream_event):
+            return False
+
+        self._events.append(stream_event)
+        self.last_queued_event_id = stream_event.event_id
+        self.max_queued = max(self.max_queued, len(self._events))
+        self._ready.set()
+        return True
+
+    async def get(self) -> Optional[StreamEvent]:
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+
+        stream_event = self._events.popleft()
+        if stream_event is not None:
+            self.last_sent_event_id = stream_event.event_id
+        return stream_event
+
+    @property
+    def lag(self) -> int:
+        """Number of events queued but not yet sent to the client."""
+        return sum(1 for e in self._events if e is not None)
+
+    def stats(self) -> dict[str, int | str | bool]:
+        return {
+            "task_id": self.task_id,
+            "overflow_policy": self.overflow_policy.value,
+            "lag": self.lag,
+            "max_queued": self.max_queued,
+            "last_queued_event_id": self.last_queued_event_id,
+            "last_sent_event_id": self.last_sent_event_id,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "disconnected": self.disconnected,
+        }
+
+    def _make_room(self, stream_event: StreamEvent) -> bool:
+        if self.overflow_policy == OverflowPolicy.DISCONNECT:
+            self.disconnected = True
+            self._events.clear()
+            self._close()
+            return False
+
+        if self.overflow_policy == OverflowPolicy.COALESCE and _is_progress(
+            stream_event
+        ):
+            tail = self._events[-1]
+            if tail is not None and _is_progress(tail):
+                self._events.pop()
+                self.coalesced += 1
+                return True
+
+        self._events.popleft()
+        self.dropped += 1
+        return True
+
+    def _close(self):
+        self.closed = True
+        self._events.append(None)
+        self._ready.set()
+
+
+def _is_progress(stream_event: StreamEvent) -> bool:
+    """Whether an event is a status update that a later one supersedes."""
+    return isinstance(stream_event.event, TaskStatusUpdateEvent) and not (
+        stream_event.event.final
+    )
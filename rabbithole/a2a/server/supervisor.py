@@ -0,0 +1,200 @@
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Coroutine, Optional
+from rabbithole.a2a.utils.metrics import Histogram
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RunCancelledError(Exception):
+    """Raised to the waiter of a run that was cancelled by someone else."""
+
+
+class RunSupersededError(RunCancelledError):
+    """Raised to the waiter of a run that a newer run of the task replaced."""
+
+
+class TaskSupervisor:
+    """Owns the asyncio tasks that run the agent for A2A tasks.
+
+    Each A2A task id has at most one run. A run can be cancelled explicitly,
+    or, once its last SSE subscriber has left, after grace_period seconds
+    unless a subscriber comes back in the meantime.
+
+    At most max_concurrent_runs runs execute at once; further runs wait in
+    FIFO order for a slot. Agent calls made outside a supervised run can
+    take a slot too, through slot().
+    """
+
+    def __init__(
+        self,
+        grace_period: Optional[float] = 30.0,
+        max_concurrent_runs: Optional[int] = None,
+    ):
+        if max_concurrent_runs is not None and max_concurrent_runs < 1:
+            raise ValueError("max_concurrent_runs must be at least 1")
+
+        self.grace_period = grace_period
+        self.max_concurrent_runs = max_concurrent_runs
+        self.runs: dict[str, asyncio.Task] = {}
+        self._orphan_timers: dict[str, asyncio.TimerHandle] = {}
+        self._background: set[asyncio.Task] = set()
+        self._slots = (
+            asyncio.Semaphore(max_concurrent_runs) if max_concurrent_runs else None
+        )
+        self.in_flight = 0
+        self.queued = 0
+        self.counters = {"completed": 0, "failed": 0, "cancelled": 0}
+        self.run_duration = Histogram("agent_run_duration_seconds")
+        self.queue_wait = Histogram("agent_run_queue_wait_seconds")
+
+    def start(self, task_id: str, coro: Coroutine) -> asyncio.Task:
+        """Runs coro as the agent run of the task once a slot is free.
+
+        A run still going for the same task, e.g. when a client re-sends a
+        request, is cancelled and the new run starts after it has stopped.
+        """
+        previous = self.runs.get(task_id)
+        if previous is not None:
+            logger.info(f"Replacing the running agent run of task {task_id}")
+            previous.cancel()
+        run = asyncio.create_task(self._supervise(coro, previous))
+        self.runs[task_id] = run
+        run.add_done_callback(lambda _: self._forget(task_id, run))
+        return run
+
+    async def run(self, task_id: str, coro: Coroutine) -> Any:
+        """Runs coro as the agent run of the task and returns its result.
+
+        Raises RunCancelledError if the run is cancelled by anything but the
+        caller, e.g. by tasks/cancel, or RunSupersededError if a newer run of
+        the task replaced it. Cancelling the caller cancels the run.
+        """
+        run = self.start(task_id, coro)
+        try:
+            await asyncio.wait([run])
+        except asyncio.CancelledError:
+            run.cancel()
+            raise
+        if run.cancelled():
+            replacement = self.runs.get(task_id)
+            if replacement is not None and replacement is not run:
+                raise RunSupersededError(task_id)
+            raise RunCancelledError(task_id)
+        return run.result()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a run slot, waiting for one if all are taken."""
+        queued_at = time.monotonic()
+        self.queued += 1
+        try:
+            if self._slots is not None:
+                await self._slots.acquire()
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            raise
+        finally:
+            self.queued -= 1
+
+        started_at = time.monotonic()
+        self.queue_wait.observe(started_at - queued_at)
+        self.in_flight += 1
+        outcome = "failed"
+        try:
+            yield
+            outcome = "completed"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+            self.counters[outcome] += 1
+            self.run_duration.observe(time.monotonic() - started_at)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            **self.counters,
+            "run_duration": self.run_duration.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+    def is_running(self, task_id: str) -> bool:
+        return task_id in self.runs
+
+    async def cancel(self, task_id: str) -> bool:
+        """Cancels the run of the task and waits until it has stopped.
+
+        Returns False if the task had no run.
+        """
+        self._clear_orphan_timer(task_id)
+        run = self.runs.get(task_id)
+        if run is None:
+            return False
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        return True
+
+    def orphaned(
+        self, task_id: str, on_expired: Callable[[str], Awaitable[None]]
+    ) -> None:
+        """Notes that the task's run lost its last subscriber.
+
+        on_expired is awaited after the grace period unless adopted() is
+        called first.
+        """
+        if self.grace_period is None or task_id not in self.runs:
+            return
+        self._clear_orphan_timer(task_id)
+        self._orphan_timers[task_id] = asyncio.get_running_loop().call_later(
+            self.grace_period, self._expire, task_id, on_expired
+        )
+
+    def adopted(self, task_id: str) -> None:
+        """Notes that the task has a subscriber again."""
+        self._clear_orphan_timer(task_id)
+
+    async def close(self) -> None:
+        for task_id in list(self._orphan_timers):
+            self._clear_orphan_timer(task_id)
+        runs = list(self.runs.values()) + list(self._background)
+        for run in runs:
+            run.cancel()
+        await asyncio.gather(*runs, return_exceptions=True)
+
+    async def _supervise(
+        self, coro: Coroutine, previous: Optional[asyncio.Task] = None
+    ):
+        try:
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            async with self.slot():
+                return await coro
+        finally:
+            # Closes coro if the run was cancelled before it got a slot.
+            coro.close()
+
+    def _expire(self, task_id: str, on_expired: Callable[[str], Awaitable[None]]):
+        self._orphan_timers.pop(task_id, None)
+        if task_id not in self.runs:
+            return
+        logger.info(f"No subscribers left for task {task_id}, cancelling its run")
+        expiry = asyncio.ensure_future(on_expired(task_id))
+        self._background.add(expiry)
+        expiry.add_done_callback(self._background.discard)
+
+    def _clear_orphan_timer(self, task_id: str):
+        timer = self._orphan_timers.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _forget(self, task_id: str, run: asyncio.Task):
+        if self.runs.get(task_id) is run:
+            del self.runs[task_id]
+            self._clear_orphan_timer(task_id)
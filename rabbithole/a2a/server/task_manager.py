@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Union, AsyncIterable, List, Any
+from typing import Any, Coroutine, Union, AsyncIterable, List, Optional
 from rabbithole.a2a.types import (
     Task,
     JSONRPCResponse,
@@ -25,14 +25,25 @@ from rabbithole.a2a.types import (
     SendTaskStreamingResponse,
     Artifact,
     PushNotificationConfig,
-    TaskStatusUpdateEvent,
-    JSONRPCError,
+    InvalidParamsError,
     TaskPushNotificationConfig,
     InternalError,
+    Message,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
+    TextPart,
 )
-from .utils import new_not_implemented_error
+from .delta_aggregator import DeltaAggregator
+from .retention import TERMINAL_TASK_STATES, RetentionPolicy, TaskRetention
+from .supervisor import RunCancelledError, RunSupersededError, TaskSupervisor
+from .task_store import TaskStore, InMemoryTaskStore
+from .event_buffer import StreamEvent, TaskEventBuffer
+from .sse_subscriber import OverflowPolicy, SSESubscriber
+from rabbithole.a2a.utils.metrics import Histogram
+from sse_starlette.sse import ServerSentEvent
 import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -74,27 +85,69 @@ class TaskManager(ABC):
     ) -> Union[AsyncIterable[SendTaskResponse], JSONRPCResponse]:
         pass
 
+    async def close(self) -> None:
+        """Releases resources held by the task manager on server shutdown."""
+        pass
+
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
-        self.tasks: dict[str, Task] = {}
+    def __init__(
+        self,
+        lock_shards: int = 64,
+        retention_policy: Optional[RetentionPolicy] = None,
+        task_store: Optional[TaskStore] = None,
+        event_buffer_size: int = 256,
+        event_buffer_ttl: Optional[float] = 300.0,
+        sse_queue_size: int = 1024,
+        sse_overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        orphan_grace_period: Optional[float] = 30.0,
+        max_concurrent_runs: Optional[int] = None,
+        artifact_chunk_chars: int = 256,
+        artifact_chunk_delay: float = 0.1,
+    ):
+        if lock_shards < 1:
+            raise ValueError("lock_shards must be at least 1")
+
+        self.task_store: TaskStore = task_store or InMemoryTaskStore()
         self.push_notification_infos: dict[str, PushNotificationConfig] = {}
-        self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, List[asyncio.Queue]] = {}
+        # Writers serialize per task through a hash-sharded lock table, so
+        # unrelated tasks never wait on each other. Reads take no lock: the
+        # event loop cannot interleave between a store lookup and the copy
+        # that follows it.
+        self.task_locks = [asyncio.Lock() for _ in range(lock_shards)]
+        self.task_sse_subscribers: dict[str, List[SSESubscriber]] = {}
         self.subscriber_lock = asyncio.Lock()
+        self.sse_queue_size = sse_queue_size
+        self.sse_overflow_policy = sse_overflow_policy
+        # Recent events per task, replayed to clients that resubscribe. A
+        # buffer is dropped event_buffer_ttl seconds after its final event,
+        # whatever the retention policy keeps of the task.
+        self.event_buffer_size = event_buffer_size
+        self.event_buffer_ttl = event_buffer_ttl
+        self.task_event_buffers: dict[str, TaskEventBuffer] = {}
+        self._event_buffer_timers: dict[str, asyncio.TimerHandle] = {}
+        self.retention = TaskRetention(retention_policy)
+        self._retention_sweeper: Optional[asyncio.Task] = None
+        # Agent runs, cancelled on tasks/cancel or when nobody is listening.
+        self.supervisor = TaskSupervisor(orphan_grace_period, max_concurrent_runs)
+        # Streamed token deltas are sent as chunks of this size or age.
+        self.artifact_chunk_chars = artifact_chunk_chars
+        self.artifact_chunk_delay = artifact_chunk_delay
+        self.time_to_first_token = Histogram("time_to_first_token_seconds")
+
+    def task_lock(self, task_id: str) -> asyncio.Lock:
+        """Returns the lock guarding mutations of the given task."""
+        return self.task_locks[hash(task_id) % len(self.task_locks)]
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f"Getting task {request.params.id}")
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_query_params.id)
-            if task is None:
-                return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        task = await self.task_store.get(task_query_params.id)
+        if task is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
-            task_result = self.append_task_history(
-                task, task_query_params.historyLength
-            )
+        task_result = self.append_task_history(task, task_query_params.historyLength)
 
         return GetTaskResponse(id=request.id, result=task_result)
 
@@ -102,12 +155,17 @@ class InMemoryTaskManager(TaskManager):
         logger.info(f"Cancelling task {request.params.id}")
         task_id_params: TaskIdParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_id_params.id)
-            if task is None:
-                return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+        task = await self.task_store.get(task_id_params.id)
+        if task is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+
+        task = await self.cancel_task_run(task_id_params.id)
+        if task is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
 
-        return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        return CancelTaskResponse(
+            id=request.id, result=self.append_task_history(task, 0)
+        )
 
     @abstractmethod
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
@@ -119,11 +177,219 @@ class InMemoryTaskManager(TaskManager):
     ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
         pass
 
+    async def cancel_task_run(self, task_id: str) -> Optional[Task]:
+        """Stops the task's agent run, if any, and moves it to CANCELED.
+
+        Returns None if the task is already in a terminal state.
+        """
+        stopped_run = await self.supervisor.cancel(task_id)
+        task = await self.task_store.get(task_id)
+        if task is None:
+            return None
+        if task.status.state in TERMINAL_TASK_STATES:
+            # The waiter of the stopped run may have recorded the cancel first.
+            if stopped_run and task.status.state == TaskState.CANCELED:
+                return task
+            return None
+
+        canceled_status = TaskStatus(state=TaskState.CANCELED)
+        task = await self.update_store(task_id, canceled_status, [])
+        await self.send_task_notification(task)
+        await self.enqueue_events_for_sse(
+            task_id,
+            TaskStatusUpdateEvent(id=task_id, status=canceled_status, final=True),
+        )
+        return task
+
+    async def run_agent(
+        self, request: SendTaskRequest, invocation: Coroutine
+    ) -> SendTaskResponse:
+        """Runs a tasks/send invocation under the supervisor and returns its response.
+
+        The invocation can then be cancelled through tasks/cancel like a
+        streaming run; the response is the canceled task. If the request is
+        re-sent while it runs, the response is the task as the newer run has
+        left it so far.
+        """
+        task_id = request.params.id
+        try:
+            return await self.supervisor.run(task_id, invocation)
+        except RunSupersededError:
+            # The newer run owns the task now and must keep going.
+            pass
+        except RunCancelledError:
+            await self.cancel_task_run(task_id)
+        task = await self.task_store.get(task_id)
+        return SendTaskResponse(
+            id=request.id,
+            result=self.append_task_history(task, request.params.historyLength),
+        )
+
+    async def run_streaming_agent(
+        self, task_id: str, stream: AsyncIterable[dict[str, Any]]
+    ) -> None:
+        """Publishes an agent's streamed answer as updates of the task.
+
+        stream yields dicts with "content", "is_task_complete" and
+        "require_user_input", as the agents' stream() does. Token deltas are
+        collected into chunks of one growing artifact instead of one history
+        message, webhook and SSE event per token; the first delta is sent
+        right away.
+        """
+        aggregator = DeltaAggregator(
+            max_chars=self.artifact_chunk_chars, max_delay=self.artifact_chunk_delay
+        )
+        started = time.monotonic()
+        first_token = True
+        reader: Optional[asyncio.Task] = None
+
+        try:
+            working_status = TaskStatus(state=TaskState.WORKING)
+            latest_task = await self.update_store(task_id, working_status, [])
+            await self.send_task_notification(latest_task)
+            await self.enqueue_events_for_sse(
+                task_id, TaskStatusUpdateEvent(id=task_id, status=working_status)
+            )
+
+            # The stream is read by a separate task, so buffered text is
+            # flushed on time even while the agent stalls.
+            items: asyncio.Queue = asyncio.Queue(maxsize=1)
+            reader = asyncio.create_task(self._read_stream(stream, items))
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        items.get(), aggregator.time_until_flush()
+                    )
+                except asyncio.TimeoutError:
+                    await self._publish_chunk(
+                        task_id, working_status, aggregator.flush()
+                    )
+                    continue
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                is_task_complete = item["is_task_complete"]
+                require_user_input = item["require_user_input"]
+                if first_token and item["content"]:
+                    first_token = False
+                    self.time_to_first_token.observe(time.monotonic() - started)
+
+                if not is_task_complete and not require_user_input:
+                    chunk = aggregator.add(item["content"])
+                    if chunk is None and not aggregator.chunks_emitted:
+                        chunk = aggregator.flush()
+                    await self._publish_chunk(task_id, working_status, chunk)
+                    continue
+
+                if require_user_input:
+                    await self._finish_streaming_run(
+                        task_id,
+                        TaskState.INPUT_REQUIRED,
+                        aggregator.flush(),
+                        aggregator.text or item["content"],
+                    )
+                else:
+                    # Without streamed deltas the completion carries the answer.
+                    last_chunk = aggregator.finish(
+                        "" if aggregator.text else item["content"]
+                    )
+                    await self._finish_streaming_run(
+                        task_id, TaskState.COMPLETED, last_chunk, aggregator.text
+                    )
+                return
+
+            # The stream ended without a final item. Whatever was streamed is
+            # the answer; without one the run failed.
+            if aggregator.text:
+                await self._finish_streaming_run(
+                    task_id, TaskState.COMPLETED, aggregator.finish(), aggregator.text
+                )
+            else:
+                await self._finish_streaming_run(
+                    task_id, TaskState.FAILED, None, "The agent returned no response"
+                )
+
+        except Exception as e:
+            logger.error(f"An error occurred while streaming the response: {e}")
+            await self.enqueue_events_for_sse(
+                task_id,
+                InternalError(
+                    message=f"An error occurred while streaming the response: {e}"
+                ),
+            )
+            try:
+                await self._finish_streaming_run(
+                    task_id, TaskState.FAILED, aggregator.flush(), aggregator.text
+                )
+            except Exception as e:
+                logger.error(f"Could not mark task {task_id} as failed: {e}")
+        finally:
+            if reader is not None:
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+
+    @staticmethod
+    async def _read_stream(
+        stream: AsyncIterable[dict[str, Any]], items: asyncio.Queue
+    ) -> None:
+        # Puts the stream's items, then an exception it raised or None.
+        try:
+            async for item in stream:
+                await items.put(item)
+        except Exception as e:
+            await items.put(e)
+        else:
+            await items.put(None)
+
+    async def _publish_chunk(
+        self, task_id: str, working_status: TaskStatus, chunk: Optional[Artifact]
+    ):
+        if chunk is None:
+            return
+        await self.update_store(task_id, working_status, [chunk])
+        await self.enqueue_events_for_sse(
+            task_id, TaskArtifactUpdateEvent(id=task_id, artifact=chunk)
+        )
+
+    async def _finish_streaming_run(
+        self,
+        task_id: str,
+        task_state: TaskState,
+        artifact: Optional[Artifact],
+        text: str,
+    ):
+        message = None
+        if text:
+            message = Message(role="agent", parts=[TextPart(type="text", text=text)])
+        task_status = TaskStatus(state=task_state, message=message)
+        latest_task = await self.update_store(
+            task_id, task_status, [artifact] if artifact else []
+        )
+        await self.send_task_notification(latest_task)
+
+        if artifact:
+            await self.enqueue_events_for_sse(
+                task_id, TaskArtifactUpdateEvent(id=task_id, artifact=artifact)
+            )
+        await self.enqueue_events_for_sse(
+            task_id, TaskStatusUpdateEvent(id=task_id, status=task_status, final=True)
+        )
+
+    async def send_task_notification(self, task: Task):
+        """Notifies the task's push-notification URL of its current state."""
+        pass
+
+    async def _cancel_orphaned_run(self, task_id: str):
+        if await self.cancel_task_run(task_id) is not None:
+            logger.info(f"Cancelled task {task_id} after its last subscriber left")
+
     async def set_push_notification_info(
         self, task_id: str, notification_config: PushNotificationConfig
     ):
-        async with self.lock:
-            task = self.tasks.get(task_id)
+        async with self.task_lock(task_id):
+            task = await self.task_store.get(task_id)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
 
@@ -132,18 +398,14 @@ class InMemoryTaskManager(TaskManager):
         return
 
     async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
-        async with self.lock:
-            task = self.tasks.get(task_id)
-            if task is None:
-                raise ValueError(f"Task not found for {task_id}")
-
-            return self.push_notification_infos[task_id]
+        task = await self.task_store.get(task_id)
+        if task is None:
+            raise ValueError(f"Task not found for {task_id}")
 
-        return
+        return self.push_notification_infos[task_id]
 
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
-            return task_id in self.push_notification_infos
+        return task_id in self.push_notification_infos
 
     async def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -195,8 +457,8 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f"Upserting task {task_send_params.id}")
-        async with self.lock:
-            task = self.tasks.get(task_send_params.id)
+        async with self.task_lock(task_send_params.id):
+            task = await self.task_store.get(task_send_params.id)
             if task is None:
                 task = Task(
                     id=task_send_params.id,
@@ -204,42 +466,97 @@ class InMemoryTaskManager(TaskManager):
                     status=TaskStatus(state=TaskState.SUBMITTED),
                     history=[task_send_params.message],
                 )
-                self.tasks[task_send_params.id] = task
+                await self.task_store.create(task)
             else:
-                if task.history is None:
-                    task.history = []
-                task.history.append(task_send_params.message)
+                task = await self.task_store.update(
+                    task.id, messages=[task_send_params.message]
+                )
 
-            return task
+            self.retention.track_history(task.id, [task_send_params.message])
+            # A new message re-opens the task, so it must not be evicted now.
+            self.retention.mark_active(task.id)
 
-    async def on_resubscribe_to_task(
-        self, request: TaskResubscriptionRequest
-    ) -> Union[AsyncIterable[SendTaskResponse], JSONRPCResponse]:
-        return new_not_implemented_error(request.id)
+        await self.evict_finished_tasks()
+        return task
 
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
+        async with self.task_lock(task_id):
+            messages = [status.message] if status.message is not None else []
             try:
-                task = self.tasks[task_id]
+                task = await self.task_store.update(
+                    task_id, status=status, messages=messages, artifacts=artifacts
+                )
             except KeyError:
                 logger.error(f"Task {task_id} not found for updating the task")
                 raise ValueError(f"Task {task_id} not found")
 
-            task.status = status
-
-            if status.message is not None:
-                if task.history is None:
-                    task.history = []
-                task.history.append(status.message)
-
-            if artifacts is not None:
-                if task.artifacts is None:
-                    task.artifacts = []
-                task.artifacts.extend(artifacts)
-
-            return task
+            if messages:
+                self.retention.track_history(task_id, messages)
+            if artifacts:
+                self.retention.track_artifacts(task_id, artifacts)
+            self.retention.track_state(task_id, status.state)
+
+        await self.evict_finished_tasks()
+        return task
+
+    async def evict_finished_tasks(self) -> list[str]:
+        """Drops finished tasks that fall outside the retention policy.
+
+        A persistent TaskStore keeps them on disk; only the memory held for
+        them is freed.
+        """
+        self._start_retention_sweeper()
+        evicted = self.retention.select_evictions()
+        for task_id in evicted:
+            await self.task_store.evict(task_id)
+            self.push_notification_infos.pop(task_id, None)
+            self.task_event_buffers.pop(task_id, None)
+            timer = self._event_buffer_timers.pop(task_id, None)
+            if timer is not None:
+                timer.cancel()
+
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} finished task(s) from the store")
+        return evicted
+
+    def _start_retention_sweeper(self):
+        if self._retention_sweeper is None and self.retention.policy.ttl_seconds:
+            self._retention_sweeper = asyncio.create_task(self._sweep_expired_tasks())
+
+    async def _sweep_expired_tasks(self):
+        policy = self.retention.policy
+        interval = min(policy.sweep_interval, policy.ttl_seconds)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_finished_tasks()
+            except Exception as e:
+                logger.error(f"Error while evicting expired tasks: {e}")
+
+    def get_retention_stats(self) -> dict[str, int]:
+        """Returns eviction counters and resident task memory estimates."""
+        return self.retention.stats()
+
+    def get_run_stats(self) -> dict:
+        """Returns agent run counts, run-duration and time-to-first-token
+        histograms."""
+        return {
+            **self.supervisor.stats(),
+            "time_to_first_token": self.time_to_first_token.snapshot(),
+        }
+
+    async def close(self) -> None:
+        if self._retention_sweeper is not None:
+            self._retention_sweeper.cancel()
+            await asyncio.gather(self._retention_sweeper, return_exceptions=True)
+            self._retention_sweeper = None
+        for timer in self._event_buffer_timers.values():
+            timer.cancel()
+        self._event_buffer_timers.clear()
+        await self.supervisor.close()
+        await self.task_store.close()
 
     def append_task_history(self, task: Task, historyLength: int | None):
         new_task = task.model_copy()
@@ -253,95 +570,173 @@ class InMemoryTaskManager(TaskManager):
 
         return new_task
 
-    async def setup_sse_consumer(self, task_id: str, is_resubscribe: bool = False):
+    async def setup_sse_consumer(
+        self,
+        task_id: str,
+        is_resubscribe: bool = False,
+        last_event_id: Optional[int] = None,
+    ):
         async with self.subscriber_lock:
+            event_buffer = self.task_event_buffers.get(task_id)
             if task_id not in self.task_sse_subscribers:
-                if is_resubscribe:
+                if is_resubscribe and event_buffer is None:
                     raise ValueError("Task not found for resubscription")
                 else:
                     self.task_sse_subscribers[task_id] = []
 
-            sse_event_queue: asyncio.Queue[Any] = asyncio.Queue(
-                maxsize=0
-            )  # <=0 is unlimited
+            sse_event_queue = SSESubscriber(
+                task_id, self.sse_queue_size, self.sse_overflow_policy
+            )
+            if is_resubscribe and event_buffer is not None:
+                # Replay and registration happen under the same lock, so the
+                # subscriber sees every event exactly once.
+                missed_events = event_buffer.since(last_event_id)
+                for stream_event in missed_events:
+                    sse_event_queue.put_nowait(stream_event)
+                if event_buffer.is_finished and not missed_events:
+                    sse_event_queue.put_nowait(None)  # Nothing more will arrive
             self.task_sse_subscribers[task_id].append(sse_event_queue)
+            self.supervisor.adopted(task_id)
             return sse_event_queue
 
-    async def enqueue_events_for_sse(self, task_id, task_update_event):
+    async def enqueue_events_for_sse(self, task_id, task_update_event) -> StreamEvent:
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+            event_buffer = self.task_event_buffers.get(task_id)
+            if event_buffer is None:
+                event_buffer = TaskEventBuffer(task_id, self.event_buffer_size)
+                self.task_event_buffers[task_id] = event_buffer
+            stream_event = event_buffer.append(task_update_event)
+            current_subscribers = list(self.task_sse_subscribers.get(task_id, []))
+            if stream_event.is_final:
+                self._expire_event_buffer_later(task_id)
+
+        # Delivery never blocks, so it runs outside the lock; a full queue is
+        # handled by the subscriber's overflow policy.
+        for subscriber in current_subscribers:
+            subscriber.put_nowait(stream_event)
+
+        return stream_event
+
+    def _expire_event_buffer_later(self, task_id: str):
+        if self.event_buffer_ttl is None:
+            return
+        timer = self._event_buffer_timers.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._event_buffer_timers[task_id] = asyncio.get_running_loop().call_later(
+            self.event_buffer_ttl, self._expire_event_buffer, task_id
+        )
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+    def _expire_event_buffer(self, task_id: str):
+        self._event_buffer_timers.pop(task_id, None)
+        event_buffer = self.task_event_buffers.get(task_id)
+        # A new message may have re-opened the task since its final event.
+        if event_buffer is not None and event_buffer.is_finished:
+            del self.task_event_buffers[task_id]
+
+    def get_subscriber_stats(self, task_id: Optional[str] = None) -> list[dict]:
+        """Returns lag and overflow counters for the current SSE subscribers."""
+        return [
+            subscriber.stats()
+            for subscribers_task_id, subscribers in self.task_sse_subscribers.items()
+            if task_id is None or subscribers_task_id == task_id
+            for subscriber in subscribers
+        ]
+
+    async def on_resubscribe_to_task(
+        self, request: TaskResubscriptionRequest
+    ) -> Union[AsyncIterable[bytes | ServerSentEvent], JSONRPCResponse]:
+        task_id_params: TaskIdParams = request.params
+        logger.info(f"Resubscribing to task {task_id_params.id}")
+
+        if await self.task_store.get(task_id_params.id) is None:
+            return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+
+        metadata = task_id_params.metadata or {}
+        last_event_id: Optional[int] = None
+        if metadata.get("lastEventId") is not None:
+            try:
+                last_event_id = int(metadata["lastEventId"])
+            except (TypeError, ValueError):
+                return JSONRPCResponse(
+                    id=request.id,
+                    error=InvalidParamsError(message="lastEventId must be an integer"),
+                )
+
+        try:
+            sse_event_queue = await self.setup_sse_consumer(
+                task_id_params.id, True, last_event_id
+            )
+        except ValueError:
+            return JSONRPCResponse(
+                id=request.id,
+                error=InvalidParamsError(
+                    message="Task has no event stream to resubscribe to"
+                ),
+            )
+
+        return self.dequeue_events_for_sse(
+            request.id, task_id_params.id, sse_event_queue
+        )
 
     async def dequeue_events_for_sse(
-        self, request_id, task_id, sse_event_queue: asyncio.Queue
-    ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
+        self, request_id, task_id, sse_event_queue: SSESubscriber
+    ) -> AsyncIterable[bytes | ServerSentEvent]:
         # TODO: Error handling, Task Not found etc
         # TODO: Ensure client has access to this task.
-        # TODO: Handle client disconnection (e.g., if queue.put blocks indefinitely).
         # TODO: Timeout configuration.
 
         # Validate if task_id exists
-        async with self.lock:
-            if task_id not in self.tasks:
-                logger.error(f"Task {task_id} not found for SSE streaming.")
-                # It's tricky to return a JSONRPCError here because the headers for SSE are already sent.
-                # The client will simply not receive any events and might time out.
-                # One option is to send a specific error event if the protocol supported it.
-                # For now, we log and the stream will simply end or not start producing.
-                # Consider raising an exception that the calling context (server.py) can catch *before* starting the SSE response.
-                # This depends on when setup_sse_consumer and dequeue_events_for_sse are called relative to HTTP response generation.
-                # For now, we'll assume the check for task existence happens before calling this, or handle it by closing the queue.
-                # This specific error scenario points to a need for robust error signaling within the SSE stream itself if possible.
-                sse_event_queue.put_nowait(None)  # Signal end of stream
-                # This yield is to make it an async generator, but it won't be reached if task_id not found.
-                # So the generator will be empty. Client will just disconnect.
-                if False:  # mypy trick
-                    yield
-                return  # Or raise an error that leads to a non-SSE error response if possible before headers are sent.
+        if await self.task_store.get(task_id) is None:
+            logger.error(f"Task {task_id} not found for SSE streaming.")
+            # It's tricky to return a JSONRPCError here because the headers for SSE are already sent.
+            # The client will simply not receive any events and might time out.
+            # One option is to send a specific error event if the protocol supported it.
+            # For now, we log and the stream will simply end or not start producing.
+            # Consider raising an exception that the calling context (server.py) can catch *before* starting the SSE response.
+            # This depends on when setup_sse_consumer and dequeue_events_for_sse are called relative to HTTP response generation.
+            # For now, we'll assume the check for task existence happens before calling this, or handle it by closing the queue.
+            # This specific error scenario points to a need for robust error signaling within the SSE stream itself if possible.
+            sse_event_queue.put_nowait(None)  # Signal end of stream
+            # This yield is to make it an async generator, but it won't be reached if task_id not found.
+            # So the generator will be empty. Client will just disconnect.
+            if False:  # mypy trick
+                yield
+            return  # Or raise an error that leads to a non-SSE error response if possible before headers are sent.
 
         try:
             while True:
-                event = await sse_event_queue.get()
-                if event is None:  # Sentinel value to signal end of stream
+                stream_event = await sse_event_queue.get()
+                if stream_event is None:  # Sentinel value to signal end of stream
+                    if sse_event_queue.disconnected:
+                        logger.warning(
+                            f"SSE subscriber for task {task_id} fell behind and was disconnected."
+                        )
                     logger.info(f"SSE stream for task {task_id} ended by sentinel.")
                     break
 
-                logger.debug(f"Sending event for task {task_id}: {event}")
-                # Based on the original SendTaskStreamingResponse, event should be TaskStatusUpdateEvent
-                # Ensure that whatever is put into the queue is serializable into SendTaskStreamingResponse
-                if isinstance(event, TaskStatusUpdateEvent):
-                    yield SendTaskStreamingResponse(result=event)
-                elif isinstance(event, JSONRPCError):
-                    # This path may not be robust for SSE, as errors are usually not sent this way mid-stream.
-                    # Client might not handle a JSONRPCError object sent as an SSE event correctly.
-                    # It's better to have a specific event type for errors if needed, e.g., TaskErrorEvent.
-                    yield SendTaskStreamingResponse(
-                        error=event
-                    )  # Or handle error differently
-                else:
-                    # Fallback or error for unexpected event types
-                    logger.error(
-                        f"Unknown event type in SSE queue for task {task_id}: {type(event)}"
-                    )
-                    # Potentially send a generic error event or close stream
-                    yield SendTaskStreamingResponse(
-                        error=InternalError(
-                            message=f"Unknown event type in SSE queue: {type(event)}"
-                        )
-                    )
+                logger.debug(
+                    f"Sending event {stream_event.event_id} for task {task_id}"
+                )
+                yield stream_event.encode(request_id)
 
-                sse_event_queue.task_done()
+                if stream_event.is_final:
+                    logger.info(f"SSE stream for task {task_id} reached final event.")
+                    break
         except asyncio.CancelledError:
             logger.info(f"SSE stream for task {task_id} was cancelled.")
         except Exception as e:
             logger.error(f"Error in SSE event loop for task {task_id}: {e}")
             # Again, sending a JSONRPCError mid-stream might not be ideal for SSE.
             # Consider how to signal this error to the client if necessary.
-            yield SendTaskStreamingResponse(error=InternalError(message=str(e)))
+            # Frames without an id inherit the previous one on the client, so
+            # the error gets the next id to not be taken for a replayed event.
+            yield ServerSentEvent(
+                id=sse_event_queue.last_sent_event_id + 1,
+                data=SendTaskStreamingResponse(
+                    id=request_id, error=InternalError(message=str(e))
+                ).model_dump_json(exclude_none=True),
+            )
         finally:
             logger.info(f"Cleaning up SSE stream for task {task_id}")
             # Attempt to remove the queue from subscribers list
@@ -353,3 +748,7 @@ class InMemoryTaskManager(TaskManager):
                     self.task_sse_subscribers[task_id].remove(sse_event_queue)
                     if not self.task_sse_subscribers[task_id]:  # if list is empty
                         del self.task_sse_subscribers[task_id]
+                        # Tasks with a push-notification URL are followed
+                        # through webhooks, so they keep running unobserved.
+                        if task_id not in self.push_notification_infos:
+                            self.supervisor.orphaned(task_id, self._cancel_orphaned_run)
@@ -0,0 +1,133 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+from rabbithole.a2a.types import Artifact, Message, Task, TaskStatus, TextPart
+
+
+class TaskStore(ABC):
+    """Persistence for Task objects used by InMemoryTaskManager.
+
+    Mutations are expressed as incremental operations (status change, history
+    and artifact appends) so that backends do not have to rewrite the whole
+    Task on every streamed update. Callers serialize writes per task.
+    """
+
+    @abstractmethod
+    async def get(self, task_id: str) -> Optional[Task]:
+        pass
+
+    @abstractmethod
+    async def create(self, task: Task) -> None:
+        pass
+
+    @abstractmethod
+    async def update(
+        self,
+        task_id: str,
+        status: Optional[TaskStatus] = None,
+        messages: Optional[list[Message]] = None,
+        artifacts: Optional[list[Artifact]] = None,
+    ) -> Task:
+        """Applies an update and returns the resulting task.
+
+        Raises KeyError if the task does not exist.
+        """
+        pass
+
+    @abstractmethod
+    async def delete(self, task_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get_by_session(self, session_id: str) -> list[Task]:
+        pass
+
+    async def evict(self, task_id: str) -> None:
+        """Frees the memory held for a task that retention let go of.
+
+        Stores that only keep tasks in memory delete them; persistent stores
+        keep them on disk, so they can still be read.
+        """
+        await self.delete(task_id)
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryTaskStore(TaskStore):
+    def __init__(self):
+        self.tasks: dict[str, Task] = {}
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        return self.tasks.get(task_id)
+
+    async def create(self, task: Task) -> None:
+        self.tasks[task.id] = task
+
+    async def update(
+        self,
+        task_id: str,
+        status: Optional[TaskStatus] = None,
+        messages: Optional[list[Message]] = None,
+        artifacts: Optional[list[Artifact]] = None,
+    ) -> Task:
+        task = self.tasks[task_id]
+        apply_task_update(task, status, messages, artifacts)
+        return task
+
+    async def delete(self, task_id: str) -> None:
+        self.tasks.pop(task_id, None)
+
+    async def get_by_session(self, session_id: str) -> list[Task]:
+        return [t for t in self.tasks.values() if t.sessionId == session_id]
+
+
+def apply_task_update(
+    task: Task,
+    status: Optional[TaskStatus],
+    messages: Optional[list[Message]],
+    artifacts: Optional[list[Artifact]],
+):
+    """Applies an incremental update to a Task object in place.
+
+    An artifact with append=True extends the stored artifact with the same
+    index, so a streamed answer is kept as one growing artifact.
+    """
+    if status is not None:
+        task.status = status
+
+    if messages:
+        if task.history is None:
+            task.history = []
+        task.history.extend(messages)
+
+    if artifacts is not None:
+        if task.artifacts is None:
+            task.artifacts = []
+        for artifact in artifacts:
+            existing = None
+            if artifact.append:
+                existing = next(
+                    (a for a in reversed(task.artifacts) if a.index == artifact.index),
+                    None,
+                )
+            if existing is None:
+                # Copy so that merging later chunks never mutates an artifact
+                # that was already handed out in an event.
+                task.artifacts.append(
+                    artifact.model_copy(update={"parts": list(artifact.parts)})
+                )
+            else:
+                merge_artifact_chunk(existing, artifact)
+
+
+def merge_artifact_chunk(artifact: Artifact, chunk: Artifact):
+    """Appends the parts of a streamed chunk to an artifact in place."""
+    for part in chunk.parts:
+        last_part = artifact.parts[-1] if artifact.parts else None
+        if isinstance(last_part, TextPart) and isinstance(part, TextPart):
+            artifact.parts[-1] = TextPart(
+                text=last_part.text + part.text, metadata=last_part.metadata
+            )
+        else:
+            artifact.parts.append(part)
+    artifact.lastChunk = chunk.lastChunk
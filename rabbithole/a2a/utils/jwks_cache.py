@@ -0,0 +1,112 @@
+from typing import Optional
+from jwt import PyJWK
+import asyncio
+import httpx
+import jwt
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    """Signing keys of a JWKS endpoint, cached by kid.
+
+    The keys are fetched with httpx.AsyncClient on first use and then
+    refreshed in the background every refresh_interval seconds, so looking up
+    a key does not wait on the network. A kid that is not in the cache
+    triggers an immediate refetch, since the sender may have rotated its
+    key, but at most once per min_refetch_interval so that tokens with made
+    up kids cannot flood the JWKS endpoint. If a refresh fails, the keys
+    fetched before stay in use until they are ttl seconds old.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        ttl: float = 3600,
+        refresh_interval: float = 300,
+        min_refetch_interval: float = 30,
+        timeout: float = 10,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.keys: dict[str, PyJWK] = {}
+        self.fetched_at: Optional[float] = None
+        self._last_fetch_attempt = float("-inf")
+        self._fetch: Optional[asyncio.Future] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self._client = client
+
+    async def get_signing_key_from_jwt(self, token: str) -> PyJWK:
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            raise ValueError("Token has no kid header")
+        return await self.get_signing_key(kid)
+
+    async def get_signing_key(self, kid: str) -> PyJWK:
+        """Returns the key with the given kid, fetching the JWKS if needed.
+
+        Raises ValueError if the JWKS has no such key.
+        """
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._run_refresher())
+
+        key = self.keys.get(kid)
+        if key is not None and not self._is_expired():
+            return key
+
+        since_last_fetch = time.monotonic() - self._last_fetch_attempt
+        if self._fetch is not None or since_last_fetch >= self.min_refetch_interval:
+            await self.refresh()
+            key = self.keys.get(kid)
+            if key is not None and not self._is_expired():
+                return key
+
+        raise ValueError(f"Unknown signing key {kid}")
+
+    async def refresh(self) -> None:
+        """Fetches the JWKS; concurrent callers share one request."""
+        if self._fetch is None:
+            self._fetch = asyncio.ensure_future(self._fetch_keys())
+            self._fetch.add_done_callback(self._clear_fetch)
+        await asyncio.shield(self._fetch)
+
+    async def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _is_expired(self) -> bool:
+        return self.fetched_at is None or time.monotonic() - self.fetched_at > self.ttl
+
+    def _clear_fetch(self, _fetch: asyncio.Future):
+        self._fetch = None
+
+    async def _fetch_keys(self) -> None:
+        self._last_fetch_attempt = time.monotonic()
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        try:
+            response = await self._client.get(self.jwks_url)
+            response.raise_for_status()
+            jwk_set = jwt.PyJWKSet.from_dict(response.json())
+        except Exception as e:
+            logger.warning(f"Error fetching JWKS from {self.jwks_url}: {e}")
+            return
+
+        self.keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+        self.fetched_at = time.monotonic()
+
+    async def _run_refresher(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
@@ -1,45 +1,209 @@
+from collections import OrderedDict
 from jwcrypto import jwk
 import uuid
 from starlette.responses import JSONResponse
 from starlette.requests import Request
-from typing import Any
+from typing import Any, Optional
 
+import asyncio
 import jwt
 import time
 import json
 import hashlib
 import httpx
 import logging
+import os
 
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK
+
+from rabbithole.a2a.utils.jwks_cache import JWKSCache
+from rabbithole.a2a.utils.replay_cache import ReplayCache
 
 logger = logging.getLogger(__name__)
 AUTH_HEADER_PREFIX = "Bearer "
 
+# Key parameters for each supported JWS algorithm. EdDSA (Ed25519) and
+# ES256 sign far faster than RS256 with much smaller keys.
+SIGNING_KEY_PARAMS = {
+    "RS256": {"kty": "RSA", "size": 2048},
+    "ES256": {"kty": "EC", "crv": "P-256"},
+    "EdDSA": {"kty": "OKP", "crv": "Ed25519"},
+}
+SIGNING_ALGORITHMS = tuple(SIGNING_KEY_PARAMS)
+
 
 class PushNotificationAuth:
-    def _calculate_request_body_sha256(self, data: dict[str, Any]):
-        """Calculates the SHA256 hash of a request body.
+    @staticmethod
+    def encode_request_body(data: dict[str, Any]) -> bytes:
+        """Serializes a notification the way it is hashed and sent.
 
         This logic needs to be same for both the agent who signs the payload and the client verifier.
         """
-        body_str = json.dumps(
+        return json.dumps(
             data,
             ensure_ascii=False,
             allow_nan=False,
             indent=None,
             separators=(",", ":"),
+        ).encode()
+
+    def _calculate_request_body_sha256(self, data: dict[str, Any] | bytes):
+        """Calculates the SHA256 hash of a request body.
+
+        Bytes are hashed as they are, so a body that is sent exactly as it was
+        signed needs no second serialization.
+        """
+        if not isinstance(data, bytes):
+            data = self.encode_request_body(data)
+        return hashlib.sha256(data).hexdigest()
+
+
+class SigningKey:
+    """A private signing key with the times it was created and retired."""
+
+    def __init__(
+        self,
+        key: jwk.JWK,
+        algorithm: str,
+        created_at: float,
+        retired_at: Optional[float] = None,
+    ):
+        self.key = key
+        self.algorithm = algorithm
+        self.created_at = created_at
+        self.retired_at = retired_at
+        self.private_key_jwk = PyJWK.from_json(key.export_private())
+        self.public_jwk = key.export_public(as_dict=True)
+        self.kid = self.public_jwk["kid"]
+
+    @classmethod
+    def generate(cls, algorithm: str) -> "SigningKey":
+        key = jwk.JWK.generate(
+            kid=str(uuid.uuid4()),
+            use="sig",
+            alg=algorithm,
+            **SIGNING_KEY_PARAMS[algorithm],
         )
-        return hashlib.sha256(body_str.encode()).hexdigest()
+        return cls(key, algorithm, created_at=time.time())
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SigningKey":
+        return cls(
+            jwk.JWK(**data["jwk"]),
+            data["algorithm"],
+            data["created_at"],
+            data.get("retired_at"),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "jwk": self.key.export_private(as_dict=True),
+            "algorithm": self.algorithm,
+            "created_at": self.created_at,
+            "retired_at": self.retired_at,
+        }
 
 
 class PushNotificationSenderAuth(PushNotificationAuth):
-    def __init__(self):
+    def __init__(
+        self,
+        verified_url_ttl: float = 3600,
+        failed_url_ttl: float = 60,
+        algorithm: str = "RS256",
+        key_path: Optional[str] = None,
+        key_rotation_interval: Optional[float] = None,
+        key_overlap: float = 24 * 3600,
+        max_verified_urls: int = 10_000,
+    ):
+        """Initialize the sender.
+
+        Args:
+            verified_url_ttl: Seconds a successfully verified URL is trusted
+                before it is challenged again.
+            failed_url_ttl: Seconds a failed verification is remembered, so a
+                broken receiver is not challenged on every request.
+            algorithm: JWS algorithm of new signing keys, one of
+                SIGNING_ALGORITHMS.
+            key_path: File to keep the signing keys in, so a restarted server
+                keeps signing with the key receivers already cached.
+            key_rotation_interval: Seconds after which the signing key is
+                replaced. None keeps the key forever.
+            key_overlap: Seconds a replaced key is still published in the
+                JWKS, so notifications signed with it can be verified.
+            max_verified_urls: Most verification results kept; the least
+                recently used ones are dropped first.
+        """
+        if algorithm not in SIGNING_KEY_PARAMS:
+            raise ValueError(
+                f"Unsupported signing algorithm {algorithm!r}, "
+                f"expected one of {', '.join(SIGNING_ALGORITHMS)}"
+            )
+
+        self.algorithm = algorithm
+        self.key_path = key_path
+        self.key_rotation_interval = key_rotation_interval
+        self.key_overlap = key_overlap
+        # The current signing key is the last one.
+        self.signing_keys: list[SigningKey] = []
         self.public_keys = []
         self.private_key_jwk: PyJWK = None
+        self._next_key_change = float("inf")
+        self._key_update: Optional[asyncio.Future] = None
+        self.verified_url_ttl = verified_url_ttl
+        self.failed_url_ttl = failed_url_ttl
+        self.max_verified_urls = max_verified_urls
+        # url -> (is_verified, expires_at), least recently used first.
+        self.verified_urls: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._next_verified_url_sweep = 0.0
+        self._verifications: dict[str, asyncio.Future] = {}
+
+    async def verify_push_notification_url(self, url: str) -> bool:
+        """Verifies a URL, challenging it only when its result is not cached.
+
+        Concurrent verifications of the same URL share one challenge request.
+        """
+        cached = self.verified_urls.get(url)
+        if cached is not None:
+            is_verified, expires_at = cached
+            if expires_at > time.monotonic():
+                self.verified_urls.move_to_end(url)
+                return is_verified
+            del self.verified_urls[url]
+
+        verification = self._verifications.get(url)
+        if verification is None:
+            verification = asyncio.ensure_future(self._verify_and_cache(url))
+            self._verifications[url] = verification
+            verification.add_done_callback(lambda _: self._verifications.pop(url, None))
+        # A cancelled caller must not cancel the challenge shared with others.
+        return await asyncio.shield(verification)
+
+    async def _verify_and_cache(self, url: str) -> bool:
+        is_verified = await self.challenge_push_notification_url(url)
+        ttl = self.verified_url_ttl if is_verified else self.failed_url_ttl
+        self._cache_verification(url, is_verified, time.monotonic() + ttl)
+        return is_verified
+
+    def _cache_verification(self, url: str, is_verified: bool, expires_at: float):
+        self.verified_urls.pop(url, None)
+        self.verified_urls[url] = (is_verified, expires_at)
+        if len(self.verified_urls) <= self.max_verified_urls:
+            return
+        # Expired results go first, then the least recently used ones. The
+        # scan runs at most once per the shorter TTL.
+        now = time.monotonic()
+        if now >= self._next_verified_url_sweep:
+            self._next_verified_url_sweep = now + min(
+                self.verified_url_ttl, self.failed_url_ttl
+            )
+            for expired in [u for u, (_, t) in self.verified_urls.items() if t <= now]:
+                del self.verified_urls[expired]
+        while len(self.verified_urls) > self.max_verified_urls:
+            self.verified_urls.popitem(last=False)
 
     @staticmethod
-    async def verify_push_notification_url(url: str) -> bool:
+    async def challenge_push_notification_url(url: str) -> bool:
+        """Issues a validation challenge to the URL, bypassing the cache."""
         async with httpx.AsyncClient(timeout=10) as client:
             try:
                 validation_token = str(uuid.uuid4())
@@ -59,54 +223,179 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         return False
 
     def generate_jwk(self):
-        key = jwk.JWK.generate(kty="RSA", size=2048, kid=str(uuid.uuid4()), use="sig")
-        self.public_keys.append(key.export_public(as_dict=True))
-        self.private_key_jwk = PyJWK.from_json(key.export_private())
+        """Sets up the signing key.
+
+        Keys persisted at key_path are reused unless they use another
+        algorithm or are due for rotation; otherwise a new key is generated.
+        """
+        if self.key_path and os.path.exists(self.key_path):
+            with open(self.key_path) as f:
+                self.signing_keys = [
+                    SigningKey.from_dict(data) for data in json.load(f)["keys"]
+                ]
+
+        current = self.signing_keys[-1] if self.signing_keys else None
+        if (
+            current is None
+            or current.retired_at is not None
+            or current.algorithm != self.algorithm
+            or self._rotation_due(current, time.time())
+        ):
+            self.rotate_jwk()
+        else:
+            self._activate_keys(time.time())
+
+    def rotate_jwk(self):
+        """Starts signing with a new key.
+
+        The previous key stays in the JWKS for key_overlap seconds.
+        """
+        now = time.time()
+        if self.signing_keys and self.signing_keys[-1].retired_at is None:
+            self.signing_keys[-1].retired_at = now
+        self.signing_keys.append(SigningKey.generate(self.algorithm))
+        self._activate_keys(now)
+        logger.info(
+            f"Signing push-notifications with {self.algorithm} key "
+            f"{self.signing_keys[-1].kid}"
+        )
+
+    def _rotation_due(self, key: SigningKey, now: float) -> bool:
+        return (
+            self.key_rotation_interval is not None
+            and now - key.created_at >= self.key_rotation_interval
+        )
+
+    def _activate_keys(self, now: float):
+        """Drops expired keys, publishes the rest and persists them."""
+        self.signing_keys = [
+            key
+            for key in self.signing_keys
+            if key.retired_at is None or now - key.retired_at < self.key_overlap
+        ]
+        current = self.signing_keys[-1]
+        self.private_key_jwk = current.private_key_jwk
+        self.public_keys = [key.public_jwk for key in self.signing_keys]
+
+        key_changes = [
+            key.retired_at + self.key_overlap
+            for key in self.signing_keys
+            if key.retired_at is not None
+        ]
+        if self.key_rotation_interval is not None:
+            key_changes.append(current.created_at + self.key_rotation_interval)
+        self._next_key_change = min(key_changes, default=float("inf"))
+
+        if self.key_path:
+            self._save_keys()
+
+    def _save_keys(self):
+        tmp_path = f"{self.key_path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"keys": [key.to_dict() for key in self.signing_keys]}, f)
+        os.replace(tmp_path, self.key_path)
+
+    def _schedule_key_update(self):
+        """Starts rotating or expiring keys in a worker thread when one is due.
+
+        Generating and saving a key is too slow for the event loop; meanwhile
+        notifications are still signed with the current key.
+        """
+        if self._key_update is not None or time.time() < self._next_key_change:
+            return
+        self._key_update = asyncio.ensure_future(asyncio.to_thread(self._update_keys))
+        self._key_update.add_done_callback(self._key_update_done)
+
+    def _key_update_done(self, key_update: asyncio.Future):
+        self._key_update = None
+        if not key_update.cancelled() and key_update.exception() is not None:
+            logger.error(f"Updating the signing keys failed: {key_update.exception()}")
+
+    def _update_keys(self):
+        """Rotates or expires keys when one of them is due."""
+        now = time.time()
+        if now < self._next_key_change:
+            return
+        if self._rotation_due(self.signing_keys[-1], now):
+            self.rotate_jwk()
+        else:
+            self._activate_keys(now)
 
     def handle_jwks_endpoint(self, _request: Request):
         """Allow clients to fetch public keys."""
         return JSONResponse({"keys": self.public_keys})
 
-    def _generate_jwt(self, data: dict[str, Any]):
+    def _generate_jwt(self, data: dict[str, Any] | bytes):
         """JWT is generated by signing both the request payload SHA digest and time of token generation.
 
         Payload is signed with private key and it ensures the integrity of payload for client.
         Including iat prevents from replay attack.
         """
-
         iat = int(time.time())
 
         return jwt.encode(
             {
                 "iat": iat,
+                "jti": uuid.uuid4().hex,
                 "request_body_sha256": self._calculate_request_body_sha256(data),
             },
             key=self.private_key_jwk,
             headers={"kid": self.private_key_jwk.key_id},
-            algorithm="RS256",
+            algorithm=self.private_key_jwk.algorithm_name,
         )
 
-    async def send_push_notification(self, url: str, data: dict[str, Any]):
-        jwt_token = self._generate_jwt(data)
-        headers = {"Authorization": f"Bearer {jwt_token}"}
+    async def send_push_notification(self, url: str, data: dict[str, Any] | bytes):
         async with httpx.AsyncClient(timeout=10) as client:
             try:
-                response = await client.post(url, json=data, headers=headers)
-                response.raise_for_status()
+                await self.post_push_notification(client, url, data)
                 logger.info(f"Push-notification sent for URL: {url}")
             except Exception as e:
                 logger.warning(
                     f"Error during sending push-notification for URL {url}: {e}"
                 )
 
+    async def post_push_notification(
+        self, client: httpx.AsyncClient, url: str, data: dict[str, Any] | bytes
+    ) -> httpx.Response:
+        """Signs and posts a notification with the given client.
+
+        The body is serialized once and the signed bytes are posted as they
+        are; data may also be an already serialized JSON body. Unlike
+        send_push_notification, errors are raised to the caller.
+        """
+        body = data if isinstance(data, bytes) else self.encode_request_body(data)
+        self._schedule_key_update()
+        jwt_token = self._generate_jwt(body)
+        headers = {
+            "Authorization": f"Bearer {jwt_token}",
+            "Content-Type": "application/json",
+        }
+        response = await client.post(url, content=body, headers=headers)
+        response.raise_for_status()
+        return response
+
 
 class PushNotificationReceiverAuth(PushNotificationAuth):
-    def __init__(self):
+    def __init__(
+        self,
+        algorithms: tuple[str, ...] = SIGNING_ALGORITHMS,
+        max_token_age: float = 60 * 5,
+        replay_cache: Optional[ReplayCache] = None,
+    ):
         self.public_keys_jwks = []
         self.jwks_client = None
+        self.algorithms = list(algorithms)
+        self.max_token_age = max_token_age
+        self.replay_cache = replay_cache or ReplayCache(window=max_token_age)
 
     async def load_jwks(self, jwks_url: str):
-        self.jwks_client = PyJWKClient(jwks_url)
+        # Keys are fetched on first use, on the loop that verifies requests.
+        self.jwks_client = JWKSCache(jwks_url)
+
+    async def close(self):
+        if self.jwks_client is not None:
+            await self.jwks_client.close()
 
     async def verify_push_notification(self, request: Request) -> bool:
         auth_header = request.headers.get("Authorization")
@@ -115,23 +404,38 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             return False
 
         token = auth_header[len(AUTH_HEADER_PREFIX) :]
-        signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+        signing_key = await self.jwks_client.get_signing_key_from_jwt(token)
 
         decode_token = jwt.decode(
             token,
             signing_key,
             options={"require": ["iat", "request_body_sha256"]},
-            algorithms=["RS256"],
+            algorithms=self.algorithms,
         )
 
-        actual_body_sha256 = self._calculate_request_body_sha256(await request.json())
-        if actual_body_sha256 != decode_token["request_body_sha256"]:
-            # Payload signature does not match the digest in signed token.
-            raise ValueError("Invalid request body")
+        body = await request.body()
+        expected_body_sha256 = decode_token["request_body_sha256"]
+        if self._calculate_request_body_sha256(body) != expected_body_sha256:
+            # Senders that let their HTTP client serialize the payload signed
+            # a canonical dump of it rather than the bytes on the wire.
+            canonical_body_sha256 = self._calculate_request_body_sha256(
+                json.loads(body)
+            )
+            if canonical_body_sha256 != expected_body_sha256:
+                # Payload signature does not match the digest in signed token.
+                raise ValueError("Invalid request body")
 
-        if time.time() - decode_token["iat"] > 60 * 5:
+        now = time.time()
+        if now - decode_token["iat"] > self.max_token_age:
             # Do not allow push-notifications older than 5 minutes.
             # This is to prevent replay attack.
             raise ValueError("Token is expired")
 
+        # Tokens from senders without jti are told apart by iat and body.
+        token_id = decode_token.get("jti") or (
+            f"{decode_token['iat']}:{expected_body_sha256}"
+        )
+        if not self.replay_cache.check_and_add(token_id, decode_token["iat"], now):
+            raise ValueError("Token was already used or is too old to check")
+
         return True
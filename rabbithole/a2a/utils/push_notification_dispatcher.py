@@ -0,0 +1,534 @@
+"""Background delivery of push notifications."""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Set, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from rabbithole.a2a.types import Task, TaskState
+from rabbithole.a2a.utils.push_notification_auth import PushNotificationSenderAuth
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# States whose notification is never coalesced away.
+ALWAYS_DELIVERED_STATES = frozenset(
+    {
+        TaskState.INPUT_REQUIRED,
+        TaskState.COMPLETED,
+        TaskState.CANCELED,
+        TaskState.FAILED,
+    }
+)
+FINISHED_STATES = frozenset({TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED})
+
+
+class CircuitBreaker:
+    """Tracks failures of one notification URL.
+
+    The breaker opens after failure_threshold consecutive failures and rejects
+    deliveries for reset_timeout seconds. It then lets a single trial through
+    (half-open); success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.updated_at = time.monotonic()
+        self._trial_in_flight = False
+        self._trial_owner: Any = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    @property
+    def trial_in_flight(self) -> bool:
+        return self._trial_in_flight
+
+    def ready(self) -> bool:
+        """Returns whether allow() would let a delivery through, without
+        claiming the trial of a half-open circuit."""
+        if self.opened_at is None:
+            return True
+        if self._trial_in_flight:
+            return False
+        return time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def allow(self, owner: Any = None) -> bool:
+        """Returns whether a delivery may be attempted now.
+
+        On a half-open circuit this claims the trial for owner, which must
+        end it with record_success(), record_failure() or release().
+        """
+        if not self.ready():
+            return False
+        if self.opened_at is not None:
+            self._trial_in_flight = True
+            self._trial_owner = owner
+        return True
+
+    def release(self, owner: Any = None) -> None:
+        """Gives up a trial that owner claimed but never recorded, e.g.
+        because its delivery was cancelled."""
+        if self._trial_in_flight and self._trial_owner is owner:
+            self._end_trial()
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._end_trial()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._end_trial()
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def _end_trial(self) -> None:
+        self._trial_in_flight = False
+        self._trial_owner = None
+        self.updated_at = time.monotonic()
+
+
+class _PendingNotification:
+    __slots__ = ("url", "data", "version", "previous")
+
+    def __init__(
+        self,
+        url: str,
+        data: Union[Dict[str, Any], bytes],
+        version: int,
+        previous: Optional[asyncio.Task],
+    ):
+        self.url = url
+        self.data = data
+        self.version = version
+        # The delivery of the task that this one has to wait for.
+        self.previous = previous
+
+
+class _DeliveredVersion:
+    """What a receiver already has of a task, used as base for deltas."""
+
+    __slots__ = ("url", "history_len", "artifacts_len", "last_artifact", "at")
+
+    def __init__(self, url: str, data: Dict[str, Any]):
+        artifacts = data.get("artifacts") or []
+        self.at = time.monotonic()
+        self.url = url
+        self.history_len = len(data.get("history") or [])
+        self.artifacts_len = len(artifacts)
+        self.last_artifact = artifacts[-1] if artifacts else None
+
+
+def task_delta(data: Dict[str, Any], base: _DeliveredVersion) -> Dict[str, Any]:
+    """Reduces a dumped Task to what changed since the delivered version.
+
+    Only new history messages and new or grown artifacts are kept. The
+    offsets at which they continue are sent as metadata["delta"], so a
+    receiver can apply them to its copy of the task.
+    """
+    history = data.get("history") or []
+    artifacts = data.get("artifacts") or []
+    artifact_offset = min(base.artifacts_len, len(artifacts))
+    # Streamed chunks grow the last artifact in place, so resend it if it
+    # changed since it was delivered.
+    if artifact_offset and artifacts[artifact_offset - 1] != base.last_artifact:
+        artifact_offset -= 1
+
+    delta = {k: v for k, v in data.items() if k not in ("history", "artifacts")}
+    delta["history"] = history[base.history_len :]
+    delta["artifacts"] = artifacts[artifact_offset:]
+    delta["metadata"] = {
+        **(data.get("metadata") or {}),
+        "delta": {
+            "historyOffset": base.history_len,
+            "artifactOffset": artifact_offset,
+        },
+    }
+    return delta
+
+
+class PushNotificationDispatcher:
+    """Delivers push notifications off the task execution path.
+
+    submit() only queues a notification and returns immediately. Deliveries
+    share one keep-alive connection pool, are limited per destination host,
+    and are retried with exponential backoff and jitter on transport errors
+    and retryable status codes. A circuit breaker per URL sheds notifications
+    for receivers that keep failing.
+
+    Notifications with the same key (task) are delivered one after another
+    in submission order, so a retried older state never lands after a newer
+    one. A non-final notification that was superseded by a newer one of its
+    task while waiting or between retries is dropped.
+
+    With a coalesce_window, intermediate task updates are held back for that
+    long and collapse into the latest one, while updates in
+    ALWAYS_DELIVERED_STATES are sent right away. With delta_payloads, a task
+    that was already delivered to a URL is sent as a task_delta.
+    """
+
+    def __init__(
+        self,
+        sender_auth: PushNotificationSenderAuth,
+        max_pending: int = 1000,
+        max_concurrency: int = 64,
+        per_host_concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        timeout: float = 10.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        coalesce_window: float = 0.0,
+        delta_payloads: bool = False,
+        idle_timeout: float = 600.0,
+    ):
+        """Initialize the dispatcher.
+
+        Args:
+            sender_auth: Signs the notifications.
+            max_pending: Notifications queued or in flight before new ones are
+                dropped.
+            max_concurrency: Deliveries in flight across all destinations.
+            per_host_concurrency: Deliveries in flight per destination host.
+            max_retries: Retries after the first failed attempt.
+            backoff_base: Delay before the first retry, doubled on each retry.
+            backoff_max: Upper bound of the retry delay.
+            timeout: Timeout of a single HTTP request in seconds.
+            failure_threshold: Consecutive failures that open a URL's circuit.
+            reset_timeout: Seconds an open circuit waits before a trial.
+            coalesce_window: Seconds to collect intermediate updates of a task
+                into one notification; 0 sends every update.
+            delta_payloads: Send only what changed since the last delivered
+                version of a task.
+            idle_timeout: Seconds after which the circuit breaker of an idle
+                URL and the delivered version of an idle task are dropped.
+        """
+        self.sender_auth = sender_auth
+        self.max_pending = max_pending
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.coalesce_window = coalesce_window
+        self.delta_payloads = delta_payloads
+        self.idle_timeout = idle_timeout
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._concurrency: Optional[asyncio.Semaphore] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        # Deliveries holding or waiting for each host slot.
+        self._host_users: Dict[str, int] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+        self._coalescing: Dict[str, _PendingNotification] = {}
+        # Per key, the number of the latest submission and its delivery.
+        self._versions: Dict[str, int] = {}
+        self._tails: Dict[str, asyncio.Task] = {}
+        self._delivered: Dict[str, _DeliveredVersion] = {}
+        self._pruned_at = time.monotonic()
+        self.counters: Dict[str, int] = {
+            "submitted": 0,
+            "coalesced": 0,
+            "superseded": 0,
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "dropped": 0,
+            "rejected": 0,
+        }
+
+    def submit_task(self, url: str, task: Task) -> bool:
+        """Queues a notification carrying the current state of a task."""
+        if self.delta_payloads:
+            data = task.model_dump(mode="json", exclude_none=True)
+        else:
+            # Serialized once here; the bytes are hashed and posted as they are.
+            data = task.model_dump_json(exclude_none=True).encode()
+        return self.submit(
+            url,
+            data,
+            key=task.id,
+            final=task.status.state in ALWAYS_DELIVERED_STATES,
+        )
+
+    def submit(
+        self,
+        url: str,
+        data: Union[Dict[str, Any], bytes],
+        key: Optional[str] = None,
+        final: bool = True,
+    ) -> bool:
+        """Queues a notification for delivery.
+
+        data is the notification body, either as a dict or as serialized
+        JSON. Notifications with the same key describe versions of one task; a
+        non-final one may be superseded by a later one within the coalesce
+        window. Must be called from the event loop. Returns False if the
+        notification was dropped because too many are pending or the URL's
+        circuit is open.
+        """
+        version = 0
+        if key is not None:
+            version = self._versions.get(key, 0) + 1
+
+        if key is not None and not final and self.coalesce_window > 0:
+            pending = self._coalescing.get(key)
+            if pending is not None:
+                pending.url = url
+                pending.data = data
+                pending.version = self._versions[key] = version
+                self.counters["submitted"] += 1
+                self.counters["coalesced"] += 1
+                return True
+            if not self._admit(url):
+                return False
+            self._versions[key] = version
+            pending = _PendingNotification(url, data, version, self._tails.get(key))
+            self._coalescing[key] = pending
+            self._spawn(self._deliver_coalesced(key, pending), key, pending.previous)
+            return True
+
+        previous = self._tails.get(key) if key is not None else None
+        pending = self._coalescing.pop(key, None) if key is not None else None
+        if pending is not None:
+            # The final update supersedes the held back intermediate one, and
+            # need not wait for its window.
+            self.counters["coalesced"] += 1
+            previous = pending.previous
+        if not self._admit(url):
+            return False
+        if key is not None:
+            self._versions[key] = version
+        self._spawn(self._deliver(url, data, key, version, final), key, previous)
+        return True
+
+    async def drain(self) -> None:
+        """Waits until every queued notification was delivered or given up."""
+        while self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.drain()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.counters,
+            "pending": len(self._deliveries),
+            "open_circuits": sum(1 for b in self._breakers.values() if b.is_open),
+        }
+
+    def _admit(self, url: str) -> bool:
+        self._prune()
+        if len(self._deliveries) >= self.max_pending:
+            self.counters["dropped"] += 1
+            logger.warning(f"Push-notification queue full, dropping one for {url}")
+            return False
+
+        # Only checked here; the delivery itself claims a half-open trial.
+        if not self._breaker(url).ready():
+            self.counters["rejected"] += 1
+            logger.info(f"Circuit open for {url}, skipping push-notification")
+            return False
+
+        self.counters["submitted"] += 1
+        return True
+
+    def _spawn(
+        self,
+        coro,
+        key: Optional[str] = None,
+        previous: Optional[asyncio.Task] = None,
+    ) -> None:
+        delivery = asyncio.create_task(self._after(previous, coro))
+        self._deliveries.add(delivery)
+        delivery.add_done_callback(self._deliveries.discard)
+        if key is not None:
+            self._tails[key] = delivery
+            delivery.add_done_callback(lambda _: self._release_key(key, delivery))
+
+    async def _after(self, previous: Optional[asyncio.Task], coro) -> None:
+        try:
+            if previous is not None:
+                # wait() rather than gather(), so that cancelling this delivery
+                # does not cancel the one before it.
+                await asyncio.wait([previous])
+            await coro
+        finally:
+            # Closes coro if the delivery was cancelled while waiting.
+            coro.close()
+
+    def _release_key(self, key: str, delivery: asyncio.Task):
+        if self._tails.get(key) is delivery:
+            del self._tails[key]
+            self._versions.pop(key, None)
+
+    def _superseded(self, key: Optional[str], version: int, final: bool) -> bool:
+        if final or key is None or self._versions.get(key, version) <= version:
+            return False
+        self.counters["superseded"] += 1
+        return True
+
+    async def _deliver_coalesced(self, key: str, pending: _PendingNotification):
+        await asyncio.sleep(self.coalesce_window)
+        if self._coalescing.get(key) is not pending:
+            # Superseded by a final update in the meantime.
+            return
+        del self._coalescing[key]
+        await self._deliver(pending.url, pending.data, key, pending.version, False)
+
+    async def _deliver(
+        self,
+        url: str,
+        data: Union[Dict[str, Any], bytes],
+        key: Optional[str] = None,
+        version: int = 0,
+        final: bool = True,
+    ) -> None:
+        if self._superseded(key, version, final):
+            return
+        payload = data
+        if self.delta_payloads and key is not None and isinstance(data, dict):
+            base = self._delivered.get(key)
+            if base is not None and base.url == url:
+                payload = task_delta(data, base)
+        if not isinstance(payload, bytes):
+            # Encode once so that retries post the same bytes.
+            payload = self.sender_auth.encode_request_body(payload)
+
+        owner = object()
+        breaker = self._breaker(url)
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt > 0:
+                    if not breaker.ready():
+                        break
+                    self.counters["retried"] += 1
+                    delay = min(
+                        self.backoff_max, self.backoff_base * 2 ** (attempt - 1)
+                    )
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                    if self._superseded(key, version, final):
+                        return
+
+                # Looked up again, as an idle breaker may have been pruned.
+                breaker = self._breaker(url)
+                if not breaker.allow(owner):
+                    break
+                try:
+                    async with self._get_concurrency(), self._host_slot(url):
+                        await self.sender_auth.post_push_notification(
+                            self._get_client(), url, payload
+                        )
+                except httpx.HTTPStatusError as e:
+                    breaker.record_failure()
+                    logger.warning(f"Push-notification to {url} failed: {e}")
+                    if e.response.status_code not in RETRYABLE_STATUS_CODES:
+                        break
+                except httpx.TransportError as e:
+                    breaker.record_failure()
+                    logger.warning(f"Push-notification to {url} failed: {e}")
+                except Exception as e:
+                    breaker.record_failure()
+                    logger.error(
+                        f"Unexpected error sending push-notification to {url}: {e}"
+                    )
+                    break
+                else:
+                    breaker.record_success()
+                    self.counters["sent"] += 1
+                    if (
+                        self.delta_payloads
+                        and key is not None
+                        and isinstance(data, dict)
+                    ):
+                        self._record_delivered(url, data, key)
+                    logger.info(f"Push-notification sent for URL: {url}")
+                    return
+        finally:
+            # A cancelled delivery must not keep a half-open circuit's trial.
+            breaker.release(owner)
+
+        self.counters["failed"] += 1
+
+    def _record_delivered(self, url: str, data: Dict[str, Any], key: str):
+        state = (data.get("status") or {}).get("state")
+        if state is not None and TaskState(state) in FINISHED_STATES:
+            self._delivered.pop(key, None)
+        else:
+            self._delivered[key] = _DeliveredVersion(url, data)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    def _get_concurrency(self) -> asyncio.Semaphore:
+        if self._concurrency is None:
+            self._concurrency = asyncio.Semaphore(self.max_concurrency)
+        return self._concurrency
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str):
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_slots[host] = slot
+        self._host_users[host] = self._host_users.get(host, 0) + 1
+        try:
+            async with slot:
+                yield
+        finally:
+            self._host_users[host] -= 1
+            if not self._host_users[host]:
+                del self._host_users[host]
+                del self._host_slots[host]
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        breaker = self._breakers.get(url)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self._breakers[url] = breaker
+        return breaker
+
+    def _prune(self) -> None:
+        """Drops breakers of idle URLs and delivered versions of idle tasks."""
+        now = time.monotonic()
+        if now - self._pruned_at < self.idle_timeout / 2:
+            return
+        self._pruned_at = now
+        for url, breaker in list(self._breakers.items()):
+            if breaker.trial_in_flight:
+                continue
+            # A closed breaker without failures is the same as a new one.
+            unused = not breaker.is_open and not breaker.failures
+            if unused or now - breaker.updated_at >= self.idle_timeout:
+                del self._breakers[url]
+        for key, delivered in list(self._delivered.items()):
+            if now - delivered.at >= self.idle_timeout:
+                del self._delivered[key]
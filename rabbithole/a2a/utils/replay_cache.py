@@ -0,0 +1,114 @@
+from typing import Optional
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayCache:
+    """Bounded set of recently seen token ids, bucketed by issue time.
+
+    A token only has to be remembered while its iat is inside the accepted
+    window; older tokens are rejected by age anyway. Entries are grouped in
+    buckets of bucket_seconds by iat, and whole buckets are dropped once they
+    age out of the window, so expiry is amortized O(1) per entry.
+
+    max_entries defaults to what expected_rate tokens per second fill over
+    the window. When more are held, the oldest bucket is evicted early and
+    min_iat is raised past it: tokens issued before min_iat are rejected,
+    because a replay of them could no longer be detected, and a warning is
+    logged. Only hashes of the ids are kept, to bound the memory per entry.
+    """
+
+    def __init__(
+        self,
+        window: float = 300,
+        bucket_seconds: float = 5,
+        max_entries: Optional[int] = None,
+        max_clock_skew: float = 60,
+        expected_rate: float = 10_000,
+    ):
+        if max_entries is None:
+            # The oldest bucket outlives the window by up to bucket_seconds.
+            max_entries = math.ceil(expected_rate * (window + bucket_seconds))
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self.max_clock_skew = max_clock_skew
+        self.min_iat = float("-inf")
+        self.size = 0
+        self.rejected_replays = 0
+        self.rejected_stale = 0
+        self._buckets: dict[int, set[int]] = {}
+        self._oldest_bucket: Optional[int] = None
+
+    def check_and_add(self, token_id: str, iat: float, now: Optional[float] = None):
+        """Records a token and returns whether it was seen for the first time.
+
+        Returns False for replays and for tokens whose iat is outside the
+        window or below min_iat.
+        """
+        if now is None:
+            now = time.time()
+        self._expire(now)
+
+        if iat < max(self.min_iat, now - self.window) or (
+            iat > now + self.max_clock_skew
+        ):
+            self.rejected_stale += 1
+            return False
+
+        bucket_index = int(iat // self.bucket_seconds)
+        bucket = self._buckets.get(bucket_index)
+        if bucket is None:
+            bucket = self._buckets[bucket_index] = set()
+            if self._oldest_bucket is None or bucket_index < self._oldest_bucket:
+                self._oldest_bucket = bucket_index
+
+        key = hash(token_id)
+        if key in bucket:
+            self.rejected_replays += 1
+            return False
+
+        bucket.add(key)
+        self.size += 1
+        while self.size > self.max_entries:
+            self._evict_oldest()
+        return True
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "size": self.size,
+            "buckets": len(self._buckets),
+            "min_iat": self.min_iat,
+            "rejected_replays": self.rejected_replays,
+            "rejected_stale": self.rejected_stale,
+        }
+
+    def _expire(self, now: float):
+        # Buckets that end before the window starts can only hold stale iats.
+        cutoff = int((now - self.window) // self.bucket_seconds)
+        while self._oldest_bucket is not None and self._oldest_bucket < cutoff:
+            self._drop_oldest()
+
+    def _evict_oldest(self):
+        self.min_iat = (self._oldest_bucket + 1) * self.bucket_seconds
+        logger.warning(
+            f"Replay cache is full ({self.max_entries} entries), rejecting "
+            f"tokens issued before {self.min_iat}"
+        )
+        self._drop_oldest()
+
+    def _drop_oldest(self):
+        bucket = self._buckets.pop(self._oldest_bucket, None)
+        if bucket is not None:
+            self.size -= len(bucket)
+        if not self._buckets:
+            self._oldest_bucket = None
+            return
+        # Bucket indices are consecutive ints, so the next one is found by
+        # stepping forward rather than searching.
+        self._oldest_bucket += 1
+        while self._oldest_bucket not in self._buckets:
+            self._oldest_bucket += 1
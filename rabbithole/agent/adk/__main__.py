@@ -1,11 +1,18 @@
-from rabbithole.a2a.server import A2AServer
+from rabbithole.a2a.server import A2AServer, RetentionPolicy, SQLiteTaskStore
 from rabbithole.a2a.types import (
     AgentCard,
     AgentCapabilities,
     AgentSkill,
     MissingAPIKeyError,
 )
-from rabbithole.a2a.utils.push_notification_auth import PushNotificationSenderAuth
+from rabbithole.a2a.utils.push_notification_auth import (
+    SIGNING_ALGORITHMS,
+    PushNotificationSenderAuth,
+)
+from rabbithole.a2a.utils.push_notification_dispatcher import (
+    PushNotificationDispatcher,
+)
+from rabbithole.agent.context_window import ContextWindowManager, truncating_summarizer
 from rabbithole.agent.adk.task_manager import AgentTaskManager
 from rabbithole.agent.adk.agent import ADKAgent
 import click
@@ -24,7 +31,114 @@ logger = logging.getLogger(__name__)
 @click.command()
 @click.option("--host", "host", default="localhost")
 @click.option("--port", "port", default=10000)
-def main(host, port):
+@click.option(
+    "--max-tasks", "max_tasks", type=int, help="Max finished tasks kept in memory."
+)
+@click.option(
+    "--task-ttl",
+    "task_ttl",
+    type=float,
+    help="Seconds to keep a task after it finishes.",
+)
+@click.option(
+    "--max-history-bytes",
+    "max_history_bytes",
+    type=int,
+    help="Evict finished tasks once total history exceeds this size.",
+)
+@click.option(
+    "--task-db",
+    "task_db",
+    help="Persist tasks to this SQLite database instead of memory.",
+)
+@click.option(
+    "--session-db",
+    "session_db",
+    help="Persist ADK conversations to this SQLite database.",
+)
+@click.option(
+    "--max-sessions",
+    "max_sessions",
+    type=int,
+    default=1024,
+    help="Conversations kept in memory when --session-db is set.",
+)
+@click.option(
+    "--session-ttl",
+    "session_ttl",
+    type=float,
+    default=3600,
+    help="Seconds an idle conversation stays in memory when --session-db is set.",
+)
+@click.option(
+    "--max-concurrent-runs",
+    "max_concurrent_runs",
+    type=int,
+    help="Max agent runs executing at once; further runs wait in a queue.",
+)
+@click.option(
+    "--context-tokens",
+    "context_tokens",
+    type=int,
+    help="Token budget of the conversation history sent to the model; "
+    "by default the history is not trimmed.",
+)
+@click.option(
+    "--summarize-context",
+    "summarize_context",
+    is_flag=True,
+    help="Keep a summary of turns that no longer fit --context-tokens.",
+)
+@click.option(
+    "--push-coalesce-window",
+    "push_coalesce_window",
+    type=float,
+    default=0.0,
+    help="Seconds to collapse intermediate push-notifications of a task.",
+)
+@click.option(
+    "--push-delta",
+    "push_delta",
+    is_flag=True,
+    help="Send push-notifications as deltas since the last delivered one.",
+)
+@click.option(
+    "--signing-alg",
+    "signing_alg",
+    type=click.Choice(SIGNING_ALGORITHMS),
+    default="RS256",
+    help="JWS algorithm used to sign push-notifications.",
+)
+@click.option(
+    "--signing-key-file",
+    "signing_key_file",
+    help="Keep push-notification signing keys in this file across restarts.",
+)
+@click.option(
+    "--signing-key-rotation",
+    "signing_key_rotation",
+    type=float,
+    help="Seconds after which the signing key is rotated.",
+)
+def main(
+    host,
+    port,
+    max_tasks,
+    task_ttl,
+    max_history_bytes,
+    task_db,
+    session_db,
+    max_sessions,
+    session_ttl,
+    max_concurrent_runs,
+    context_tokens,
+    summarize_context,
+    push_coalesce_window,
+    push_delta,
+    signing_alg,
+    signing_key_file,
+    signing_key_rotation,
+):
     """Chat with Google ADK Agent server."""
     try:
         capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
@@ -46,12 +160,40 @@ def main(host, port):
             skills=[skill],
         )
 
-        notification_sender_auth = PushNotificationSenderAuth()
+        context_window = None
+        if context_tokens is not None:
+            context_window = ContextWindowManager(
+                max_tokens=context_tokens,
+                summarizer=truncating_summarizer() if summarize_context else None,
+            )
+        notification_sender_auth = PushNotificationSenderAuth(
+            algorithm=signing_alg,
+            key_path=signing_key_file,
+            key_rotation_interval=signing_key_rotation,
+        )
         notification_sender_auth.generate_jwk()
         server = A2AServer(
             agent_card=agent_card,
             task_manager=AgentTaskManager(
-                agent=ADKAgent(), notification_sender_auth=notification_sender_auth
+                agent=ADKAgent(
+                    session_db=session_db,
+                    max_sessions=max_sessions,
+                    session_ttl=session_ttl,
+                    context_window=context_window,
+                ),
+                notification_sender_auth=notification_sender_auth,
+                notification_dispatcher=PushNotificationDispatcher(
+                    notification_sender_auth,
+                    coalesce_window=push_coalesce_window,
+                    delta_payloads=push_delta,
+                ),
+                retention_policy=RetentionPolicy(
+                    max_tasks=max_tasks,
+                    ttl_seconds=task_ttl,
+                    max_history_bytes=max_history_bytes,
+                ),
+                task_store=SQLiteTaskStore(task_db) if task_db else None,
+                max_concurrent_runs=max_concurrent_runs,
             ),
             host=host,
             port=port,
@@ -1,5 +1,7 @@
+import asyncio
 import os
-from typing import Any, Dict, AsyncIterable, Literal
+from contextvars import ContextVar
+from typing import Any, Dict, AsyncIterable, Literal, Optional
 from pydantic import BaseModel
 from google.adk import Agent
 from google.adk.models.lite_llm import LiteLlm
@@ -8,6 +10,16 @@ from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from google.adk.runners import Runner
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from rabbithole.agent.context_window import ContextWindowManager, summary_message
+from .session_service import SQLiteSessionService
+
+# Session of the run in progress. ADK gives callbacks no public way to read
+# it, so it is captured when the run starts; every run is its own asyncio
+# task, whose context the callbacks of the run share.
+_run_session_id: ContextVar[Optional[str]] = ContextVar("run_session_id", default=None)
 
 
 class ResponseFormat(BaseModel):
@@ -18,14 +30,23 @@ class ResponseFormat(BaseModel):
 
 
 class ADKAgent:
-    def __init__(self):
+    def __init__(
+        self,
+        session_db: Optional[str] = None,
+        max_sessions: int = 1024,
+        session_ttl: Optional[float] = 3600,
+        context_window: Optional[ContextWindowManager] = None,
+    ):
         api_key_value = os.environ.get("GOOGLE_API_KEY")
+        # Without a context window the model gets the whole session.
+        self.context_window = context_window
         self.agent = Agent(
             name="Assistant",
             model=LiteLlm(model="gemini/gemini-1.5-flash", api_key=api_key_value),
             description=("Agent to answer any questions."),
             instruction=("You are a helpful assistant"),
             tools=[],
+            before_model_callback=self._trim_context if context_window else None,
         )
 
         self.user_id = "adk_agent"
@@ -33,15 +54,55 @@ class ADKAgent:
             app_name=self.agent.name,
             agent=self.agent,
             artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
+            session_service=(
+                SQLiteSessionService(
+                    session_db, max_sessions=max_sessions, ttl_seconds=session_ttl
+                )
+                if session_db
+                else InMemorySessionService()
+            ),
             memory_service=InMemoryMemoryService(),
         )
 
-    async def invoke(self, query, session_id) -> AsyncIterable[Dict[str, Any]]:
+    def _trim_context(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        """Limits the prompt to the session's recent turns within the budget.
+
+        ADK rebuilds the contents from the whole session on every model call;
+        only the contents added since the previous call are counted.
+        """
+        session_id = _run_session_id.get() or callback_context.invocation_id
+        contents = llm_request.contents
+        window = self.context_window.window(session_id)
+        if len(contents) < window.end:
+            # The session was replaced; its history starts over.
+            window = self.context_window.reset(session_id)
+        for content in contents[window.end :]:
+            window.add(content.role or "user", _content_text(content))
+
+        # Do not start on a model reply or tool result without its request.
+        start = window.start
+        while start < len(contents) - 1 and (
+            contents[start].role != "user"
+            or any(p.function_response for p in contents[start].parts or [])
+        ):
+            start += 1
+        llm_request.contents = contents[start:]
+        if window.summary:
+            llm_request.append_instructions([summary_message(window.summary)])
+        return None
+
+    async def _get_session(self, session_id):
+        if isinstance(self.runner.session_service, SQLiteSessionService):
+            # Paging a session in reads its event log from disk.
+            return await asyncio.to_thread(self._get_or_create_session, session_id)
+        return self._get_or_create_session(session_id)
+
+    def _get_or_create_session(self, session_id):
         session = self.runner.session_service.get_session(
             app_name=self.agent.name, user_id=self.user_id, session_id=session_id
         )
-        content = types.Content(role="user", parts=[types.Part.from_text(text=query)])
         if session is None:
             session = self.runner.session_service.create_session(
                 app_name=self.agent.name,
@@ -49,11 +110,19 @@ class ADKAgent:
                 state={},
                 session_id=session_id,
             )
-        events = list(
-            self.runner.run(
-                user_id=self.user_id, session_id=session.id, new_message=content
-            )
-        )
+        return session
+
+    async def invoke(self, query, session_id) -> AsyncIterable[Dict[str, Any]]:
+        session = await self._get_session(session_id)
+        _run_session_id.set(session.id)
+        content = types.Content(role="user", parts=[types.Part.from_text(text=query)])
+        # run_async keeps the event loop free while the model responds;
+        # Runner.run would block it for the whole round trip.
+        events = []
+        async for event in self.runner.run_async(
+            user_id=self.user_id, session_id=session.id, new_message=content
+        ):
+            events.append(event)
 
         if not events or not events[-1].content or not events[-1].content.parts:
             yield {"is_task_complete": True, "require_user_input": False, "content": ""}
@@ -67,21 +136,27 @@ class ADKAgent:
             }
 
     async def stream(self, query, session_id) -> AsyncIterable[Dict[str, Any]]:
-        session = self.runner.session_service.get_session(
-            app_name=self.agent.name, user_id=self.user_id, session_id=session_id
-        )
+        session = await self._get_session(session_id)
+        _run_session_id.set(session.id)
         content = types.Content(role="user", parts=[types.Part.from_text(text=query)])
-        if session is None:
-            session = self.runner.session_service.create_session(
-                app_name=self.agent.name,
-                user_id=self.user_id,
-                state={},
-                session_id=session_id,
-            )
+        # With SSE streaming the model's output arrives as partial events
+        # carrying text deltas, followed by one event with the full response.
         async for event in self.runner.run_async(
-            user_id=self.user_id, session_id=session.id, new_message=content
+            user_id=self.user_id,
+            session_id=session.id,
+            new_message=content,
+            run_config=RunConfig(streaming_mode=StreamingMode.SSE),
         ):
-            if event.is_final_response():
+            if event.partial:
+                parts = (event.content and event.content.parts) or []
+                delta = "".join(p.text for p in parts if p.text)
+                if delta:
+                    yield {
+                        "is_task_complete": False,
+                        "require_user_input": False,
+                        "content": delta,
+                    }
+            elif event.is_final_response():
                 response = ""
                 if (
                     event.content
@@ -104,11 +179,17 @@ class ADKAgent:
                     "require_user_input": False,
                     "content": response,
                 }
-            else:
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Processing the request...",
-                }
 
     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
+
+
+def _content_text(content: types.Content) -> str:
+    texts = []
+    for part in content.parts or []:
+        if part.text:
+            texts.append(part.text)
+        elif part.function_call:
+            texts.append(str(part.function_call.model_dump(exclude_none=True)))
+        elif part.function_response:
+            texts.append(str(part.function_response.model_dump(exclude_none=True)))
+    return "\n".join(texts)
@@ -0,0 +1,479 @@
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListEventsResponse,
+    ListSessionsResponse,
+)
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS session_events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+) WITHOUT ROWID;
+"""
+
+SessionKey = tuple[str, str, str]
+
+
+class SQLiteSessionService(BaseSessionService):
+    """ADK session service persisted to SQLite with a bounded session cache.
+
+    Every change is applied to the resident session at once and written to
+    the database, one row per event, so sessions survive restarts. Writes are
+    queued and committed in batches by a writer thread, either when
+    batch_size writes are pending or flush_interval seconds have passed, so
+    append_event does no I/O on the caller's thread. Recently used sessions
+    are kept in memory; a session is paged out when more than max_sessions
+    are resident or when it was not used for ttl_seconds, and is reloaded from
+    disk on next access; async callers do that in a worker thread.
+
+    As in InMemorySessionService, state keys prefixed with "app:" and "user:"
+    are shared by all sessions of the app or user, and "temp:" keys are not
+    stored.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_sessions: int = 1024,
+        ttl_seconds: Optional[float] = 3600,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+    ):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cache: OrderedDict[SessionKey, Session] = OrderedDict()
+        self._last_access: dict[SessionKey, float] = {}
+        # Lock order: _lock (cache), then _db_lock (connection), then
+        # _pending_lock (write queue). The writer thread never takes _lock.
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: list[tuple[Callable[..., Any], tuple[Any, ...]]] = []
+        self._flush_wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (
+            session_id.strip()
+            if session_id and session_id.strip()
+            else str(uuid.uuid4())
+        )
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state={},
+            last_update_time=time.time(),
+        )
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._enqueue(
+                self._conn.execute,
+                "DELETE FROM session_events"
+                " WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            )
+            self._enqueue(
+                self._conn.execute,
+                "INSERT OR REPLACE INTO sessions"
+                " (app_name, user_id, id, state, last_update_time)"
+                " VALUES (?, ?, ?, '{}', ?)",
+                (*key, session.last_update_time),
+            )
+            self._save_state(session, state or {})
+        with self._db_lock:
+            self._flush()
+            session.state = self._load_state(*key)
+        with self._lock:
+            self._cache_put(key, session)
+            return self._copy(session)
+
+    def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        session = self._get((app_name, user_id, session_id))
+        if session is None:
+            return None
+        with self._lock:
+            return self._copy(session, config)
+
+    def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        with self._db_lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT id, last_update_time FROM sessions"
+                " WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchall()
+        return ListSessionsResponse(
+            sessions=[
+                Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    last_update_time=last_update_time,
+                )
+                for session_id, last_update_time in rows
+            ]
+        )
+
+    def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._cache.pop(key, None)
+            self._last_access.pop(key, None)
+            self._enqueue(
+                self._conn.execute,
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                key,
+            )
+            self._enqueue(
+                self._conn.execute,
+                "DELETE FROM session_events"
+                " WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                key,
+            )
+
+    def list_events(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> ListEventsResponse:
+        session = self._get((app_name, user_id, session_id))
+        with self._lock:
+            return ListEventsResponse(events=list(session.events) if session else [])
+
+    def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+
+        super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        stored = self._get(key)
+        if stored is None:
+            raise ValueError(f"Session {session.id} not found")
+        with self._lock:
+            if stored is not session:
+                super().append_event(session=stored, event=event)
+                stored.last_update_time = event.timestamp
+
+            self._enqueue(
+                self._conn.execute,
+                "INSERT INTO session_events"
+                " (app_name, user_id, session_id, seq, event) VALUES (?, ?, ?, ?, ?)",
+                (*key, len(stored.events) - 1, event.model_dump_json()),
+            )
+            self._enqueue(
+                self._conn.execute,
+                "UPDATE sessions SET last_update_time = ?"
+                " WHERE app_name = ? AND user_id = ? AND id = ?",
+                (event.timestamp, *key),
+            )
+            if event.actions and event.actions.state_delta:
+                self._save_state(stored, event.actions.state_delta)
+        return event
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "resident_sessions": len(self._cache),
+                "resident_events": sum(len(s.events) for s in self._cache.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def flush(self) -> None:
+        """Commits all queued writes in a single transaction."""
+        with self._db_lock:
+            self._flush()
+
+    def close(self) -> None:
+        self._closed = True
+        self._flush_wakeup.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            self._cache.clear()
+            self._last_access.clear()
+        with self._db_lock:
+            self._flush()
+            self._conn.close()
+
+    def _get(self, key: SessionKey) -> Optional[Session]:
+        with self._lock:
+            self._expire_idle()
+            session = self._cache.get(key)
+            if session is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                self._last_access[key] = time.monotonic()
+                return session
+            self.misses += 1
+
+        # Read without holding the cache lock, so callers that only touch
+        # resident sessions are not held up by the disk.
+        with self._db_lock:
+            # Queued writes may belong to a session that was paged out.
+            self._flush()
+            loaded = self._load_session(key)
+        if loaded is None:
+            return None
+        with self._lock:
+            session = self._cache.get(key)
+            if session is None:
+                session = loaded
+                self._cache_put(key, session)
+            return session
+
+    def _enqueue(self, fn: Callable[..., Any], *args: Any):
+        """Queues a write for the writer thread. fn runs with the connection
+        inside the batch's transaction."""
+        with self._pending_lock:
+            self._pending.append((fn, args))
+            pending = len(self._pending)
+        if pending >= self.batch_size:
+            self._flush_wakeup.set()
+        if self._writer is None and not self._closed:
+            self._writer = threading.Thread(
+                target=self._run_writer, name="session-writer", daemon=True
+            )
+            self._writer.start()
+
+    def _flush(self):
+        # Must hold _db_lock. Writes are kept until they are committed, so a
+        # failed commit is retried with the next batch.
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            with self._conn:
+                for fn, args in batch:
+                    fn(*args)
+        except Exception:
+            with self._pending_lock:
+                self._pending[:0] = batch
+            raise
+
+    def _run_writer(self):
+        while not self._closed:
+            self._flush_wakeup.wait(self.flush_interval)
+            self._flush_wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error while flushing sessions to {self.path}: {e}")
+
+    def _cache_put(self, key: SessionKey, session: Session):
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        self._last_access[key] = time.monotonic()
+        while len(self._cache) > self.max_sessions:
+            self._evict(next(iter(self._cache)))
+
+    def _expire_idle(self):
+        if self.ttl_seconds is None:
+            return
+        # The cache is ordered by last access, so idle sessions are first.
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._cache:
+            key = next(iter(self._cache))
+            if self._last_access[key] > cutoff:
+                break
+            self._evict(key)
+
+    def _evict(self, key: SessionKey):
+        # Everything is already on disk, so paging out only drops memory.
+        del self._cache[key]
+        del self._last_access[key]
+        self.evictions += 1
+
+    def _load_session(self, key: SessionKey) -> Optional[Session]:
+        row = self._conn.execute(
+            "SELECT last_update_time FROM sessions"
+            " WHERE app_name = ? AND user_id = ? AND id = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+
+        events = [
+            Event.model_validate_json(event_json)
+            for (event_json,) in self._conn.execute(
+                "SELECT event FROM session_events"
+                " WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq",
+                key,
+            )
+        ]
+        app_name, user_id, session_id = key
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=self._load_state(*key),
+            events=events,
+            last_update_time=row[0],
+        )
+
+    def _load_state(self, app_name: str, user_id: str, session_id: str):
+        state = json.loads(
+            self._conn.execute(
+                "SELECT state FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()[0]
+        )
+        for table, params in (
+            ("app_states WHERE app_name = ?", (app_name,)),
+            ("user_states WHERE app_name = ? AND user_id = ?", (app_name, user_id)),
+        ):
+            row = self._conn.execute(f"SELECT state FROM {table}", params).fetchone()
+            if row is not None:
+                state.update(json.loads(row[0]))
+        return state
+
+    def _save_state(self, session: Session, delta: dict[str, Any]):
+        """Writes a state delta to the app, user and session state rows."""
+        scopes: dict[str, dict[str, Any]] = {"app": {}, "user": {}, "session": {}}
+        for state_key, value in delta.items():
+            if state_key.startswith(State.TEMP_PREFIX):
+                continue
+            if state_key.startswith(State.APP_PREFIX):
+                scopes["app"][state_key] = value
+            elif state_key.startswith(State.USER_PREFIX):
+                scopes["user"][state_key] = value
+            else:
+                scopes["session"][state_key] = value
+
+        app_name, user_id = session.app_name, session.user_id
+        # Merged when the batch is committed, after the writes queued before.
+        if scopes["app"]:
+            self._enqueue(
+                self._merge_state,
+                "app_states",
+                "app_name = ?",
+                (app_name,),
+                scopes["app"],
+            )
+        if scopes["user"]:
+            self._enqueue(
+                self._merge_state,
+                "user_states",
+                "app_name = ? AND user_id = ?",
+                (app_name, user_id),
+                scopes["user"],
+            )
+        if scopes["session"]:
+            self._enqueue(
+                self._merge_state,
+                "sessions",
+                "app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session.id),
+                scopes["session"],
+            )
+
+        if not scopes["app"] and not scopes["user"]:
+            return
+        # Sessions of the same app or user that are resident see the change.
+        for (cached_app, cached_user, _), cached in self._cache.items():
+            if cached_app == app_name:
+                cached.state.update(scopes["app"])
+                if cached_user == user_id:
+                    cached.state.update(scopes["user"])
+
+    def _merge_state(
+        self, table: str, where: str, params: tuple[str, ...], delta: dict[str, Any]
+    ):
+        row = self._conn.execute(
+            f"SELECT state FROM {table} WHERE {where}", params
+        ).fetchone()
+        state = json.loads(row[0]) if row else {}
+        state.update(delta)
+        if table == "sessions":
+            self._conn.execute(
+                f"UPDATE sessions SET state = ? WHERE {where}",
+                (json.dumps(state), *params),
+            )
+        else:
+            columns = "app_name" if table == "app_states" else "app_name, user_id"
+            placeholders = ", ".join("?" * (len(params) + 1))
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {table} ({columns}, state)"
+                f" VALUES ({placeholders})",
+                (*params, json.dumps(state)),
+            )
+
+    @staticmethod
+    def _copy(session: Session, config: Optional[GetSessionConfig] = None) -> Session:
+        """Returns a session that the caller may modify without affecting the cache."""
+        events = session.events
+        if config:
+            if config.num_recent_events:
+                events = events[-config.num_recent_events :]
+            elif config.after_timestamp:
+                events = [e for e in events if e.timestamp > config.after_timestamp]
+        return session.model_copy(
+            update={"events": list(events), "state": dict(session.state)}
+        )
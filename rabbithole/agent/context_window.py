@@ -0,0 +1,124 @@
+"""Token-budgeted conversation windows shared by the agents."""
+
+from collections import OrderedDict, deque
+from typing import Callable, NamedTuple, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, about four characters per token."""
+    return len(text) // 4 + 1
+
+
+class Turn(NamedTuple):
+    role: str
+    text: str
+    tokens: int
+
+
+Summarizer = Callable[[Optional[str], list[Turn]], str]
+
+
+def truncating_summarizer(max_tokens: int = 512, max_turn_chars: int = 200):
+    """Returns a summarizer that keeps the start of each rolled-off turn.
+
+    The summary is extended with one line per turn and cut from the front
+    once it exceeds max_tokens, so updating it costs O(new turns).
+    """
+
+    def summarize(summary: Optional[str], turns: list[Turn]) -> str:
+        lines = summary.splitlines() if summary else []
+        for turn in turns:
+            text = " ".join(turn.text.split())
+            if len(text) > max_turn_chars:
+                text = text[:max_turn_chars] + "..."
+            lines.append(f"{turn.role}: {text}")
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    return summarize
+
+
+class ConversationWindow:
+    """The most recent turns of one conversation that fit a token budget.
+
+    The token count is kept up to date as turns are added and dropped, so
+    adding a turn costs O(1) amortized regardless of the conversation length.
+    Turns are numbered from 0 in the order they were added; start is the
+    number of the oldest turn still in the window. The newest turn is always
+    kept, even if it alone exceeds the budget.
+    """
+
+    def __init__(self, max_tokens: int, summarizer: Optional[Summarizer] = None):
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.turns: deque[Turn] = deque()
+        self.tokens = 0
+        self.start = 0
+        self.summary: Optional[str] = None
+
+    @property
+    def end(self) -> int:
+        """Number of turns added so far."""
+        return self.start + len(self.turns)
+
+    def add(self, role: str, text: str, tokens: Optional[int] = None) -> None:
+        if tokens is None:
+            tokens = estimate_tokens(text)
+        self.turns.append(Turn(role, text, tokens))
+        self.tokens += tokens
+
+        dropped = []
+        while self.tokens > self.max_tokens and len(self.turns) > 1:
+            turn = self.turns.popleft()
+            self.tokens -= turn.tokens
+            self.start += 1
+            dropped.append(turn)
+
+        if dropped and self.summarizer is not None:
+            self.summary = self.summarizer(self.summary, dropped)
+
+    def input_items(self) -> list[dict[str, str]]:
+        """The window as chat messages, led by the summary if there is one."""
+        items = []
+        if self.summary:
+            items.append({"role": "system", "content": summary_message(self.summary)})
+        items.extend({"role": t.role, "content": t.text} for t in self.turns)
+        return items
+
+
+def summary_message(summary: str) -> str:
+    return f"Summary of the earlier conversation:\n{summary}"
+
+
+class ContextWindowManager:
+    """Conversation windows per session, for the most recent max_sessions."""
+
+    def __init__(
+        self,
+        max_tokens: int = 4000,
+        max_sessions: int = 1024,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.max_tokens = max_tokens
+        self.max_sessions = max_sessions
+        self.summarizer = summarizer
+        self._windows: OrderedDict[str, ConversationWindow] = OrderedDict()
+
+    def window(self, session_id: str) -> ConversationWindow:
+        window = self._windows.get(session_id)
+        if window is None:
+            window = ConversationWindow(self.max_tokens, self.summarizer)
+            self._windows[session_id] = window
+            if len(self._windows) > self.max_sessions:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(session_id)
+        return window
+
+    def reset(self, session_id: str) -> ConversationWindow:
+        self._windows.pop(session_id, None)
+        return self.window(session_id)
+
+    def forget(self, session_id: str) -> None:
+        self._windows.pop(session_id, None)
@@ -1,4 +1,4 @@
-from typing import Any, Dict, AsyncIterable, Literal
+from typing import Any, Dict, AsyncIterable, Literal, Optional
 from pydantic import BaseModel
 from openai.types.responses import (
     ResponseTextDeltaEvent,
@@ -13,6 +13,8 @@ from openai.types.beta.threads.messages import MessageTextContentPart
 
 from agents import Agent, Runner
 
+from rabbithole.agent.context_window import ContextWindowManager
+
 
 class ResponseFormat(BaseModel):
     """Respond to the user in this format."""
@@ -22,11 +24,25 @@ class ResponseFormat(BaseModel):
 
 
 class OAIAgent:
-    def __init__(self):
+    def __init__(self, context_window: Optional[ContextWindowManager] = None):
         self.agent = Agent(name="Assistant", instructions="You are a helpful assistant")
+        # Without a context window only the query is sent, with no history.
+        self.context_window = context_window
+
+    def _agent_input(self, query, sessionId):
+        """Returns the session's recent turns within the token budget."""
+        if not sessionId or self.context_window is None:
+            return query
+        window = self.context_window.window(sessionId)
+        window.add("user", query)
+        return window.input_items()
+
+    def _remember_response(self, sessionId, content: str):
+        if sessionId and self.context_window is not None:
+            self.context_window.window(sessionId).add("assistant", content)
 
     async def invoke(self, query, sessionId):
-        result = await Runner.run(self.agent, query)
+        result = await Runner.run(self.agent, self._agent_input(query, sessionId))
         # Assuming result.final_output gives a simple string directly
         # If it's structured like the streaming response, this might need adjustment
         content_to_return = "Agent invocation completed."
@@ -54,6 +70,7 @@ class OAIAgent:
                 except Exception:
                     pass  # Keep default content_to_return
 
+        self._remember_response(sessionId, content_to_return)
         return {
             "is_task_complete": True,
             "require_user_input": False,
@@ -61,10 +78,14 @@ class OAIAgent:
         }
 
     async def stream(self, query, sessionId) -> AsyncIterable[Dict[str, Any]]:
-        result = Runner.run_streamed(self.agent, input=query)
+        result = Runner.run_streamed(
+            self.agent, input=self._agent_input(query, sessionId)
+        )
+        streamed_text = []
         async for event in result.stream_events():
             if event.type == "raw_response_event":
                 if isinstance(event.data, ResponseTextDeltaEvent):
+                    streamed_text.append(event.data.delta)
                     yield {
                         "is_task_complete": False,
                         "require_user_input": False,
@@ -106,6 +127,9 @@ class OAIAgent:
                     else:
                         response_content = f"[Unhandled response type: {type(event.data.response).__name__}]"
 
+                    self._remember_response(
+                        sessionId, "".join(streamed_text) or response_content
+                    )
                     yield {
                         "is_task_complete": is_complete,
                         "require_user_input": input_required,
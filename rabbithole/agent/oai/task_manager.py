@@ -12,21 +12,19 @@ from rabbithole.a2a.types import (
     JSONRPCResponse,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
-    TaskArtifactUpdateEvent,
-    TaskStatusUpdateEvent,
     Task,
     PushNotificationConfig,
     InvalidParamsError,
     FilePart,
     DataPart,
     Union,
-    TaskResubscriptionRequest,
 )
 from rabbithole.a2a.server.task_manager import InMemoryTaskManager
 from rabbithole.a2a.utils.push_notification_auth import PushNotificationSenderAuth
+from rabbithole.a2a.utils.push_notification_dispatcher import (
+    PushNotificationDispatcher,
+)
 import rabbithole.a2a.server.utils as utils
-from rabbithole.a2a.server.utils import new_not_implemented_error
-import asyncio
 import logging
 import traceback
 from .agent import OAIAgent
@@ -38,69 +36,19 @@ Part = Union[TextPart, FilePart, DataPart]
 
 class AgentTaskManager(InMemoryTaskManager):
     def __init__(
-        self, agent: OAIAgent, notification_sender_auth: PushNotificationSenderAuth
+        self,
+        agent: OAIAgent,
+        notification_sender_auth: PushNotificationSenderAuth,
+        notification_dispatcher: Optional[PushNotificationDispatcher] = None,
+        **kwargs,
     ):
-        super().__init__()
+        super().__init__(**kwargs)
         self.agent = agent
         self.notification_sender_auth = notification_sender_auth
-
-    async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
-        task_send_params: TaskSendParams = request.params
-        query = self._get_user_query(task_send_params)
-
-        try:
-            async for item in self.agent.stream(query, task_send_params.sessionId):
-                is_task_complete = item["is_task_complete"]
-                require_user_input = item["require_user_input"]
-                artifact_obj: Optional[Artifact] = None
-                message_obj: Optional[Message] = None
-                current_parts: List[Part] = [
-                    TextPart(type="text", text=item["content"])
-                ]
-                end_stream = False
-
-                if not is_task_complete and not require_user_input:
-                    task_state = TaskState.WORKING
-                    message_obj = Message(role="agent", parts=current_parts)
-                elif require_user_input:
-                    task_state = TaskState.INPUT_REQUIRED
-                    message_obj = Message(role="agent", parts=current_parts)
-                    end_stream = True
-                else:
-                    task_state = TaskState.COMPLETED
-                    message_obj = Message(role="agent", parts=current_parts)
-                    artifact_obj = Artifact(parts=current_parts, index=0, append=False)
-                    end_stream = True
-                task_status = TaskStatus(state=task_state, message=message_obj)
-                latest_task = await self.update_store(
-                    task_send_params.id,
-                    task_status,
-                    [artifact_obj] if artifact_obj else [],
-                )
-                await self.send_task_notification(latest_task)
-
-                if artifact_obj:
-                    task_artifact_update_event = TaskArtifactUpdateEvent(
-                        id=task_send_params.id, artifact=artifact_obj
-                    )
-                    await self.enqueue_events_for_sse(
-                        task_send_params.id, task_artifact_update_event
-                    )
-                task_update_event = TaskStatusUpdateEvent(
-                    id=task_send_params.id, status=task_status, final=end_stream
-                )
-                await self.enqueue_events_for_sse(
-                    task_send_params.id, task_update_event
-                )
-
-        except Exception as e:
-            logger.error(f"An error occurred while streaming the response: {e}")
-            await self.enqueue_events_for_sse(
-                task_send_params.id,
-                InternalError(
-                    message=f"An error occurred while streaming the response: {e}"
-                ),
-            )
+        self.notification_dispatcher = (
+            notification_dispatcher
+            or PushNotificationDispatcher(notification_sender_auth)
+        )
 
     def _validate_request(
         self, request: Union[SendTaskRequest, SendTaskStreamingRequest]
@@ -151,6 +99,9 @@ class AgentTaskManager(InMemoryTaskManager):
         )
         await self.send_task_notification(task)
 
+        return await self.run_agent(request, self._invoke_agent(request))
+
+    async def _invoke_agent(self, request: SendTaskRequest) -> SendTaskResponse:
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
         try:
@@ -182,9 +133,15 @@ class AgentTaskManager(InMemoryTaskManager):
                     )
 
             task_send_params: TaskSendParams = request.params
+            stream = self.agent.stream(
+                self._get_user_query(task_send_params), task_send_params.sessionId
+            )
             sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)
 
-            asyncio.create_task(self._run_streaming_agent(request))
+            self.supervisor.start(
+                task_send_params.id,
+                self.run_streaming_agent(task_send_params.id, stream),
+            )
 
             return self.dequeue_events_for_sse(
                 request.id, task_send_params.id, sse_event_queue
@@ -241,14 +198,13 @@ class AgentTaskManager(InMemoryTaskManager):
         push_info = await self.get_push_notification_info(task.id)
 
         logger.info(f"Notifying for task {task.id} => {task.status.state}")
-        await self.notification_sender_auth.send_push_notification(
-            push_info.url, data=task.model_dump(exclude_none=True)
-        )
+        # Delivery, retries and circuit breaking happen in the background so
+        # a slow webhook receiver never stalls the task.
+        self.notification_dispatcher.submit_task(push_info.url, task)
 
-    async def on_resubscribe_to_task(
-        self, request: TaskResubscriptionRequest
-    ) -> Union[AsyncIterable[SendTaskResponse], JSONRPCResponse]:
-        return new_not_implemented_error(request.id)
+    async def close(self) -> None:
+        await self.notification_dispatcher.close()
+        await super().close()
 
     async def set_push_notification_info(
         self, task_id: str, push_notification_config: PushNotificationConfig
@@ -119,38 +119,40 @@ async def cli(
             )
             push_notification_listener.start()
 
-    client = A2AClient(agent_card=card_obj)
-    current_sessionId: str
-    if session == "0":
-        current_sessionId = uuid4().hex
-    else:
-        current_sessionId = session
-
-    continue_loop = True
-    streaming_supported = card_obj.capabilities.streaming
-
-    while continue_loop:
-        taskId = uuid4().hex
-        print("=========  starting a new task ======== ")
-        continue_loop = await completeTask(
-            client,
-            card_obj,
-            streaming_supported,
-            use_push_notifications,
-            notification_receiver_host,
-            notification_receiver_port,
-            taskId,
-            current_sessionId,
-        )
+    async with A2AClient(agent_card=card_obj) as client:
+        current_sessionId: str
+        if session == "0":
+            current_sessionId = uuid4().hex
+        else:
+            current_sessionId = session
+
+        continue_loop = True
+        streaming_supported = card_obj.capabilities.streaming
+
+        while continue_loop:
+            taskId = uuid4().hex
+            print("=========  starting a new task ======== ")
+            continue_loop = await completeTask(
+                client,
+                card_obj,
+                streaming_supported,
+                use_push_notifications,
+                notification_receiver_host,
+                notification_receiver_port,
+                taskId,
+                current_sessionId,
+            )
 
-        if history and continue_loop:
-            print("========= history ======== ")
-            task_query_params = TaskQueryParams(id=taskId, historyLength=10)
-            task_response = await client.get_task(task_query_params)
-            if task_response.result:
-                print(task_response.model_dump_json(include={"result": {"history"}}))
-            elif task_response.error:
-                print(f"Error getting task history: {task_response.error.message}")
+            if history and continue_loop:
+                print("========= history ======== ")
+                task_query_params = TaskQueryParams(id=taskId, historyLength=10)
+                task_response = await client.get_task(task_query_params)
+                if task_response.result:
+                    print(
+                        task_response.model_dump_json(include={"result": {"history"}})
+                    )
+                elif task_response.error:
+                    print(f"Error getting task history: {task_response.error.message}")
 
 
 async def completeTask(
@@ -14,6 +14,13 @@ import json
 import httpx
 
 
+async def _send_task(agent_url: str, payload: dict) -> SendTaskResponse:
+    # Each asyncio.run() has its own event loop, so the client and its
+    # connections must not outlive the call.
+    async with A2AClient(url=agent_url) as client:
+        return await client.send_task(payload=payload)
+
+
 def run_streamlit_app():
     st.set_page_config(page_title="🐇 The Rabbit Hole", layout="wide")
     st.title("🐇 Rabbit Hole")
@@ -64,8 +71,6 @@ def run_streamlit_app():
                         )
                         st.stop()
 
-                    client = A2AClient(url=st.session_state.agent_url)
-
                     user_message = Message(
                         role="user", parts=[TextPart(text=user_prompt)]
                     )
@@ -74,7 +79,9 @@ def run_streamlit_app():
                     )
 
                     send_task_response: SendTaskResponse = asyncio.run(
-                        client.send_task(payload=task_send_params.model_dump())
+                        _send_task(
+                            st.session_state.agent_url, task_send_params.model_dump()
+                        )
                     )
 
                     agent_response_display = "No response from agent."
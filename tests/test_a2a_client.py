@@ -0,0 +1,222 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from rabbithole.a2a.client import A2AClient
+from rabbithole.a2a.types import (
+    A2AClientHTTPError,
+    Message,
+    TaskIdParams,
+    TaskQueryParams,
+    TaskSendParams,
+    TextPart,
+)
+
+
+def _task_handler(seen):
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        seen.append((body["method"], request.extensions["timeout"]["read"]))
+        task = {
+            "id": body["params"]["id"],
+            "sessionId": "s1",
+            "status": {"state": "completed"},
+        }
+        return httpx.Response(
+            200, json={"jsonrpc": "2.0", "id": body["id"], "result": task}
+        )
+
+    return handler
+
+
+def test_requests_share_one_pooled_client():
+    async def scenario():
+        seen = []
+        transport = httpx.MockTransport(_task_handler(seen))
+        async with A2AClient(
+            url="http://agent/",
+            client=httpx.AsyncClient(transport=transport, timeout=30),
+        ) as client:
+            responses = [
+                await client.get_task(TaskQueryParams(id=f"t{i}")) for i in range(3)
+            ]
+            await client.get_task(TaskQueryParams(id="t9"), timeout=2)
+            pooled = client.client
+        return seen, responses, pooled
+
+    seen, responses, pooled = asyncio.run(scenario())
+    assert [r.result.id for r in responses] == ["t0", "t1", "t2"]
+    assert seen == [("tasks/get", 30)] * 3 + [("tasks/get", 2)]
+    # A client that was passed in is left open for its owner.
+    assert not pooled.is_closed
+
+
+def test_owned_client_is_closed_on_exit():
+    async def scenario():
+        async with A2AClient(url="http://agent/", timeout=5) as client:
+            pooled = client.client
+            assert client.client is pooled
+            assert pooled.timeout.read == 5
+        return pooled
+
+    assert asyncio.run(scenario()).is_closed
+
+
+def _stream_handler(events: int, delay: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+
+        async def frames():
+            for i in range(events):
+                await asyncio.sleep(delay)
+                update = {
+                    "id": body["params"]["id"],
+                    "status": {"state": "working"},
+                    "final": i == events - 1,
+                }
+                response = {"jsonrpc": "2.0", "id": body["id"], "result": update}
+                yield f"id: {i + 1}\ndata: {json.dumps(response)}\n\n".encode()
+
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=frames()
+        )
+
+    return handler
+
+
+def test_streams_do_not_block_the_event_loop():
+    async def consume(client, task_id):
+        params = TaskSendParams(
+            id=task_id, message=Message(role="user", parts=[TextPart(text="hi")])
+        )
+        return [
+            update.result.final async for update in client.send_task_streaming(params)
+        ]
+
+    async def scenario():
+        transport = httpx.MockTransport(_stream_handler(events=5, delay=0.02))
+        async with A2AClient(
+            url="http://agent/", client=httpx.AsyncClient(transport=transport)
+        ) as client:
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(consume(client, f"t{i}") for i in range(50))
+            )
+            return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == [[False, False, False, False, True]] * 50
+    # The streams run concurrently rather than one after another.
+    assert elapsed < 50 * 5 * 0.02 / 5
+
+
+def _sse_frame(body, event_id, final=False):
+    update = {
+        "id": body["params"]["id"],
+        "status": {"state": "working"},
+        "final": final,
+    }
+    response = {"jsonrpc": "2.0", "id": body["id"], "result": update}
+    return f"id: {event_id}\ndata: {json.dumps(response)}\n\n".encode()
+
+
+def test_dropped_stream_resumes_after_last_event():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if len(requests) == 1:
+            raise httpx.ConnectError("connection refused")
+
+        async def frames():
+            if body["method"] == "tasks/sendSubscribe":
+                yield _sse_frame(body, 1)
+                yield _sse_frame(body, 2)
+                raise httpx.ReadError("connection reset")
+            # The server may replay an event the client already has.
+            yield _sse_frame(body, 2)
+            yield _sse_frame(body, 3, final=True)
+
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=frames()
+        )
+
+    async def scenario():
+        transport = httpx.MockTransport(handler)
+        async with A2AClient(
+            url="http://agent/",
+            client=httpx.AsyncClient(transport=transport),
+            reconnect_backoff=0.001,
+        ) as client:
+            params = TaskSendParams(
+                id="t1", message=Message(role="user", parts=[TextPart(text="hi")])
+            )
+            return [
+                update.result.final
+                async for update in client.send_task_streaming(params)
+            ]
+
+    finals = asyncio.run(scenario())
+    assert finals == [False, False, True]
+    assert [r["method"] for r in requests] == [
+        "tasks/sendSubscribe",
+        "tasks/sendSubscribe",
+        "tasks/resubscribe",
+    ]
+    assert requests[2]["params"]["metadata"] == {"lastEventId": 2}
+    assert requests[2]["id"] == requests[1]["id"]
+
+
+def test_gives_up_after_max_reconnects():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused")
+
+    async def scenario():
+        transport = httpx.MockTransport(handler)
+        async with A2AClient(
+            url="http://agent/",
+            client=httpx.AsyncClient(transport=transport),
+            max_reconnects=2,
+            reconnect_backoff=0.001,
+        ) as client:
+            async for _ in client.resubscribe(TaskIdParams(id="t1")):
+                pass
+
+    with pytest.raises(A2AClientHTTPError):
+        asyncio.run(scenario())
+
+
+def test_stream_error_without_event_id_is_delivered():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        error = {
+            "jsonrpc": "2.0",
+            "id": body["id"],
+            "error": {"code": -32603, "message": "Internal error"},
+        }
+
+        async def frames():
+            yield _sse_frame(body, 1)
+            yield f"data: {json.dumps(error)}\n\n".encode()
+
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=frames()
+        )
+
+    async def scenario():
+        transport = httpx.MockTransport(handler)
+        async with A2AClient(
+            url="http://agent/", client=httpx.AsyncClient(transport=transport)
+        ) as client:
+            params = TaskSendParams(
+                id="t1", message=Message(role="user", parts=[TextPart(text="hi")])
+            )
+            return [update async for update in client.send_task_streaming(params)]
+
+    updates = asyncio.run(scenario())
+    assert updates[0].result.final is False
+    assert updates[1].error.code == -32603
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.agents.run_config import StreamingMode  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from rabbithole.a2a.types import (  # noqa: E402
+    Message,
+    SendTaskRequest,
+    TaskSendParams,
+    TaskState,
+    TextPart,
+)
+from rabbithole.a2a.utils.push_notification_auth import (  # noqa: E402
+    PushNotificationSenderAuth,
+)
+from rabbithole.agent.adk.agent import ADKAgent  # noqa: E402
+from rabbithole.agent.adk.task_manager import AgentTaskManager  # noqa: E402
+
+LLM_LATENCY = 0.2
+
+
+class SlowRunner:
+    """Stands in for an ADK Runner whose model takes LLM_LATENCY to answer."""
+
+    def __init__(self):
+        self.session_service = InMemorySessionService()
+
+    def run(self, **kwargs):
+        time.sleep(LLM_LATENCY)
+        yield self._answer()
+
+    async def run_async(self, run_config=None, **kwargs):
+        if run_config is not None and run_config.streaming_mode == StreamingMode.SSE:
+            for delta in ["h", "i"]:
+                await asyncio.sleep(LLM_LATENCY / 2)
+                yield self._answer(delta, partial=True)
+        else:
+            await asyncio.sleep(LLM_LATENCY)
+        yield self._answer()
+
+    def _answer(self, text="hi", partial=False):
+        return SimpleNamespace(
+            content=types.Content(
+                role="model", parts=[types.Part.from_text(text=text)]
+            ),
+            partial=partial,
+            is_final_response=lambda: not partial,
+        )
+
+
+def _agent() -> ADKAgent:
+    agent = ADKAgent.__new__(ADKAgent)
+    agent.agent = SimpleNamespace(name="Assistant")
+    agent.user_id = "adk_agent"
+    agent.runner = SlowRunner()
+    return agent
+
+
+def test_concurrent_sends_take_about_one_llm_latency():
+    manager = AgentTaskManager(_agent(), PushNotificationSenderAuth())
+    requests = [
+        SendTaskRequest(
+            id=i,
+            params=TaskSendParams(
+                id=f"task-{i}",
+                sessionId=f"session-{i}",
+                message=Message(role="user", parts=[TextPart(text="hello")]),
+            ),
+        )
+        for i in range(10)
+    ]
+
+    async def run():
+        started = time.perf_counter()
+        responses = await asyncio.gather(*map(manager.on_send_task, requests))
+        return responses, time.perf_counter() - started
+
+    responses, elapsed = asyncio.run(run())
+    assert all(r.result.status.state == TaskState.COMPLETED for r in responses)
+    assert elapsed < LLM_LATENCY * 3
+
+
+def test_stream_yields_model_deltas():
+    async def run():
+        return [item async for item in _agent().stream("hello", "session")]
+
+    items = asyncio.run(run())
+    assert [item["content"] for item in items] == ["h", "i", "hi"]
+    assert [item["is_task_complete"] for item in items] == [False, False, True]
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.events import Event, EventActions  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from rabbithole.agent.adk.session_service import SQLiteSessionService  # noqa: E402
+
+
+def _event(text: str, state_delta: dict | None = None) -> Event:
+    return Event(
+        author="user",
+        content=types.Content(role="user", parts=[types.Part.from_text(text=text)]),
+        actions=EventActions(state_delta=state_delta or {}),
+    )
+
+
+def _texts(session) -> list[str]:
+    return [e.content.parts[0].text for e in session.events]
+
+
+def test_sessions_are_paged_out_and_reloaded(tmp_path):
+    service = SQLiteSessionService(str(tmp_path / "s.db"), max_sessions=1)
+    first = service.create_session(app_name="app", user_id="u", session_id="s1")
+    service.append_event(first, _event("hello", {"topic": "x", "app:mode": "m"}))
+    second = service.create_session(app_name="app", user_id="u", session_id="s2")
+    service.append_event(second, _event("other"))
+
+    reloaded = service.get_session(app_name="app", user_id="u", session_id="s1")
+    assert _texts(reloaded) == ["hello"]
+    assert reloaded.state == {"topic": "x", "app:mode": "m"}
+
+    stats = service.stats()
+    assert stats["resident_sessions"] == 1
+    assert stats["evictions"] >= 2
+    assert 0 < stats["hit_rate"] < 1
+
+
+def test_sessions_survive_restart(tmp_path):
+    path = str(tmp_path / "s.db")
+    service = SQLiteSessionService(path)
+    session = service.create_session(app_name="app", user_id="u", session_id="s1")
+    service.append_event(session, _event("one"))
+    service.append_event(session, _event("two", {"temp:skip": 1, "user:lang": "en"}))
+    service.close()
+
+    service = SQLiteSessionService(path)
+    session = service.get_session(app_name="app", user_id="u", session_id="s1")
+    assert _texts(session) == ["one", "two"]
+    assert session.state == {"user:lang": "en"}
+    assert [
+        s.id for s in service.list_sessions(app_name="app", user_id="u").sessions
+    ] == ["s1"]
+    service.delete_session(app_name="app", user_id="u", session_id="s1")
+    assert service.get_session(app_name="app", user_id="u", session_id="s1") is None
+
+
+def test_appended_events_are_committed_in_batches(tmp_path):
+    path = str(tmp_path / "s.db")
+    service = SQLiteSessionService(path, batch_size=1000, flush_interval=60)
+    session = service.create_session(app_name="app", user_id="u", session_id="s1")
+    for i in range(3):
+        service.append_event(session, _event(str(i)))
+
+    reader = SQLiteSessionService(path)
+    assert (
+        _texts(reader.get_session(app_name="app", user_id="u", session_id="s1")) == []
+    )
+    service.flush()
+    reader = SQLiteSessionService(path)
+    stored = reader.get_session(app_name="app", user_id="u", session_id="s1")
+    assert _texts(stored) == ["0", "1", "2"]
+    service.close()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import httpx
+
+from rabbithole.a2a.client import A2AClient
+from rabbithole.a2a.types import Message, TaskSendParams, TextPart
+
+
+def _params(task_id: str, text: str = "hi") -> TaskSendParams:
+    return TaskSendParams(
+        id=task_id, message=Message(role="user", parts=[TextPart(text=text)])
+    )
+
+
+def _completed(body) -> httpx.Response:
+    task = {
+        "id": body["params"]["id"],
+        "sessionId": "s1",
+        "status": {"state": "completed"},
+    }
+    return httpx.Response(
+        200, json={"jsonrpc": "2.0", "id": body["id"], "result": task}
+    )
+
+
+class FakeAgent:
+    def __init__(self, throttle_first: int = 0):
+        self.active = 0
+        self.max_active = 0
+        self.throttle_first = throttle_first
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests += 1
+        if self.requests <= self.throttle_first:
+            return httpx.Response(429)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            text = body["params"]["message"]["parts"][0]["text"]
+            await asyncio.sleep(float(text))
+        finally:
+            self.active -= 1
+        return _completed(body)
+
+
+async def _send_all(agent, payloads, **kwargs):
+    """Returns the results and stats, and the concurrency limit after each result."""
+    limits = []
+    transport = httpx.MockTransport(agent)
+    async with A2AClient(
+        url="http://agent/", client=httpx.AsyncClient(transport=transport)
+    ) as client:
+        bulk = client.send_tasks_bulk(payloads, **kwargs)
+        results = []
+        async for result in bulk:
+            results.append(result)
+            limits.append(bulk.stats()["concurrency_limit"])
+        return results, bulk.stats(), limits
+
+
+def test_results_arrive_in_completion_order_within_limit():
+    agent = FakeAgent()
+    delays = [0.05, 0.01, 0.03, 0.0, 0.02, 0.04]
+    payloads = (_params(f"t{i}", str(delay)) for i, delay in enumerate(delays))
+
+    results, stats, _ = asyncio.run(_send_all(agent, payloads, concurrency=3))
+
+    assert agent.max_active == 3
+    assert sorted(r.params.id for r in results) == [f"t{i}" for i in range(6)]
+    assert results[0].params.id == "t1"
+    assert all(r.error is None and r.response.result for r in results)
+    assert stats["succeeded"] == 6 and stats["failed"] == 0
+    assert stats["throughput"] > 0 and stats["latency_p99"] > 0
+
+
+def test_throttling_lowers_concurrency_and_retries():
+    agent = FakeAgent(throttle_first=4)
+
+    async def payloads():
+        for i in range(8):
+            yield _params(f"t{i}", "0")
+
+    results, stats, limits = asyncio.run(
+        _send_all(agent, payloads(), concurrency=4, max_retries=3)
+    )
+
+    assert len(results) == 8 and all(r.error is None for r in results)
+    assert stats["throttled"] == 4 and stats["retried"] == 4
+    # Halved on the burst of 429s, then grown back by the successes.
+    assert limits[0] == 2 and stats["concurrency_limit"] == 4
+
+
+def test_failures_are_reported_per_task():
+    async def unavailable(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500)
+
+    results, stats, _ = asyncio.run(
+        _send_all(unavailable, [_params("t1"), _params("t2")], concurrency=2)
+    )
+    assert [r.error.status_code for r in results] == [500, 500]
+    assert stats["failed"] == 2 and stats["retried"] == 0
@@ -0,0 +1,56 @@
+from rabbithole.agent.context_window import (
+    ContextWindowManager,
+    ConversationWindow,
+    estimate_tokens,
+    truncating_summarizer,
+)
+
+
+def test_window_keeps_recent_turns_within_budget():
+    window = ConversationWindow(max_tokens=30)
+    for i in range(10):
+        window.add("user", f"question {i} " * 3)
+        window.add("assistant", f"answer {i} " * 3)
+
+    assert window.tokens <= 30
+    assert window.tokens == sum(t.tokens for t in window.turns)
+    assert window.end == 20
+    assert window.turns[-1].text.startswith("answer 9")
+    assert window.start == 20 - len(window.turns)
+
+
+def test_newest_turn_is_kept_even_over_budget():
+    window = ConversationWindow(max_tokens=5)
+    window.add("user", "short")
+    window.add("user", "x" * 400)
+    assert len(window.turns) == 1
+    assert window.tokens == estimate_tokens("x" * 400)
+
+
+def test_dropped_turns_roll_into_cached_summary():
+    calls = []
+
+    def summarizer(summary, turns):
+        calls.append(len(turns))
+        return truncating_summarizer()(summary, turns)
+
+    window = ConversationWindow(max_tokens=20, summarizer=summarizer)
+    for i in range(6):
+        window.add("user", f"turn number {i} " * 2)
+
+    items = window.input_items()
+    assert items[0]["role"] == "system"
+    assert "user: turn number 0" in items[0]["content"]
+    assert [i["content"] for i in items[1:]] == [t.text for t in window.turns]
+    # Each dropped turn is summarized once.
+    assert sum(calls) == window.start
+
+
+def test_manager_bounds_sessions():
+    manager = ContextWindowManager(max_tokens=100, max_sessions=2)
+    manager.window("a").add("user", "hello")
+    manager.window("b")
+    manager.window("a")
+    manager.window("c")
+    assert manager.window("a").end == 1
+    assert manager.window("b").end == 0
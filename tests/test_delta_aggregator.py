@@ -0,0 +1,90 @@
+import asyncio
+
+from rabbithole.a2a.server.delta_aggregator import DeltaAggregator
+from rabbithole.a2a.server.sqlite_task_store import SQLiteTaskStore
+from rabbithole.a2a.server.task_store import InMemoryTaskStore
+from rabbithole.a2a.types import Task, TaskState, TaskStatus
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_chunks_on_size_and_time_windows():
+    clock = FakeClock()
+    aggregator = DeltaAggregator(max_chars=5, max_delay=1.0, clock=clock)
+
+    assert aggregator.add("ab") is None
+    first = aggregator.add("cde")
+    assert first.parts[0].text == "abcde"
+    assert first.append is False and first.lastChunk is False
+
+    assert aggregator.add("f") is None
+    clock.now = 2.0
+    second = aggregator.add("g")
+    assert second.parts[0].text == "fg"
+    assert second.append is True
+
+    aggregator.add("h")
+    last = aggregator.finish()
+    assert last.parts[0].text == "h"
+    assert last.lastChunk is True
+    assert aggregator.text == "abcdefgh"
+    assert aggregator.finish() is None
+
+
+def test_time_until_flush_counts_from_first_pending_delta():
+    clock = FakeClock()
+    aggregator = DeltaAggregator(max_chars=100, max_delay=1.0, clock=clock)
+
+    assert aggregator.time_until_flush() is None
+    aggregator.add("a")
+    clock.now = 0.25
+    aggregator.add("b")
+    assert aggregator.time_until_flush() == 0.75
+    clock.now = 2.0
+    assert aggregator.time_until_flush() == 0.0
+    aggregator.flush()
+    assert aggregator.time_until_flush() is None
+
+
+def _stream_into(store):
+    async def scenario():
+        await store.create(Task(id="t1", status=TaskStatus(state=TaskState.WORKING)))
+        aggregator = DeltaAggregator(max_chars=2)
+        for token in ["he", "ll", "o ", "wo", "rl", "d"]:
+            chunk = aggregator.add(token)
+            if chunk:
+                await store.update("t1", artifacts=[chunk])
+        await store.update("t1", artifacts=[aggregator.finish()])
+        task = await store.get("t1")
+        await store.close()
+        return task
+
+    return asyncio.run(scenario())
+
+
+def test_chunks_are_stored_as_one_growing_artifact(tmp_path):
+    for store in (InMemoryTaskStore(), SQLiteTaskStore(str(tmp_path / "t.db"))):
+        task = _stream_into(store)
+        assert len(task.artifacts) == 1
+        assert task.artifacts[0].parts[0].text == "hello world"
+        assert task.artifacts[0].lastChunk is True
+
+
+def test_sqlite_merges_chunks_on_reload(tmp_path):
+    db_path = str(tmp_path / "t.db")
+    _stream_into(SQLiteTaskStore(db_path))
+
+    async def reload():
+        store = SQLiteTaskStore(db_path)
+        task = await store.get("t1")
+        await store.close()
+        return task
+
+    task = asyncio.run(reload())
+    assert [a.parts[0].text for a in task.artifacts] == ["hello world"]
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from rabbithole.a2a.utils.jwks_cache import JWKSCache
+from rabbithole.a2a.utils.push_notification_auth import PushNotificationSenderAuth
+
+
+def _sender() -> PushNotificationSenderAuth:
+    sender = PushNotificationSenderAuth(algorithm="EdDSA")
+    sender.generate_jwk()
+    return sender
+
+
+def _cache(sender: PushNotificationSenderAuth, requests: list, **kwargs) -> JWKSCache:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"keys": sender.public_keys})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return JWKSCache("http://agent/jwks.json", client=client, **kwargs)
+
+
+def test_keys_are_fetched_once_for_concurrent_lookups():
+    sender = _sender()
+    requests = []
+
+    async def run():
+        cache = _cache(sender, requests)
+        token = sender._generate_jwt(b"{}")
+        keys = await asyncio.gather(
+            *(cache.get_signing_key_from_jwt(token) for _ in range(10))
+        )
+        await cache.close()
+        return keys
+
+    keys = asyncio.run(run())
+    assert {key.key_id for key in keys} == {sender.private_key_jwk.key_id}
+    assert len(requests) == 1
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval():
+    sender = _sender()
+    requests = []
+
+    async def run():
+        cache = _cache(sender, requests, min_refetch_interval=60)
+        await cache.get_signing_key(sender.private_key_jwk.key_id)
+        sender.rotate_jwk()
+        # A rotated key is picked up once the refetch interval allows it.
+        with pytest.raises(ValueError):
+            await cache.get_signing_key(sender.private_key_jwk.key_id)
+        cache.min_refetch_interval = 0
+        key = await cache.get_signing_key(sender.private_key_jwk.key_id)
+        cache.min_refetch_interval = 60
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                await cache.get_signing_key("unknown")
+        await cache.close()
+        return key
+
+    key = asyncio.run(run())
+    assert key.key_id == sender.private_key_jwk.key_id
+    assert len(requests) == 2
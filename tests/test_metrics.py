@@ -0,0 +1,15 @@
+from rabbithole.a2a.utils.metrics import Histogram
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = Histogram("latency", buckets=(0.1, 0.5, 1.0))
+    for value in [0.05] * 50 + [0.3] * 40 + [0.8] * 9 + [3.0]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50"] == 0.1
+    assert snapshot["p90"] == 0.5
+    assert snapshot["p99"] == 1.0
+    assert histogram.percentile(100) == 3.0
+    assert snapshot["buckets"] == {0.1: 50, 0.5: 90, 1.0: 99}
@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import httpx
+import jwt
+import pytest
+from jwt import PyJWK
+from starlette.requests import Request
+
+from rabbithole.a2a.utils.push_notification_auth import (
+    SIGNING_ALGORITHMS,
+    PushNotificationReceiverAuth,
+    PushNotificationSenderAuth,
+)
+
+
+class CountingSenderAuth(PushNotificationSenderAuth):
+    def __init__(self, results: dict[str, bool], **kwargs):
+        super().__init__(**kwargs)
+        self.results = results
+        self.challenges = 0
+
+    async def challenge_push_notification_url(self, url: str) -> bool:
+        self.challenges += 1
+        await asyncio.sleep(0.01)
+        return self.results[url]
+
+
+def test_concurrent_verifications_share_one_challenge():
+    sender = CountingSenderAuth({"http://hook/ok": True})
+
+    async def run():
+        results = await asyncio.gather(
+            *(sender.verify_push_notification_url("http://hook/ok") for _ in range(10))
+        )
+        results.append(await sender.verify_push_notification_url("http://hook/ok"))
+        return results
+
+    assert all(asyncio.run(run()))
+    assert sender.challenges == 1
+
+
+def test_verification_cache_is_per_sender_and_bounded():
+    urls = {f"http://hook/{i}": False for i in range(5)}
+    sender = CountingSenderAuth(urls, max_verified_urls=3)
+    other = CountingSenderAuth(urls)
+
+    async def run():
+        for url in urls:
+            await sender.verify_push_notification_url(url)
+        await other.verify_push_notification_url("http://hook/4")
+
+    asyncio.run(run())
+    assert list(sender.verified_urls) == [f"http://hook/{i}" for i in (2, 3, 4)]
+    assert other.challenges == 1
+
+
+def test_failed_verification_is_cached_until_its_ttl():
+    sender = CountingSenderAuth({"http://hook/bad": False}, failed_url_ttl=0.05)
+
+    async def run():
+        first = await sender.verify_push_notification_url("http://hook/bad")
+        cached = await sender.verify_push_notification_url("http://hook/bad")
+        challenges_before_expiry = sender.challenges
+        await asyncio.sleep(0.06)
+        await sender.verify_push_notification_url("http://hook/bad")
+        return first, cached, challenges_before_expiry
+
+    first, cached, challenges_before_expiry = asyncio.run(run())
+    assert not first and not cached
+    assert challenges_before_expiry == 1
+    assert sender.challenges == 2
+
+
+def test_signing_keys_persist_and_rotate_with_overlap(tmp_path):
+    key_path = str(tmp_path / "keys.json")
+    sender = PushNotificationSenderAuth(algorithm="EdDSA", key_path=key_path)
+    sender.generate_jwk()
+    kid = sender.private_key_jwk.key_id
+
+    restarted = PushNotificationSenderAuth(algorithm="EdDSA", key_path=key_path)
+    restarted.generate_jwk()
+    assert restarted.private_key_jwk.key_id == kid
+
+    restarted.rotate_jwk()
+    assert restarted.private_key_jwk.key_id != kid
+    assert [key["kid"] for key in restarted.public_keys][0] == kid
+    assert len(restarted.public_keys) == 2
+
+    token = restarted._generate_jwt({"id": "t1"})
+    public_key = PyJWK.from_dict(restarted.public_keys[-1])
+    decoded = jwt.decode(token, public_key, algorithms=list(SIGNING_ALGORITHMS))
+    assert decoded["request_body_sha256"]
+
+
+def test_changed_algorithm_rotates_persisted_key(tmp_path):
+    key_path = str(tmp_path / "keys.json")
+    PushNotificationSenderAuth(algorithm="ES256", key_path=key_path).generate_jwk()
+
+    sender = PushNotificationSenderAuth(
+        algorithm="EdDSA", key_path=key_path, key_overlap=0
+    )
+    sender.generate_jwk()
+    sender._generate_jwt({"id": "t1"})
+    assert [key["alg"] for key in sender.public_keys] == ["EdDSA"]
+
+
+def test_due_rotation_runs_off_the_signing_path(tmp_path):
+    async def run():
+        sender = PushNotificationSenderAuth(
+            algorithm="EdDSA", key_path=str(tmp_path / "keys.json")
+        )
+        sender.generate_jwk()
+        kid = sender.private_key_jwk.key_id
+        sender.key_rotation_interval = 0
+        sender._next_key_change = 0
+
+        def handler(request):
+            return httpx.Response(200)
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            response = await sender.post_push_notification(
+                client, "http://hook/a", {"id": "t1"}
+            )
+            token = response.request.headers["Authorization"].split()[1]
+            await sender._key_update
+        return kid, jwt.get_unverified_header(token)["kid"], sender
+
+    kid, signed_with, sender = asyncio.run(run())
+    assert signed_with == kid
+    assert sender.private_key_jwk.key_id != kid
+    assert sender._key_update is None
+
+
+class StaticJWKSClient:
+    def __init__(self, public_jwk: dict):
+        self.signing_key = PyJWK.from_dict(public_jwk)
+
+    async def get_signing_key_from_jwt(self, token: str) -> PyJWK:
+        return self.signing_key
+
+
+def _request(body: bytes, token: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/notify",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    }
+    return Request(scope, receive)
+
+
+def test_receiver_verifies_raw_body_and_canonical_fallback():
+    sender = PushNotificationSenderAuth(algorithm="ES256")
+    sender.generate_jwk()
+    receiver = PushNotificationReceiverAuth()
+    receiver.jwks_client = StaticJWKSClient(sender.public_keys[-1])
+    data = {"id": "t1", "text": "grüße"}
+
+    body = sender.encode_request_body(data)
+    token = sender._generate_jwt(body)
+    # Same payload, formatted differently than the signed canonical dump.
+    reformatted = json.dumps(data, indent=2).encode()
+
+    async def run():
+        assert await receiver.verify_push_notification(_request(body, token))
+        with pytest.raises(ValueError, match="already used"):
+            await receiver.verify_push_notification(_request(reformatted, token))
+        other_token = sender._generate_jwt(body)
+        assert await receiver.verify_push_notification(
+            _request(reformatted, other_token)
+        )
+        tampered = json.dumps({**data, "id": "t2"}).encode()
+        with pytest.raises(ValueError, match="Invalid request body"):
+            await receiver.verify_push_notification(
+                _request(tampered, sender._generate_jwt(body))
+            )
+
+    asyncio.run(run())
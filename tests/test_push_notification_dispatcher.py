@@ -0,0 +1,235 @@
+import asyncio
+import json
+
+import httpx
+
+from rabbithole.a2a.types import (
+    Artifact,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from rabbithole.a2a.utils.push_notification_auth import PushNotificationAuth
+from rabbithole.a2a.utils.push_notification_dispatcher import (
+    CircuitBreaker,
+    PushNotificationDispatcher,
+)
+
+
+class FakeSenderAuth(PushNotificationAuth):
+    """Answers each post with the next status code of a script."""
+
+    def __init__(self, status_codes: list[int]):
+        self.status_codes = status_codes
+        self.calls = 0
+
+    async def post_push_notification(self, client, url, data):
+        status_code = self.status_codes[min(self.calls, len(self.status_codes) - 1)]
+        self.calls += 1
+        request = httpx.Request("POST", url)
+        response = httpx.Response(status_code, request=request)
+        response.raise_for_status()
+        return response
+
+
+def test_retries_until_success():
+    async def run():
+        sender = FakeSenderAuth([503, 429, 200])
+        dispatcher = PushNotificationDispatcher(sender, backoff_base=0.001)
+        assert dispatcher.submit("http://hook/a", {"id": "t1"})
+        await dispatcher.close()
+        return sender, dispatcher.stats()
+
+    sender, stats = asyncio.run(run())
+    assert sender.calls == 3
+    assert stats["sent"] == 1
+    assert stats["retried"] == 2
+    assert stats["failed"] == 0
+
+
+def test_client_errors_are_not_retried():
+    async def run():
+        sender = FakeSenderAuth([400])
+        dispatcher = PushNotificationDispatcher(sender, backoff_base=0.001)
+        dispatcher.submit("http://hook/a", {"id": "t1"})
+        await dispatcher.close()
+        return sender, dispatcher.stats()
+
+    sender, stats = asyncio.run(run())
+    assert sender.calls == 1
+    assert stats["failed"] == 1
+
+
+def test_open_circuit_rejects_notifications():
+    async def run():
+        sender = FakeSenderAuth([500])
+        dispatcher = PushNotificationDispatcher(
+            sender, max_retries=0, failure_threshold=2, reset_timeout=60
+        )
+        for _ in range(2):
+            dispatcher.submit("http://hook/a", {"id": "t1"})
+            await dispatcher.drain()
+        accepted = dispatcher.submit("http://hook/a", {"id": "t1"})
+        other_url = dispatcher.submit("http://hook/b", {"id": "t1"})
+        await dispatcher.close()
+        return accepted, other_url, dispatcher.stats()
+
+    accepted, other_url, stats = asyncio.run(run())
+    assert not accepted
+    assert other_url
+    assert stats["rejected"] == 1
+    assert stats["open_circuits"] == 1
+
+
+def test_circuit_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+class HangingSenderAuth(PushNotificationAuth):
+    async def post_push_notification(self, client, url, data):
+        await asyncio.Event().wait()
+
+
+def test_cancelled_trial_releases_half_open_circuit():
+    async def run():
+        dispatcher = PushNotificationDispatcher(HangingSenderAuth())
+        breaker = dispatcher._breaker("http://hook/a")
+        breaker.reset_timeout = 0
+        breaker.failures = breaker.failure_threshold
+        breaker.record_failure()
+        assert dispatcher.submit("http://hook/a", {"id": "t1"})
+        await asyncio.sleep(0.01)
+        assert not breaker.ready()
+        for delivery in list(dispatcher._deliveries):
+            delivery.cancel()
+        await dispatcher.close()
+        return breaker
+
+    breaker = asyncio.run(run())
+    assert breaker.is_open
+    assert breaker.allow()
+
+
+def test_idle_state_is_pruned():
+    async def run():
+        sender = FakeSenderAuth([500, 200])
+        dispatcher = PushNotificationDispatcher(
+            sender, max_retries=0, delta_payloads=True, idle_timeout=0.02
+        )
+        dispatcher.submit("http://hook/a", {"id": "t1"})
+        dispatcher.submit_task("http://other/b", _task(TaskState.WORKING, 1, "x"))
+        await dispatcher.drain()
+        tracked = (len(dispatcher._breakers), len(dispatcher._delivered))
+        await asyncio.sleep(0.03)
+        dispatcher.submit("http://hook/c", {"id": "t2"})
+        await dispatcher.close()
+        return dispatcher, tracked
+
+    dispatcher, tracked = asyncio.run(run())
+    assert tracked == (2, 1)
+    assert list(dispatcher._breakers) == ["http://hook/c"]
+    assert not dispatcher._delivered
+    assert not dispatcher._host_slots
+
+
+class RecordingSenderAuth(PushNotificationAuth):
+    def __init__(self):
+        self.payloads = []
+
+    async def post_push_notification(self, client, url, data):
+        self.payloads.append(json.loads(data))
+        return httpx.Response(200, request=httpx.Request("POST", url))
+
+
+def _task(state: TaskState, history: int, text: str) -> Task:
+    return Task(
+        id="t1",
+        status=TaskStatus(state=state),
+        history=[
+            Message(role="agent", parts=[TextPart(text=str(i))]) for i in range(history)
+        ],
+        artifacts=[Artifact(parts=[TextPart(text=text)], index=0)] if text else None,
+    )
+
+
+def test_intermediate_updates_coalesce_to_latest_state():
+    async def run():
+        sender = RecordingSenderAuth()
+        dispatcher = PushNotificationDispatcher(sender, coalesce_window=0.01)
+        for i in range(1, 50):
+            dispatcher.submit_task(
+                "http://hook/a", _task(TaskState.WORKING, 1, "x" * i)
+            )
+        await dispatcher.drain()
+        dispatcher.submit_task("http://hook/a", _task(TaskState.WORKING, 1, "y"))
+        dispatcher.submit_task("http://hook/a", _task(TaskState.COMPLETED, 2, "y"))
+        await dispatcher.close()
+        return sender, dispatcher.stats()
+
+    sender, stats = asyncio.run(run())
+    assert len(sender.payloads) == 2
+    assert sender.payloads[0]["artifacts"][0]["parts"][0]["text"] == "x" * 49
+    assert sender.payloads[1]["status"]["state"] == TaskState.COMPLETED
+    assert stats["coalesced"] == 49
+
+
+def test_delta_payloads_carry_only_new_content():
+    async def run():
+        sender = RecordingSenderAuth()
+        dispatcher = PushNotificationDispatcher(sender, delta_payloads=True)
+        dispatcher.submit_task("http://hook/a", _task(TaskState.WORKING, 1, "ab"))
+        await dispatcher.drain()
+        dispatcher.submit_task("http://hook/a", _task(TaskState.WORKING, 1, "ab"))
+        await dispatcher.drain()
+        dispatcher.submit_task("http://hook/a", _task(TaskState.COMPLETED, 2, "abc"))
+        await dispatcher.close()
+        return sender
+
+    full, unchanged, final = asyncio.run(run()).payloads
+    assert len(full["history"]) == 1
+    assert "delta" not in (full.get("metadata") or {})
+    assert unchanged["history"] == [] and unchanged["artifacts"] == []
+    assert final["metadata"]["delta"] == {"historyOffset": 1, "artifactOffset": 0}
+    assert final["history"][0]["parts"][0]["text"] == "1"
+    assert final["artifacts"][0]["parts"][0]["text"] == "abc"
+
+
+class FlakySenderAuth(RecordingSenderAuth):
+    """Fails the first post, then records like RecordingSenderAuth."""
+
+    def __init__(self):
+        super().__init__()
+        self.failed = False
+
+    async def post_push_notification(self, client, url, data):
+        if not self.failed:
+            self.failed = True
+            request = httpx.Request("POST", url)
+            httpx.Response(503, request=request).raise_for_status()
+        return await super().post_push_notification(client, url, data)
+
+
+def test_retried_update_does_not_overtake_newer_state():
+    async def run():
+        sender = FlakySenderAuth()
+        dispatcher = PushNotificationDispatcher(sender, backoff_base=0.01)
+        dispatcher.submit_task("http://hook/a", _task(TaskState.WORKING, 1, "x"))
+        await asyncio.sleep(0)
+        dispatcher.submit_task("http://hook/a", _task(TaskState.WORKING, 1, "xy"))
+        dispatcher.submit_task("http://hook/a", _task(TaskState.COMPLETED, 2, "xyz"))
+        await dispatcher.close()
+        return sender, dispatcher.stats()
+
+    sender, stats = asyncio.run(run())
+    # The failed first update and the waiting second one are superseded.
+    assert [p["status"]["state"] for p in sender.payloads] == [TaskState.COMPLETED]
+    assert stats["superseded"] == 2
@@ -0,0 +1,41 @@
+from rabbithole.a2a.utils.replay_cache import ReplayCache
+
+
+def test_replays_are_rejected_within_window():
+    cache = ReplayCache(window=60, bucket_seconds=5)
+    assert cache.check_and_add("a", iat=1000, now=1000)
+    assert not cache.check_and_add("a", iat=1000, now=1010)
+    assert cache.check_and_add("b", iat=1000, now=1010)
+    assert not cache.check_and_add("c", iat=900, now=1010)
+    assert not cache.check_and_add("d", iat=2000, now=1010)
+    assert cache.stats()["rejected_replays"] == 1
+    assert cache.stats()["rejected_stale"] == 2
+
+
+def test_buckets_expire_with_window():
+    cache = ReplayCache(window=60, bucket_seconds=5)
+    for i in range(100):
+        cache.check_and_add(f"t{i}", iat=1000 + i, now=1000 + i)
+    cache.check_and_add("last", iat=1200, now=1200)
+    assert cache.size == 1
+    assert cache.stats()["buckets"] == 1
+
+
+def test_overflow_evicts_oldest_bucket_and_raises_floor():
+    cache = ReplayCache(window=60, bucket_seconds=5, max_entries=10)
+    for i in range(12):
+        assert cache.check_and_add(f"t{i}", iat=1000 + i, now=1011)
+    assert cache.size <= 10
+    assert cache.min_iat == 1005
+    # A token below the floor could be a replay that is no longer tracked.
+    assert not cache.check_and_add("t0", iat=1000, now=1011)
+    assert not cache.check_and_add("new", iat=1001, now=1011)
+    assert cache.check_and_add("new", iat=1011, now=1011)
+
+
+def test_default_capacity_covers_expected_rate_over_window():
+    cache = ReplayCache(window=60, bucket_seconds=5, expected_rate=10)
+    assert cache.max_entries == 650
+    for i in range(600):
+        assert cache.check_and_add(f"t{i}", iat=1000 + i // 10, now=1000 + i // 10)
+    assert cache.min_iat == float("-inf")
@@ -0,0 +1,135 @@
+import asyncio
+
+import httpx
+
+from rabbithole.a2a.client import A2AClient
+from rabbithole.a2a.server import A2AServer, InMemoryTaskManager
+from rabbithole.a2a.types import (
+    CancelTaskRequest,
+    GetTaskRequest,
+    GetTaskResponse,
+    Message,
+    SendTaskStreamingRequest,
+    TaskIdParams,
+    TaskQueryParams,
+    TaskSendParams,
+    TextPart,
+)
+
+
+class DummyTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+def _params(task_id: str) -> TaskSendParams:
+    return TaskSendParams(
+        id=task_id, message=Message(role="user", parts=[TextPart(text="hi")])
+    )
+
+
+async def _server_client(tasks: int):
+    task_manager = DummyTaskManager()
+    for i in range(tasks):
+        await task_manager.upsert_task(_params(f"t{i}"))
+    server = A2AServer(task_manager=task_manager, max_batch_size=50)
+    transport = httpx.ASGITransport(app=server.app)
+    return A2AClient(url="http://agent/", client=httpx.AsyncClient(transport=transport))
+
+
+def test_batch_returns_responses_in_request_order():
+    async def scenario():
+        client = await _server_client(tasks=20)
+        requests = [
+            GetTaskRequest(params=TaskQueryParams(id=f"t{i}")) for i in range(20)
+        ]
+        requests.append(GetTaskRequest(params=TaskQueryParams(id="missing")))
+        requests.append(CancelTaskRequest(params=TaskIdParams(id="t0")))
+        return await client.batch(requests)
+
+    responses = asyncio.run(scenario())
+    assert [r.result.id for r in responses[:20]] == [f"t{i}" for i in range(20)]
+    assert all(isinstance(r, GetTaskResponse) for r in responses[:21])
+    assert responses[20].error.code == -32001
+    assert responses[21].result.status.state == "canceled"
+
+
+def test_batch_rejects_streaming_and_invalid_entries():
+    async def scenario():
+        client = await _server_client(tasks=1)
+        stream = SendTaskStreamingRequest(id="s", params=_params("t0"))
+        body = [
+            GetTaskRequest(id="g", params=TaskQueryParams(id="t0")).model_dump(),
+            stream.model_dump(),
+            {"jsonrpc": "2.0", "id": "bad", "method": "tasks/unknown"},
+        ]
+        response = await client.client.post("http://agent/", json=body)
+        empty = await client.client.post("http://agent/", json=[])
+        too_big = await client.client.post("http://agent/", json=body * 20)
+        return response.json(), empty, too_big
+
+    responses, empty, too_big = asyncio.run(scenario())
+    assert [r["id"] for r in responses] == ["g", "s", "bad"]
+    assert "result" in responses[0]
+    assert responses[1]["error"]["code"] == -32600
+    assert "not allowed in a batch" in responses[1]["error"]["message"]
+    assert responses[2]["error"]["code"] == -32600
+    assert empty.status_code == 400 and too_big.status_code == 400
+
+
+def test_batch_notifications_get_no_response_and_ids_are_echoed():
+    async def scenario():
+        client = await _server_client(tasks=2)
+        get = GetTaskRequest(params=TaskQueryParams(id="t0")).model_dump()
+        notification = CancelTaskRequest(params=TaskIdParams(id="t1")).model_dump()
+        del notification["id"]
+        body = [
+            get,
+            notification,
+            {**get, "id": None},
+            {"jsonrpc": "2.0", "method": "tasks/unknown"},
+        ]
+        response = await client.client.post("http://agent/", json=body)
+        only_notifications = await client.client.post(
+            "http://agent/", json=[notification]
+        )
+        (cancelled,) = await client.batch(
+            [GetTaskRequest(params=TaskQueryParams(id="t1"))]
+        )
+        return response.json(), only_notifications, cancelled
+
+    responses, only_notifications, cancelled = asyncio.run(scenario())
+    assert cancelled.result.status.state == "canceled"
+    assert len(responses) == 3
+    assert responses[0]["id"] and responses[0]["result"]["id"] == "t0"
+    assert responses[1]["id"] is None and responses[1]["result"]["id"] == "t0"
+    assert responses[2]["id"] is None and responses[2]["error"]["code"] == -32600
+    assert only_notifications.status_code == 204
+
+
+def test_client_batch_surfaces_errors_without_id():
+    async def scenario():
+        def handler(request):
+            return httpx.Response(
+                200,
+                json=[
+                    {
+                        "jsonrpc": "2.0",
+                        "id": None,
+                        "error": {"code": -32600, "message": "bad"},
+                    }
+                ],
+            )
+
+        client = A2AClient(
+            url="http://agent/",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        return await client.batch([GetTaskRequest(params=TaskQueryParams(id="t0"))])
+
+    (response,) = asyncio.run(scenario())
+    assert isinstance(response, GetTaskResponse)
+    assert response.error.code == -32600
@@ -0,0 +1,86 @@
+import asyncio
+
+from rabbithole.a2a.server.event_buffer import TaskEventBuffer
+from rabbithole.a2a.server.sse_subscriber import OverflowPolicy, SSESubscriber
+from rabbithole.a2a.types import (
+    Artifact,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+def _status(final: bool = False) -> TaskStatusUpdateEvent:
+    return TaskStatusUpdateEvent(
+        id="t1", status=TaskStatus(state=TaskState.WORKING), final=final
+    )
+
+
+def _artifact() -> TaskArtifactUpdateEvent:
+    return TaskArtifactUpdateEvent(
+        id="t1", artifact=Artifact(parts=[TextPart(text="x")])
+    )
+
+
+async def _drain(subscriber: SSESubscriber) -> list[int]:
+    event_ids = []
+    while True:
+        stream_event = await subscriber.get()
+        if stream_event is None or stream_event.is_final:
+            if stream_event is not None:
+                event_ids.append(stream_event.event_id)
+            return event_ids
+        event_ids.append(stream_event.event_id)
+
+
+def test_drop_oldest_keeps_newest_events():
+    buffer = TaskEventBuffer("t1", 16)
+    subscriber = SSESubscriber(
+        "t1", maxsize=2, overflow_policy=OverflowPolicy.DROP_OLDEST
+    )
+    for event in [_artifact(), _artifact(), _artifact(), _status(final=True)]:
+        subscriber.put_nowait(buffer.append(event))
+
+    assert asyncio.run(_drain(subscriber)) == [3, 4]
+    assert subscriber.stats()["dropped"] == 2
+
+
+def test_coalesce_replaces_pending_status_updates():
+    buffer = TaskEventBuffer("t1", 16)
+    subscriber = SSESubscriber("t1", maxsize=2, overflow_policy=OverflowPolicy.COALESCE)
+    for event in [_artifact(), _status(), _status(), _status(), _status(final=True)]:
+        subscriber.put_nowait(buffer.append(event))
+
+    # The final event cannot be coalesced, so the oldest event is dropped.
+    assert asyncio.run(_drain(subscriber)) == [4, 5]
+    assert subscriber.coalesced == 2
+    assert subscriber.dropped == 1
+
+
+def test_disconnect_ends_stream_for_slow_subscriber():
+    buffer = TaskEventBuffer("t1", 16)
+    subscriber = SSESubscriber(
+        "t1", maxsize=1, overflow_policy=OverflowPolicy.DISCONNECT
+    )
+    assert subscriber.put_nowait(buffer.append(_status()))
+    assert not subscriber.put_nowait(buffer.append(_status()))
+
+    assert asyncio.run(subscriber.get()) is None
+    assert subscriber.disconnected
+    assert not subscriber.put_nowait(buffer.append(_status()))
+
+
+def test_encoded_frame_matches_pydantic_serialization():
+    import json
+
+    stream_event = TaskEventBuffer("t1", 4).append(_artifact())
+    for request_id in ("req", 7, None):
+        frame = stream_event.encode(request_id)
+        event_line, data_line = frame.split(b"\r\n")[:2]
+        assert event_line == b"id: 1"
+        expected = stream_event.to_response(request_id).model_dump_json(
+            exclude_none=True
+        )
+        assert json.loads(data_line[len(b"data: ") :]) == json.loads(expected)
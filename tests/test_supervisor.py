@@ -0,0 +1,100 @@
+import asyncio
+
+from rabbithole.a2a.server.supervisor import TaskSupervisor
+
+
+def test_runs_wait_for_a_free_slot():
+    async def scenario():
+        supervisor = TaskSupervisor(max_concurrent_runs=2)
+        release = asyncio.Event()
+        running = []
+
+        async def agent_run(i):
+            running.append(i)
+            await release.wait()
+
+        for i in range(5):
+            supervisor.start(f"t{i}", agent_run(i))
+        await asyncio.sleep(0.01)
+        during = (list(running), supervisor.in_flight, supervisor.queued)
+
+        release.set()
+        await asyncio.gather(*supervisor.runs.values())
+        return during, running, supervisor.stats()
+
+    (started, in_flight, queued), running, stats = asyncio.run(scenario())
+    assert started == [0, 1] and in_flight == 2 and queued == 3
+    assert running == [0, 1, 2, 3, 4]
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+    assert stats["completed"] == 5
+    assert stats["run_duration"]["count"] == 5
+
+
+def test_cancelling_a_queued_run_frees_it():
+    async def scenario():
+        supervisor = TaskSupervisor(max_concurrent_runs=1)
+        blocker = asyncio.Event()
+        ran = []
+
+        async def agent_run(name):
+            ran.append(name)
+            await blocker.wait()
+
+        supervisor.start("a", agent_run("a"))
+        supervisor.start("b", agent_run("b"))
+        await asyncio.sleep(0)
+        assert await supervisor.cancel("b")
+        blocker.set()
+        await asyncio.gather(*supervisor.runs.values())
+        return ran, supervisor.stats()
+
+    ran, stats = asyncio.run(scenario())
+    assert ran == ["a"]
+    assert stats["cancelled"] == 1 and stats["completed"] == 1
+    assert stats["queued"] == 0
+
+
+def test_slot_counts_failures():
+    async def scenario():
+        supervisor = TaskSupervisor()
+        try:
+            async with supervisor.slot():
+                raise RuntimeError("model error")
+        except RuntimeError:
+            pass
+        return supervisor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["failed"] == 1 and stats["in_flight"] == 0
+
+
+def test_restarting_a_task_replaces_its_run():
+    async def scenario():
+        supervisor = TaskSupervisor()
+        first_cancelled = asyncio.Event()
+        second_done = asyncio.Event()
+
+        async def first_run():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                first_cancelled.set()
+                raise
+
+        async def second_run():
+            # Starts only once the replaced run has stopped.
+            assert first_cancelled.is_set()
+            await asyncio.sleep(0.01)
+            second_done.set()
+
+        first = supervisor.start("t1", first_run())
+        await asyncio.sleep(0)
+        second = supervisor.start("t1", second_run())
+        await asyncio.gather(first, return_exceptions=True)
+        # The replaced run's cleanup keeps the new run registered.
+        still_registered = supervisor.runs.get("t1") is second
+        await second
+        return still_registered, second_done.is_set(), supervisor.runs
+
+    still_registered, second_done, runs = asyncio.run(scenario())
+    assert still_registered and second_done and not runs
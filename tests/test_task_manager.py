@@ -0,0 +1,490 @@
+import asyncio
+
+from rabbithole.a2a.server.retention import RetentionPolicy
+from rabbithole.a2a.server.sqlite_task_store import SQLiteTaskStore
+from rabbithole.a2a.server.task_manager import InMemoryTaskManager
+from rabbithole.a2a.types import (
+    Artifact,
+    CancelTaskRequest,
+    GetTaskRequest,
+    JSONRPCResponse,
+    Message,
+    SendTaskRequest,
+    SendTaskResponse,
+    TaskQueryParams,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskResubscriptionRequest,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+class DummyTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request):
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(self, request):
+        raise NotImplementedError
+
+
+def _send_params(task_id: str, text: str = "hello") -> TaskSendParams:
+    return TaskSendParams(
+        id=task_id, message=Message(role="user", parts=[TextPart(text=text)])
+    )
+
+
+def test_task_lock_is_stable_per_task():
+    manager = DummyTaskManager(lock_shards=8)
+    assert manager.task_lock("a") is manager.task_lock("a")
+    assert len({id(manager.task_lock(f"t{i}")) for i in range(100)}) > 1
+
+
+def test_get_task_does_not_wait_for_writer():
+    async def scenario():
+        manager = DummyTaskManager()
+        await manager.upsert_task(_send_params("t1"))
+
+        async with manager.task_lock("t1"):
+            response = await asyncio.wait_for(
+                manager.on_get_task(
+                    GetTaskRequest(params=TaskQueryParams(id="t1", historyLength=5))
+                ),
+                timeout=1,
+            )
+        assert response.result.id == "t1"
+        assert len(response.result.history) == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_updates_to_different_tasks():
+    async def scenario():
+        manager = DummyTaskManager()
+        for i in range(10):
+            await manager.upsert_task(_send_params(f"t{i}"))
+
+        status = TaskStatus(state=TaskState.WORKING)
+        await asyncio.gather(
+            *(manager.update_store(f"t{i}", status, []) for i in range(10))
+        )
+        assert all(
+            t.status.state == TaskState.WORKING
+            for t in manager.task_store.tasks.values()
+        )
+
+    asyncio.run(scenario())
+
+
+def test_retention_evicts_oldest_finished_tasks_first():
+    async def scenario():
+        manager = DummyTaskManager(retention_policy=RetentionPolicy(max_tasks=2))
+        for i in range(3):
+            await manager.upsert_task(_send_params(f"t{i}"))
+        # Active tasks are never evicted, even above the limit.
+        assert len(manager.task_store.tasks) == 3
+
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), [])
+        await manager.update_store("t0", TaskStatus(state=TaskState.FAILED), [])
+
+        assert set(manager.task_store.tasks) == {"t0", "t2"}
+        stats = manager.get_retention_stats()
+        assert stats["evictions_max_tasks"] == 1
+        assert stats["resident_tasks"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_retention_ttl_and_history_bytes():
+    async def scenario():
+        manager = DummyTaskManager(retention_policy=RetentionPolicy(ttl_seconds=0))
+        await manager.upsert_task(_send_params("t1"))
+        assert manager.get_retention_stats()["resident_history_bytes"] > 0
+
+        await manager.update_store("t1", TaskStatus(state=TaskState.CANCELED), [])
+        assert "t1" not in manager.task_store.tasks
+        stats = manager.get_retention_stats()
+        assert stats["evictions_ttl"] == 1
+        assert stats["resident_history_bytes"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_retention_sweep_evicts_expired_tasks_without_traffic():
+    async def scenario():
+        manager = DummyTaskManager(
+            retention_policy=RetentionPolicy(ttl_seconds=0.05, sweep_interval=0.01)
+        )
+        await manager.upsert_task(_send_params("t1"))
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), [])
+        assert "t1" in manager.task_store.tasks
+        await asyncio.sleep(0.1)
+        evicted = "t1" not in manager.task_store.tasks
+        await manager.close()
+        return evicted
+
+    assert asyncio.run(scenario())
+
+
+def test_retention_keeps_evicted_tasks_in_persistent_store(tmp_path):
+    async def scenario():
+        manager = DummyTaskManager(
+            retention_policy=RetentionPolicy(max_tasks=1),
+            task_store=SQLiteTaskStore(str(tmp_path / "tasks.db")),
+        )
+        for task_id in ("t1", "t2"):
+            await manager.upsert_task(_send_params(task_id))
+            await manager.update_store(
+                task_id, TaskStatus(state=TaskState.COMPLETED), []
+            )
+        resident = "t1" in manager.task_store._cache
+        response = await manager.on_get_task(
+            GetTaskRequest(params=TaskQueryParams(id="t1"))
+        )
+        await manager.close()
+        return resident, response
+
+    resident, response = asyncio.run(scenario())
+    assert not resident
+    assert response.result.status.state == TaskState.COMPLETED
+
+
+async def _publish_stream(manager, task_id, events):
+    for event in events:
+        await manager.enqueue_events_for_sse(task_id, event)
+
+
+def _stream_events(task_id):
+    return [
+        TaskStatusUpdateEvent(id=task_id, status=TaskStatus(state=TaskState.WORKING)),
+        TaskArtifactUpdateEvent(
+            id=task_id, artifact=Artifact(parts=[TextPart(text="a")])
+        ),
+        TaskStatusUpdateEvent(
+            id=task_id, status=TaskStatus(state=TaskState.COMPLETED), final=True
+        ),
+    ]
+
+
+def test_resubscribe_replays_only_missed_events():
+    async def scenario():
+        manager = DummyTaskManager()
+        await manager.upsert_task(_send_params("t1"))
+        queue = await manager.setup_sse_consumer("t1")
+        stream = manager.dequeue_events_for_sse("req-1", "t1", queue)
+
+        events = _stream_events("t1")
+        await manager.enqueue_events_for_sse("t1", events[0])
+        first = await stream.__anext__()
+        await stream.aclose()  # client connection dropped
+
+        await _publish_stream(manager, "t1", events[1:])
+
+        resumed = await manager.on_resubscribe_to_task(
+            TaskResubscriptionRequest(
+                id="req-2",
+                params=TaskIdParams(id="t1", metadata={"lastEventId": "1"}),
+            )
+        )
+        return first, [event async for event in resumed]
+
+    first, replayed = asyncio.run(scenario())
+    assert first.startswith(b"id: 1\r\n")
+    assert [frame.split(b"\r\n")[0] for frame in replayed] == [b"id: 2", b"id: 3"]
+    assert b'"id":"req-2"' in replayed[0]
+
+
+def test_stream_error_frame_gets_next_event_id():
+    async def scenario():
+        manager = DummyTaskManager()
+        await manager.upsert_task(_send_params("t1"))
+        queue = await manager.setup_sse_consumer("t1")
+        stream = manager.dequeue_events_for_sse("req-1", "t1", queue)
+
+        await manager.enqueue_events_for_sse("t1", _stream_events("t1")[0])
+        first = await stream.__anext__()
+
+        async def broken_get():
+            raise RuntimeError("queue broken")
+
+        queue.get = broken_get
+        error = await stream.__anext__()
+        await stream.aclose()
+        return first, error
+
+    first, error = asyncio.run(scenario())
+    assert first.startswith(b"id: 1\r\n")
+    assert error.id == 2
+    assert "queue broken" in error.data
+
+
+def test_event_buffer_is_dropped_after_final_event():
+    async def scenario():
+        manager = DummyTaskManager(event_buffer_ttl=0.01)
+        await manager.upsert_task(_send_params("t1"))
+        await _publish_stream(manager, "t1", _stream_events("t1")[:2])
+        await asyncio.sleep(0.02)
+        kept_while_running = "t1" in manager.task_event_buffers
+        await _publish_stream(manager, "t1", _stream_events("t1")[2:])
+        await asyncio.sleep(0.02)
+        return kept_while_running, "t1" in manager.task_event_buffers
+
+    kept_while_running, kept_after_final = asyncio.run(scenario())
+    assert kept_while_running
+    assert not kept_after_final
+
+
+def test_resubscribe_unknown_stream_returns_error():
+    async def scenario():
+        manager = DummyTaskManager()
+        await manager.upsert_task(_send_params("t1"))
+        return await manager.on_resubscribe_to_task(
+            TaskResubscriptionRequest(params=TaskIdParams(id="t1"))
+        )
+
+    response = asyncio.run(scenario())
+    assert isinstance(response, JSONRPCResponse)
+    assert response.error is not None
+
+
+async def _run_forever(started: asyncio.Event, cancelled: asyncio.Event):
+    started.set()
+    try:
+        await asyncio.sleep(3600)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
+def test_cancel_task_stops_run():
+    async def scenario():
+        manager = DummyTaskManager()
+        await manager.upsert_task(_send_params("t1"))
+        started, cancelled = asyncio.Event(), asyncio.Event()
+        manager.supervisor.start("t1", _run_forever(started, cancelled))
+        await started.wait()
+
+        response = await manager.on_cancel_task(
+            CancelTaskRequest(params=TaskIdParams(id="t1"))
+        )
+        again = await manager.on_cancel_task(
+            CancelTaskRequest(params=TaskIdParams(id="t1"))
+        )
+        return response, again, cancelled.is_set(), manager.supervisor.runs
+
+    response, again, cancelled, runs = asyncio.run(scenario())
+    assert response.result.status.state == TaskState.CANCELED
+    assert cancelled and not runs
+    assert again.error is not None
+
+
+def test_run_cancelled_after_last_subscriber_leaves():
+    async def scenario(resubscribe: bool):
+        manager = DummyTaskManager(orphan_grace_period=0.05)
+        await manager.upsert_task(_send_params("t1"))
+        started, cancelled = asyncio.Event(), asyncio.Event()
+        manager.supervisor.start("t1", _run_forever(started, cancelled))
+        queue = await manager.setup_sse_consumer("t1")
+        stream = manager.dequeue_events_for_sse("req-1", "t1", queue)
+        await manager.enqueue_events_for_sse("t1", _stream_events("t1")[0])
+        await stream.__anext__()
+        await stream.aclose()
+
+        if resubscribe:
+            await manager.setup_sse_consumer("t1", is_resubscribe=True)
+        await asyncio.sleep(0.2)
+        task = await manager.task_store.get("t1")
+        was_cancelled = cancelled.is_set()
+        await manager.close()
+        return was_cancelled, task.status.state
+
+    assert asyncio.run(scenario(False)) == (True, TaskState.CANCELED)
+    assert asyncio.run(scenario(True)) == (False, TaskState.SUBMITTED)
+
+
+class BlockingAgentTaskManager(DummyTaskManager):
+    """Answers tasks/send like the agent task managers, with an agent that hangs."""
+
+    def __init__(self):
+        super().__init__()
+        self.agent_started = asyncio.Event()
+        self.agent_delay = 3600
+
+    async def on_send_task(self, request):
+        await self.upsert_task(request.params)
+        await self.update_store(
+            request.params.id, TaskStatus(state=TaskState.WORKING), []
+        )
+        return await self.run_agent(request, self._invoke_agent(request))
+
+    async def _invoke_agent(self, request):
+        self.agent_started.set()
+        await asyncio.sleep(self.agent_delay)
+        task = await self.update_store(
+            request.params.id, TaskStatus(state=TaskState.COMPLETED), []
+        )
+        return SendTaskResponse(id=request.id, result=task)
+
+
+def test_cancel_task_stops_send_task_run():
+    async def scenario():
+        manager = BlockingAgentTaskManager()
+        sending = asyncio.create_task(
+            manager.on_send_task(SendTaskRequest(id="req-1", params=_send_params("t1")))
+        )
+        await manager.agent_started.wait()
+        cancel = await manager.on_cancel_task(
+            CancelTaskRequest(params=TaskIdParams(id="t1"))
+        )
+        sent = await sending
+        task = await manager.task_store.get("t1")
+        return cancel, sent, task
+
+    cancel, sent, task = asyncio.run(scenario())
+    assert cancel.result.status.state == TaskState.CANCELED
+    assert sent.id == "req-1" and sent.result.status.state == TaskState.CANCELED
+    assert task.status.state == TaskState.CANCELED
+    assert [m.role for m in task.history] == ["user"]
+
+
+def test_resent_send_task_replaces_run_without_cancelling_task():
+    async def scenario():
+        manager = BlockingAgentTaskManager()
+        first = asyncio.create_task(
+            manager.on_send_task(SendTaskRequest(id="req-1", params=_send_params("t1")))
+        )
+        await manager.agent_started.wait()
+        manager.agent_delay = 0
+        second = await asyncio.wait_for(
+            manager.on_send_task(
+                SendTaskRequest(id="req-2", params=_send_params("t1"))
+            ),
+            timeout=5,
+        )
+        first = await first
+        task = await manager.task_store.get("t1")
+        return first, second, task
+
+    first, second, task = asyncio.run(scenario())
+    assert first.id == "req-1" and first.result.status.state != TaskState.CANCELED
+    assert second.id == "req-2"
+    assert second.result.status.state == TaskState.COMPLETED
+    assert task.status.state == TaskState.COMPLETED
+
+
+async def _agent_stream(items):
+    for item in items:
+        yield item
+
+
+def _item(content, complete=False, input_required=False):
+    return {
+        "content": content,
+        "is_task_complete": complete,
+        "require_user_input": input_required,
+    }
+
+
+def test_streaming_run_sends_first_delta_at_once():
+    async def scenario():
+        manager = DummyTaskManager(artifact_chunk_chars=100, artifact_chunk_delay=60)
+        await manager.upsert_task(_send_params("t1"))
+        stream = _agent_stream(
+            [_item("Hel"), _item("lo"), _item(" world"), _item("", complete=True)]
+        )
+        await manager.run_streaming_agent("t1", stream)
+        events = [e.event for e in manager.task_event_buffers["t1"].since(None)]
+        task = await manager.task_store.get("t1")
+        return events, task, manager.get_run_stats()
+
+    events, task, stats = asyncio.run(scenario())
+    chunks = [e.artifact for e in events if isinstance(e, TaskArtifactUpdateEvent)]
+    assert [c.parts[0].text for c in chunks] == ["Hel", "lo world"]
+    assert task.status.state == TaskState.COMPLETED
+    assert task.artifacts[0].parts[0].text == "Hello world"
+    assert stats["time_to_first_token"]["count"] == 1
+
+
+async def _stalling_stream(stalled: asyncio.Event, resume: asyncio.Event):
+    yield _item("a")
+    yield _item("b")
+    stalled.set()
+    await resume.wait()
+    yield _item("c")
+    yield _item("", complete=True)
+
+
+def test_streaming_run_flushes_buffered_text_while_agent_stalls():
+    async def scenario():
+        manager = DummyTaskManager(artifact_chunk_chars=100, artifact_chunk_delay=0.01)
+        await manager.upsert_task(_send_params("t1"))
+        stalled, resume = asyncio.Event(), asyncio.Event()
+        run = asyncio.create_task(
+            manager.run_streaming_agent("t1", _stalling_stream(stalled, resume))
+        )
+        await stalled.wait()
+        await asyncio.sleep(0.05)
+        during_stall = manager.task_event_buffers["t1"].since(None)
+        resume.set()
+        await run
+        return during_stall, manager.task_event_buffers["t1"].since(None)
+
+    during_stall, events = asyncio.run(scenario())
+    stalled_chunks = [
+        e.event.artifact.parts[0].text
+        for e in during_stall
+        if isinstance(e.event, TaskArtifactUpdateEvent)
+    ]
+    assert stalled_chunks == ["a", "b"]
+    chunks = [
+        e.event.artifact for e in events if isinstance(e.event, TaskArtifactUpdateEvent)
+    ]
+    assert [c.parts[0].text for c in chunks] == ["a", "b", "c"]
+    assert [c.lastChunk for c in chunks] == [False, False, True]
+
+
+def test_streaming_run_without_deltas_sends_answer_as_last_chunk():
+    async def scenario():
+        manager = DummyTaskManager(artifact_chunk_chars=4, artifact_chunk_delay=60)
+        await manager.upsert_task(_send_params("t1"))
+        stream = _agent_stream([_item("Hello world", complete=True)])
+        await manager.run_streaming_agent("t1", stream)
+        return manager.task_event_buffers["t1"].since(None)
+
+    events = asyncio.run(scenario())
+    chunks = [
+        e.event.artifact for e in events if isinstance(e.event, TaskArtifactUpdateEvent)
+    ]
+    assert [(c.parts[0].text, c.lastChunk) for c in chunks] == [("Hello world", True)]
+
+
+async def _failing_stream():
+    yield _item("partial")
+    raise RuntimeError("model went away")
+
+
+def test_streaming_run_without_final_item_still_finishes():
+    async def scenario(stream):
+        manager = DummyTaskManager(artifact_chunk_chars=100, artifact_chunk_delay=60)
+        await manager.upsert_task(_send_params("t1"))
+        await manager.run_streaming_agent("t1", stream)
+        last_event = manager.task_event_buffers["t1"].since(None)[-1].event
+        return await manager.task_store.get("t1"), last_event
+
+    task, last_event = asyncio.run(scenario(_agent_stream([_item("a"), _item("b")])))
+    assert task.status.state == TaskState.COMPLETED
+    assert task.artifacts[0].parts[0].text == "ab"
+    assert task.artifacts[0].lastChunk
+    assert last_event.final and last_event.status.state == TaskState.COMPLETED
+
+    task, last_event = asyncio.run(scenario(_agent_stream([])))
+    assert task.status.state == TaskState.FAILED
+    assert last_event.final
+
+    task, last_event = asyncio.run(scenario(_failing_stream()))
+    assert task.status.state == TaskState.FAILED
+    assert task.artifacts[0].parts[0].text == "partial"
+    assert last_event.final and last_event.status.state == TaskState.FAILED
@@ -0,0 +1,138 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from rabbithole.a2a.server.sqlite_task_store import SQLiteTaskStore
+from rabbithole.a2a.types import (
+    Artifact,
+    Message,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+def _message(text: str) -> Message:
+    return Message(role="agent", parts=[TextPart(text=text)])
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def write():
+        store = SQLiteTaskStore(db_path)
+        await store.create(
+            Task(
+                id="t1",
+                sessionId="s1",
+                status=TaskStatus(state=TaskState.SUBMITTED),
+                history=[_message("hi")],
+                metadata={"k": "v"},
+            )
+        )
+        await store.update("t1", status=TaskStatus(state=TaskState.WORKING))
+        await store.update("t1", messages=[_message("one"), _message("two")])
+        await store.update(
+            "t1",
+            status=TaskStatus(state=TaskState.COMPLETED),
+            artifacts=[Artifact(parts=[TextPart(text="done")])],
+        )
+        await store.close()
+
+    async def read():
+        store = SQLiteTaskStore(db_path)
+        task = await store.get("t1")
+        by_session = await store.get_by_session("s1")
+        await store.close()
+        return task, by_session
+
+    asyncio.run(write())
+    task, by_session = asyncio.run(read())
+
+    assert task.status.state == TaskState.COMPLETED
+    assert [m.parts[0].text for m in task.history] == ["hi", "one", "two"]
+    assert task.artifacts[0].parts[0].text == "done"
+    assert task.metadata == {"k": "v"}
+    assert [t.id for t in by_session] == ["t1"]
+
+
+def test_sqlite_store_reloads_evicted_cache_entries(tmp_path):
+    async def scenario():
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), cache_size=1)
+        for task_id in ("a", "b"):
+            await store.create(
+                Task(id=task_id, status=TaskStatus(state=TaskState.SUBMITTED))
+            )
+        # "a" left the cache before its writes were flushed.
+        await store.update("a", messages=[_message("x")])
+        task = await store.get("a")
+        await store.delete("b")
+        missing = await store.get("b")
+        await store.close()
+        return task, missing
+
+    task, missing = asyncio.run(scenario())
+    assert [m.parts[0].text for m in task.history] == ["x"]
+    assert missing is None
+
+
+class FailingOnceTaskStore(SQLiteTaskStore):
+    def __init__(self, path: str):
+        super().__init__(path, flush_interval=60)
+        self.failures = 1
+
+    def _commit(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        super()._commit(batch)
+
+
+def test_sqlite_store_keeps_batch_after_failed_commit(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def write():
+        store = FailingOnceTaskStore(db_path)
+        await store.create(
+            Task(id="t1", status=TaskStatus(state=TaskState.SUBMITTED), history=[])
+        )
+        with pytest.raises(sqlite3.OperationalError):
+            await store.flush()
+        await store.update("t1", messages=[_message("after")])
+        await store.close()
+
+    async def read():
+        store = SQLiteTaskStore(db_path)
+        task = await store.get("t1")
+        await store.close()
+        return task
+
+    asyncio.run(write())
+    task = asyncio.run(read())
+    assert [m.parts[0].text for m in task.history] == ["after"]
+
+
+def test_sqlite_store_concurrent_misses_share_cached_task(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+
+    async def scenario():
+        store = SQLiteTaskStore(db_path)
+        await store.create(
+            Task(id="t1", status=TaskStatus(state=TaskState.SUBMITTED), history=[])
+        )
+        await store.evict("t1")
+        await asyncio.gather(
+            store.update("t1", messages=[_message("m1")]),
+            store.update("t1", messages=[_message("m2")]),
+        )
+        await store.close()
+
+        store = SQLiteTaskStore(db_path)
+        task = await store.get("t1")
+        await store.close()
+        return task
+
+    task = asyncio.run(scenario())
+    assert sorted(m.parts[0].text for m in task.history) == ["m1", "m2"]